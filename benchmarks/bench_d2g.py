@@ -0,0 +1,209 @@
+"""
+Benchmark of the d2g pipeline on a synthetic schema.
+
+Generates a django app with a configurable number of models, each one holding every field type
+djangorm knows about and every relation shape (foreign key, self foreign key, one to one, many to
+many, many to many through a model), then times every phase of the conversion and tracks its peak
+memory. Results are written as json so that runs can be compared over time.
+
+    python benchmarks/bench_d2g.py --models 500 --repeat 3 --output bench.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APP_LABEL = "d2g_bench"
+
+# Extra arguments some fields can't be built without
+FIELD_ARGS = {
+    "CharField": "max_length=100, null=True",
+    "CommaSeparatedIntegerField": "max_length=100",
+    "DecimalField": "max_digits=10, decimal_places=2",
+    "FilePathField": "path='/tmp'",
+    "DateTimeField": "auto_now_add=True",
+    "SlugField": "unique=True",
+    "IntegerField": "db_index=True",
+}
+AUTO_FIELDS = ("AutoField", "BigAutoField", "SmallAutoField")
+
+
+def field_classes():
+    """
+    :return: (field classes that can be converted to go and java, skipped field classes)
+    """
+    from django.db import models
+    from djangorm.lib.data import DjangoField
+    from djangorm.lib.registry import resolve_name
+
+    supported, skipped = [], []
+    for f in DjangoField:
+        if f.value in AUTO_FIELDS or not hasattr(models, f.value):
+            continue
+        go = resolve_name(f.value).go
+        if go is not None and go.gofield:
+            supported.append(f.value)
+        else:
+            skipped.append(f.value)
+    return supported, skipped
+
+
+def snake(name):
+    return "".join("_" + c.lower() if c.isupper() else c for c in name).lstrip("_")
+
+
+def generate_models_source(count):
+    lines = ["from django.db import models", ""]
+    classes, _ = field_classes()
+    for i in range(count):
+        lines.append("")
+        lines.append("class Model%d(models.Model):" % i)
+        lines.append("    id = models.%s(primary_key=True)" % AUTO_FIELDS[i % len(AUTO_FIELDS)])
+        for cls in classes:
+            lines.append("    %s = models.%s(%s)" % (snake(cls), cls, FIELD_ARGS.get(cls, "")))
+        lines.append("    parent = models.ForeignKey('self', null=True, on_delete=models.SET_NULL)")
+        if i >= 1:
+            lines.append("    previous = models.ForeignKey(Model%d, on_delete=models.CASCADE)" % (i - 1))
+        if i >= 2:
+            lines.append("    profile = models.OneToOneField(Model%d, null=True, on_delete=models.PROTECT)" % (i - 2))
+        if i >= 3:
+            lines.append("    others = models.ManyToManyField(Model%d)" % (i - 3))
+            lines.append("    linked = models.ManyToManyField(Model%d, through='Link%d')" % (i - 3, i))
+            lines.append("")
+            lines.append("")
+            lines.append("class Link%d(models.Model):" % i)
+            lines.append("    source = models.ForeignKey(Model%d, on_delete=models.CASCADE)" % i)
+            lines.append("    target = models.ForeignKey(Model%d, on_delete=models.CASCADE, related_name='+')" % (i - 3))
+            lines.append("    weight = models.IntegerField()")
+    return "\n".join(lines) + "\n"
+
+
+def setup_django(count):
+    """
+    Write the synthetic app to a temporary directory and boot django with it.
+    :return: path of the generated models.py
+    """
+    import django
+    from django.conf import settings
+
+    root = tempfile.mkdtemp(prefix="d2g_bench_")
+    app_dir = os.path.join(root, APP_LABEL)
+    os.makedirs(app_dir)
+    open(os.path.join(app_dir, "__init__.py"), "w").close()
+    models_path = os.path.join(app_dir, "models.py")
+    with open(models_path, "w") as fh:
+        fh.write(generate_models_source(count))
+    sys.path.insert(0, root)
+
+    settings.configure(
+        INSTALLED_APPS=["django.contrib.contenttypes", APP_LABEL],
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+    )
+    django.setup()
+    return models_path
+
+
+def measure(fn, repeat):
+    """
+    Time fn `repeat` times, then run it once more under tracemalloc for its peak memory.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "min_seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "peak_memory_bytes": peak,
+    }
+
+
+def run(count, repeat, jobs):
+    start = time.perf_counter()
+    models_path = setup_django(count)
+    setup_seconds = time.perf_counter() - start
+
+    from djangorm.lib.cleaner import get_models
+    from djangorm.lib.extractor import extract_snapshot
+    from djangorm.lib.render import render_go, render_java
+    from djangorm.model_to_class import (
+        get_model_structure, convert_models_to_gorm, convert_models_to_java
+    )
+
+    apps = [APP_LABEL]
+    models = get_models(apps)
+    structures = [get_model_structure(app, model) for app, model in models]
+
+    phases = {
+        "get_models": lambda: get_models(apps),
+        "get_model_structure": lambda: [get_model_structure(app, model) for app, model in models],
+        "render_go": lambda: [render_go(s) for s in structures],
+        "render_java": lambda: [render_java(s) for s in structures],
+        "convert_go": lambda: convert_models_to_gorm(apps, jobs=jobs, out=io.StringIO()),
+        "convert_java": lambda: convert_models_to_java(apps, jobs=jobs, out=io.StringIO()),
+        "extract_static": lambda: extract_snapshot([models_path]),
+    }
+    results = {}
+    for name, fn in phases.items():
+        results[name] = measure(fn, repeat)
+        results[name]["per_model_us"] = results[name]["min_seconds"] / len(models) * 1e6
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "django": __import__("django").get_version(),
+            "models": len(models),
+            "fields": sum(len(s.fields) for s in structures),
+            "skipped_field_classes": field_classes()[1],
+            "repeat": repeat,
+            "jobs": jobs,
+            "django_setup_seconds": setup_seconds,
+        },
+        "phases": results,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=200, help="number of synthetic models")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per phase, the fastest is kept")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the convert_* phases")
+    parser.add_argument("--output", help="json file the results are written to (default: stdout)")
+    options = parser.parse_args(argv)
+
+    results = run(options.models, options.repeat, options.jobs)
+    if options.output:
+        with open(options.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
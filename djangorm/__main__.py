@@ -0,0 +1,160 @@
+"""
+Render go structs / kotlin classes without importing django, either from a schema snapshot
+written by `manage.py d2g --snapshot`, or by statically parsing models.py files:
+
+    python -m djangorm schema.json --lang=go
+    python -m djangorm app1/models.py app2/ --lang=go
+"""
+import argparse
+import json
+import sys
+from .lib.data import ENTITY_CACHE_MODES, OutputDir
+from .lib.extractor import extract_snapshot
+from .lib.snapshot import read_snapshot, write_snapshot
+from .model_to_class import convert_snapshot
+
+
+def load_sources(sources, default_auto_field="AutoField", strict=False):
+    if len(sources) == 1 and sources[0].endswith(".json"):
+        with open(sources[0], "r", encoding="utf-8") as fh:
+            return read_snapshot(fh)
+
+    snapshot, problems = extract_snapshot(sources, default_auto_field=default_auto_field)
+    for problem in problems:
+        sys.stderr.write("warning: %s\n" % problem)
+    if problems and strict:
+        sys.exit("%d model(s)/field(s) could not be resolved statically" % len(problems))
+    return snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m djangorm", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "sources", nargs="+",
+        help="snapshot file written by `manage.py d2g --snapshot`, or models.py files / app directories"
+    )
+    parser.add_argument("--lang", choices=["go", "java", "proto"], help="java, go or proto")
+    parser.add_argument("--apps", nargs="+", help="only convert models of these apps")
+    parser.add_argument("--orm", action="store_false", dest="orm", help="if you want orm tags (only go)")
+    parser.add_argument("--pack", action="store_true", help="order struct fields by alignment (only go)")
+    parser.add_argument("--scan", action="store_true", help="also generate ScanRow/Values methods (only go)")
+    parser.add_argument(
+        "--preload", type=int, default=0, metavar="DEPTH",
+        help="generate a gorm scope loading the relations up to DEPTH relations away (only go)"
+    )
+    parser.add_argument("--valid", action="store_false", dest="valid", help="if you want valid tags (only go)")
+    parser.add_argument(
+        "--json", action="store_true", dest="json_methods", help="also generate reflection free JSON methods (only go)"
+    )
+    parser.add_argument(
+        "--validate", action="store_true", dest="validate_methods",
+        help="generate Validate() methods instead of validate tags (only go)"
+    )
+    parser.add_argument(
+        "--compact-types", action="store_true", help="pick types from the choices and validators of the fields"
+    )
+    parser.add_argument(
+        "--null-policy", choices=["value", "pointer", "sql"], default="value",
+        help="hold nullable columns as plain values, pointers or sql.Null* types (go; java makes "
+             "them nullable, T?, unless value)"
+    )
+    parser.add_argument("--lazy", action="store_true", help="fetch to-one relations lazily (only java)")
+    parser.add_argument("--batch-size", type=int, help="@BatchSize of lazy collections and references (only java)")
+    parser.add_argument(
+        "--entity-graphs", type=int, default=0, metavar="DEPTH",
+        help="generate named entity graphs following relations up to DEPTH relations away (only java)"
+    )
+    parser.add_argument(
+        "--id-generation", choices=["identity", "sequence"], default="identity",
+        help="take auto field values from the identity column or from its postgres sequence (only java)"
+    )
+    parser.add_argument("--allocation-size", type=int, default=1, help="ids taken per sequence call (only java)")
+    parser.add_argument(
+        "--dynamic-update", type=int, metavar="COLUMNS",
+        help="generate @DynamicUpdate on entities of at least COLUMNS columns (only java)"
+    )
+    parser.add_argument(
+        "--entity-cache", metavar="FILE",
+        help="json file of the cache modes of the entities, by model label or app label (only java)"
+    )
+    parser.add_argument(
+        "--routes", action="store_true",
+        help="also generate the databases DATABASE_ROUTERS route each model to, known from snapshots only (go, java)"
+    )
+    parser.add_argument(
+        "--proto-relations", choices=["ids", "messages"], default="ids",
+        help="represent forward relations by their ids, or also embed the related messages (only proto)"
+    )
+    parser.add_argument(
+        "--proto-lock", default="d2g.proto.lock", help="file keeping the field numbers across runs (only proto)"
+    )
+    parser.add_argument("--output", help="file the generated code is written to (default: stdout)")
+    parser.add_argument("--out-dir", help="write one file per app (or per model, see --split) in this directory instead")
+    parser.add_argument("--split", choices=["app", "model"], default="app", help="one file per app or per model")
+    parser.add_argument(
+        "--package", default="models",
+        help="go/kotlin/proto package of the files written to --out-dir, and of streamed proto"
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes used for rendering")
+    parser.add_argument(
+        "--default-auto-field", default="AutoField",
+        help="field class of implicit primary keys when parsing models.py (DEFAULT_AUTO_FIELD)"
+    )
+    parser.add_argument("--strict", action="store_true", help="fail if any model or field can not be parsed")
+    parser.add_argument("--snapshot", help="write the parsed models to this snapshot instead of generating code")
+    options = parser.parse_args(argv)
+
+    snapshot = load_sources(options.sources, options.default_auto_field, options.strict)
+    if options.snapshot:
+        with open(options.snapshot, "w", encoding="utf-8") as fh:
+            write_snapshot(snapshot["models"], fh)
+        return
+    if not options.lang:
+        parser.error("--lang is required unless --snapshot is given")
+
+    if options.routes and not any(m.get("read_db") for m in snapshot["models"]):
+        # routers are code, only `manage.py d2g --snapshot` can run them
+        sys.stderr.write("warning: --routes needs a snapshot written by `manage.py d2g --snapshot`, no routes found\n")
+
+    entity_cache = None
+    if options.entity_cache:
+        with open(options.entity_cache, "r", encoding="utf-8") as fh:
+            entity_cache = json.load(fh)
+        for label, mode in entity_cache.items():
+            if mode not in ENTITY_CACHE_MODES:
+                parser.error("unknown cache mode %r of %s, expected one of %s" % (
+                    mode, label, ", ".join(ENTITY_CACHE_MODES)
+                ))
+
+    out_dir = OutputDir(options.out_dir, options.split, options.package) if options.out_dir else None
+    out = open(options.output, "w", encoding="utf-8") if options.output else None
+    try:
+        written = convert_snapshot(
+            snapshot, options.lang, apps=options.apps, for_orm=options.orm, for_validation=options.valid,
+            jobs=options.jobs, out=out, out_dir=out_dir, go_options={
+                "pack": options.pack, "scan": options.scan, "preload_depth": options.preload,
+                "compact_types": options.compact_types, "null_policy": options.null_policy,
+                "json_methods": options.json_methods, "validate_methods": options.validate_methods,
+                "routes": options.routes,
+            },
+            java_options={
+                "lazy": options.lazy, "batch_size": options.batch_size, "entity_graph_depth": options.entity_graphs,
+                "id_generation": options.id_generation, "allocation_size": options.allocation_size,
+                "dynamic_update": options.dynamic_update, "compact_types": options.compact_types,
+                "entity_cache": entity_cache, "routes": options.routes, "null_policy": options.null_policy,
+            },
+            proto_options={
+                "relations": options.proto_relations, "lock": options.proto_lock, "package": options.package
+            }
+        )
+    finally:
+        if out:
+            out.close()
+    if written:
+        sys.stderr.write("Wrote %d file(s) to %s, %d unchanged\n" % (written[0], out_dir.path, written[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.db.models import options
+from .lib.data import META_CACHE_OPTION
+
+
+class DjangormConfig(AppConfig):
+    name = "djangorm"
+
+    def __init__(self, app_name, app_module):
+        super().__init__(app_name, app_module)
+        # Let models declare Meta.d2g_cache (see lib.data.ENTITY_CACHE_MODES). Meta is checked when the model
+        # classes are created, which django does after creating every app config but before ready() runs, so
+        # the option is registered here, i.e. only when djangorm is in INSTALLED_APPS
+        if META_CACHE_OPTION not in options.DEFAULT_NAMES:
+            options.DEFAULT_NAMES += (META_CACHE_OPTION,)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from .cleaner import get_model_routes, get_relation_target
+from .data import META_CACHE_OPTION
+from .registry import CUSTOM_FIELDS
+
+# Bump whenever a renderer change alters the generated code for the same input,
+# so that stale cache entries are never served.
+RENDERER_VERSION = 10
+
+# Modules turning a model into code, their source is part of the key too, so that a renderer
+# change that forgot to bump RENDERER_VERSION does not serve stale code either
+RENDERER_MODULES = ("cleaner", "data", "fieldtypes", "graph", "registry", "render", "validation")
+
+
+def _renderer_digest():
+    digest = hashlib.sha1()
+    for name in RENDERER_MODULES:
+        with open(os.path.join(os.path.dirname(__file__), name + ".py"), "rb") as fh:
+            digest.update(fh.read())
+    return digest.hexdigest()
+
+
+RENDERER_DIGEST = _renderer_digest()
+
+
+def _stable(value):
+    """
+    Reduce a value found on a model's `_meta` into something json serializable
+    whose representation does not change between runs (no memory addresses).
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _stable(v) for k, v in sorted(value.items(), key=lambda i: str(i[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_stable(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted([_stable(v) for v in value], key=repr)
+    if isinstance(value, type) and hasattr(value, "_meta"):
+        return value._meta.label
+    if not isinstance(value, type) and hasattr(value, "deconstruct"):
+        path, args, kwargs = value.deconstruct()[-3:]
+        return [path, _stable(args), _stable(kwargs)]
+    if callable(value):
+        return "%s.%s" % (getattr(value, "__module__", ""), getattr(value, "__qualname__", repr(value)))
+    return repr(value)
+
+
+def _field_fingerprint(f):
+    data = {"class": f.__class__.__name__, "name": f.name}
+    if hasattr(f, "deconstruct"):
+        data["deconstruct"] = _stable(f.deconstruct()[1:])
+        data["column"] = getattr(f, "column", None)
+    else:
+        # Reverse relations (ManyToOneRel, ManyToManyRel, ...) are described by
+        # the forward field they mirror.
+        data["accessor"] = f.get_accessor_name() if hasattr(f, "get_accessor_name") else None
+        data["remote_field"] = getattr(getattr(f, "field", None), "name", None)
+        data["null"] = getattr(f, "null", None)
+    if getattr(f, "related_model", None) is not None:
+        data["related_model"] = _stable(f.related_model)
+        data["related_table"] = f.related_model._meta.db_table
+        data["related_cache"] = getattr(f.related_model._meta, META_CACHE_OPTION, None)
+    if getattr(f, "many_to_many", False):
+        forward = f if hasattr(f, "m2m_db_table") else f.field
+        data["m2m"] = [forward.m2m_db_table(), forward.m2m_column_name(), forward.m2m_reverse_name()]
+    if hasattr(f, "deconstruct") and getattr(f, "column", None) and getattr(f, "related_model", None) is not None:
+        # the column is typed as the field it refers to, which lives on another model
+        data["target"] = _field_fingerprint(get_relation_target(f))
+    return data
+
+
+def model_fingerprint(model, routes=False):
+    """
+    :param routes: Include the databases DATABASE_ROUTERS route the model to, which may change
+                   without the model changing, for code rendered with --routes
+    """
+    opts = model._meta
+    return {
+        "label": opts.label,
+        "object_name": opts.object_name,
+        "db_table": opts.db_table,
+        "options": _stable({
+            "unique_together": opts.unique_together,
+            "index_together": getattr(opts, "index_together", ()),     # removed in django 5.1
+            "indexes": opts.indexes,
+            "constraints": opts.constraints,
+            META_CACHE_OPTION: getattr(opts, META_CACHE_OPTION, None),
+        }),
+        "routes": get_model_routes(model) if routes else None,
+        "fields": [_field_fingerprint(f) for f in opts.get_fields()],
+    }
+
+
+class RenderCache:
+    """
+    On-disk cache of rendered code, one file per (model fingerprint, target, options).
+    Entries are evicted least-recently-used first once the cache grows past `max_size` bytes.
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, model, lang, options, related=(), extra=None):
+        """
+        :param related: other models whose changes alter the code rendered for model
+        :param extra: other json serializable state the rendered code depends on
+        """
+        payload = json.dumps({
+            "version": RENDERER_VERSION,
+            "renderer": RENDERER_DIGEST,
+            "lang": lang,
+            "options": _stable(options),
+            "custom_fields": _stable(CUSTOM_FIELDS),
+            "model": model_fingerprint(model, options.get("routes", False)),
+            "related": [model_fingerprint(m) for m in related],
+            "extra": extra,
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def get(self, key):
+        entry = self._entry(key)
+        try:
+            with open(entry, "r", encoding="utf-8") as fh:
+                code = fh.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        os.utime(entry)     # mark as recently used for eviction
+        self.hits += 1
+        return code
+
+    def set(self, key, code):
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry))
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(code)
+        os.replace(tmp, entry)
+
+    def invalidate(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def evict(self):
+        if not self.max_size or not os.path.isdir(self.path):
+            return
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                stat = os.stat(os.path.join(root, name))
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            os.remove(entry)
+            total -= size
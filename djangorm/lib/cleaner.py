@@ -1,87 +1,8 @@
-from typing import List
-from django.apps import apps
-from .data import (
-    KGenerator, KValidation, KField, DjangoField as DJ,
-)
-
-
-def get_field_generator(f) -> List[KGenerator]:
-    ftype = DJ(f.get_internal_type())
-    _allowed_list = [
-        DJ.AutoField,
-        DJ.BigAutoField,
-        DJ.SmallAutoField,
-        DJ.UUIDField,
-        DJ.DateTimeField,
-    ]
-
-    if ftype not in _allowed_list:
-        return [KGenerator.Noop]
-
-    if ftype == DJ.DateTimeField:
-        if f.auto_now:
-            return [KGenerator.CREATE_DATETIME_GENERATOR]
-        elif f.auto_now_add:
-            return [KGenerator.MODIFY_DATETIME_GENERATOR]
-        else:
-            return [KGenerator.Noop]
-
-    field_type_map = {
-        DJ.AutoField: [KGenerator.AutoGenerator],
-        DJ.BigAutoField: [KGenerator.AutoGenerator],
-        DJ.SmallAutoField: [KGenerator.AutoGenerator],
-        DJ.UUIDField: [KGenerator.UUIDGenerator],
-    }
-    return field_type_map[ftype]
-
-
-def get_field_validation(f) -> [KValidation]:
-    ftype = DJ(f.get_internal_type())
-    field_type_map = {
-        DJ.URLField: [KValidation.URLValidator],
-        DJ.EmailField: [KValidation.EmailValidator],
-        DJ.FloatField: [KValidation.EmailValidator],
-        DJ.IPAddressField: [KValidation.IPValidator],
-    }
-    return field_type_map.get(ftype, [KValidation.Noop])
-
-
-def get_field_type(f) -> KField:
-    ftype = DJ(f.get_internal_type())
-    field_type_map = {
-        DJ.AutoField: KField.Int,
-        DJ.BigAutoField: KField.Long,
-        DJ.BigIntegerField: KField.Long,
-        DJ.BinaryField: KField.ByteArray,
-        DJ.BooleanField: KField.Boolean,
-        DJ.CharField: KField.String,
-        DJ.DateField: KField.LocalDate,
-        DJ.DateTimeField: KField.LocalDateTime,
-        DJ.DecimalField: KField.Double,
-        DJ.DurationField: KField.String,
-        DJ.EmailField: KField.String,
-        DJ.FileField: KField.String,
-        DJ.FilePathField: KField.String,
-        DJ.FloatField: KField.Float,
-        DJ.ImageField: KField.String,
-        DJ.IntegerField: KField.String,
-        DJ.GenericIPAddressField: KField.String,
-        DJ.JSONField: KField.Json,
-        DJ.NullBooleanField: KField.Boolean,
-        DJ.PositiveBigIntegerField: KField.Int,
-        DJ.PositiveIntegerField: KField.Int,
-        DJ.PositiveSmallIntegerField: KField.Int,
-        DJ.SlugField: KField.String,
-        DJ.SmallAutoField: KField.Short,
-        DJ.SmallIntegerField: KField.Int,
-        DJ.TextField: KField.String,
-        DJ.TimeField: KField.LocalTime,
-        DJ.URLField: KField.String,
-        DJ.UUIDField: KField.String,
-        DJ.CommaSeparatedIntegerField: KField.String,
-        DJ.IPAddressField: KField.String,
-    }
-    return field_type_map[ftype]
+import datetime
+import decimal
+from typing import Tuple
+from .data import FieldIR, GoType, IndexIR
+from .registry import resolve_field
 
 
 def get_java_field_name(fname):
@@ -93,13 +14,206 @@ def get_go_field_name(fname):
     return "".join([f.capitalize() for f in fname.split("_")])
 
 
-def get_models(app_names):
-    return [
-        (m._meta.app_label, m)
-        for m in apps.get_models()
-        if any([m._meta.app_label == aname for aname in app_names])
-    ]
+def _plain(value):
+    # json friendly copy of a value, TextChoices / IntegerChoices members included
+    for cls in (bool, int, float, str):
+        if isinstance(value, cls):
+            return cls(value)
+    raise ValueError(value)
+
+
+def get_field_choices(f) -> Tuple:
+    """
+    :return: values of the choices of a field, flattened, () without choices or when they are not plain values
+    """
+    if not getattr(f, "choices", None):
+        return ()
+    try:
+        return tuple(None if value is None else _plain(value) for value, _ in f.flatchoices)
+    except ValueError:
+        return ()
+
+
+def _number(value):
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def get_field_limits(f) -> Tuple:
+    """
+    :return: (min, max) values allowed by the MinValueValidator / MaxValueValidator of a field, None where it
+             has none (or the limit is not a number, e.g. a date or a callable)
+    """
+    from django.core.validators import MaxValueValidator, MinValueValidator
+
+    low = high = None
+    for v in getattr(f, "_validators", ()):
+        limit = getattr(v, "limit_value", None)
+        if isinstance(limit, bool) or not isinstance(limit, (int, float, decimal.Decimal)):
+            continue
+        limit = _number(limit)
+        if isinstance(v, MinValueValidator):
+            low = limit if low is None else max(low, limit)
+        elif isinstance(v, MaxValueValidator):
+            high = limit if high is None else min(high, limit)
+    return low, high
+
+
+def get_go_type(kind) -> GoType:
+    go = kind.go
+    return GoType(go.dfield, go.gofield, go.orm, go.valid) if go is not None else None
+
+
+def get_relation_target(f):
+    """
+    :return: field the column of a forward o2o / m2o relation holds the value of (the related primary
+             key or to_field), followed through the parent links of multi table inheritance
+    """
+    from django.db.models import ForeignKey
+
+    target = f.target_field
+    while isinstance(target, ForeignKey):
+        target = target.target_field
+    return target
+
+
+def _has_column(relation):
+    # forward o2o / m2o relations, but for generic foreign keys
+    return not relation.reverse and relation.cardinality in ("o2o", "m2o") and relation.column is not None
+
+
+def get_field_ir(f, relation=None) -> FieldIR:
+    """
+    :param relation: Relation of f from the RelationGraph, for relation fields
+    """
+    if relation is None:
+        kind = resolve_field(f)
+        java, validation, generator = kind.java, tuple(kind.validation), tuple(kind.generator(f))
+        choices, (min_value, max_value) = get_field_choices(f), get_field_limits(f)
+    else:
+        try:
+            kind = resolve_field(f)
+        except LookupError:     # e.g. GenericForeignKey, only render_go needs a go type for it
+            kind = None
+        java, validation, generator = None, (), ()
+        choices, min_value, max_value = (), None, None
+    return FieldIR(
+        name=f.name,
+        field_class=f.__class__.__name__,
+        go=get_go_type(kind) if kind else None,
+        java=java,
+        validation=validation,
+        generator=generator,
+        column=getattr(f, "column", None),
+        primary_key=getattr(f, "primary_key", False),
+        null=getattr(f, "null", None),
+        blank=getattr(f, "blank", None),
+        db_index=getattr(f, "db_index", None),
+        unique=getattr(f, "unique", None),
+        max_length=getattr(f, "max_length", None),
+        cardinality=relation.cardinality if relation else None,
+        reverse=relation.reverse if relation else False,
+        related_object_name=relation.related_object_name if relation else None,
+        related_model_name=relation.related_model_name if relation else None,
+        accessor=relation.accessor if relation else None,
+        remote_field_name=relation.remote_field_name if relation else None,
+        attname=relation.attname if relation else None,
+        on_delete=relation.on_delete if relation else None,
+        m2m_db_table=relation.m2m_db_table if relation else None,
+        m2m_column_name=relation.m2m_column_name if relation else None,
+        m2m_reverse_name=relation.m2m_reverse_name if relation else None,
+        related_label=relation.related_label if relation else None,
+        choices=choices,
+        min_value=min_value,
+        max_value=max_value,
+        max_digits=getattr(f, "max_digits", None),
+        decimal_places=getattr(f, "decimal_places", None),
+        related_cache=relation.related_cache if relation else None,
+        target=get_field_ir(get_relation_target(f)) if relation and _has_column(relation) else None,
+    )
+
+
+def _sql_literal(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        value = value.isoformat()
+    return "'%s'" % str(value).replace("'", "''")
+
+
+def get_condition_sql(model, condition):
+    """
+    SQL of the condition of a partial index, with its parameters inlined, as written by the
+    default database connection.
+    """
+    from django.db import connection
+    from django.db.models.sql import Query
+
+    query = Query(model, alias_cols=False)
+    sql, params = query.build_where(condition).as_sql(query.get_compiler(connection=connection), connection)
+    return sql % tuple(_sql_literal(p) for p in params)
+
+
+def get_model_indexes(model) -> Tuple[IndexIR, ...]:
+    """
+    Multi column and named indexes of a model: unique_together, index_together, Meta.indexes and
+    UniqueConstraints. Indexes on expressions have no columns and are left out.
+    """
+    from django.db import connection
+    from django.db.models import UniqueConstraint
+
+    opts = model._meta
+    # Names of unique_together / index_together indexes are only known to the schema editor
+    schema_editor = connection.schema_editor()
+    indexes = []
+    for together, suffix in ((opts.unique_together, "_uniq"), (getattr(opts, "index_together", ()), "_idx")):
+        for fields in together:
+            columns = tuple(opts.get_field(name).column for name in fields)
+            name = schema_editor._create_index_name(opts.db_table, columns, suffix=suffix)
+            indexes.append(IndexIR(name, columns, suffix == "_uniq"))
+    for index in opts.indexes:
+        if index.fields:
+            indexes.append(IndexIR(
+                index.name,
+                tuple(opts.get_field(name).column + (" DESC" if order else "") for name, order in index.fields_orders),
+                False,
+                get_condition_sql(model, index.condition) if index.condition else None,
+            ))
+    for constraint in opts.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.fields:
+            indexes.append(IndexIR(
+                constraint.name,
+                tuple(opts.get_field(name).column for name in constraint.fields),
+                True,
+                get_condition_sql(model, constraint.condition) if constraint.condition else None,
+            ))
+    return tuple(indexes)
+
+
+def get_model_routes(model) -> Tuple[str, str]:
+    """
+    :return: (database alias django reads the model's rows from, the one it writes them to), as
+             decided by DATABASE_ROUTERS (db_for_read / db_for_write) without hints
+    """
+    from django.db import router
+
+    return router.db_for_read(model), router.db_for_write(model)
+
+
+def iter_models(app_names):
+    # Imported here so that rendering from a snapshot does not need django installed
+    from django.apps import apps
+
+    app_names = set(app_names)
+    for m in apps.get_models():
+        if m._meta.app_label in app_names:
+            yield m._meta.app_label, m
 
 
-def is_field_reversed(field):
-    return field.__class__.__name__.endswith("Rel")
+def get_models(app_names):
+    return list(iter_models(app_names))
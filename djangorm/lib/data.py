@@ -1,6 +1,6 @@
 import enum
 from dataclasses import dataclass
-from typing import NamedTuple, List
+from typing import NamedTuple, Tuple
 
 
 @dataclass
@@ -23,12 +23,12 @@ class D2GField(Field, enum.Enum):
     CharField = "CharField", "string", "type:varchar(%(max_length)s)", None
     DateField = "DateField", "datatypes.Date", None, None
     DateTimeField = "DateTimeField", "time.Time", None, None
-    DecimalField = "DecimalField", "float", None, None
+    DecimalField = "DecimalField", "float64", None, None
     DurationField = "DurationField", None, None, None
-    EmailField = "EmailField", "string", "type:varchar(254)", "email"
-    FileField = "FileField", "string", "type:varchar(100)", None
-    FilePathField = "FilePathField", "string", "type:varchar(100)", None
-    FloatField = "FloatField", "float", None, None
+    EmailField = "EmailField", "string", "type:varchar(%(max_length)s)", "email"
+    FileField = "FileField", "string", "type:varchar(%(max_length)s)", None
+    FilePathField = "FilePathField", "string", "type:varchar(%(max_length)s)", None
+    FloatField = "FloatField", "float64", None, None
     ImageField = "ImageField", "string", None, None
     IntegerField = "IntegerField", "int32", None, "numeric"
     GenericIPAddressField = "GenericIPAddressField", None, None, None
@@ -37,12 +37,12 @@ class D2GField(Field, enum.Enum):
     PositiveBigIntegerField = "PositiveBigIntegerField", "uint64", "check:%(field_name)s>0", "numeric,gte=0"
     PositiveIntegerField = "PositiveIntegerField", "uint32", "check:%(field_name)s>0", "numeric,gte=0"
     PositiveSmallIntegerField = "PositiveSmallIntegerField", "uint16", "check:%(field_name)s>0", "numeric,gte=0"
-    SlugField = "SlugField", "string", "type:varchar(50)", "numeric,gte=0"
+    SlugField = "SlugField", "string", "type:varchar(%(max_length)s)", None
     SmallAutoField = "SmallAutoField", "uint16", None, None
     SmallIntegerField = "SmallIntegerField", "int16", None, "numeric,gte=0"
     TextField = "TextField", "string", None, None
     TimeField = "TimeField", "time.Time", None, None
-    URLField = "URLField", "string", "type:varchar(100)", None
+    URLField = "URLField", "string", "type:varchar(%(max_length)s)", None
     UUIDField = "UUIDField", "uuid.UUID", "type:uuid;default:uuid_generate_v4()", None
 
     ForeignKey = "ForeignKey", "%(foreign_model)s", "foreignKey:%(foreign_model_id)s", None
@@ -91,6 +91,7 @@ class DjangoField(enum.Enum):
 
 class KField(enum.Enum):
     # Integer types
+    Byte = "Byte"
     Short = "Short"
     Int = "Int"
     Long = "Long"
@@ -99,6 +100,9 @@ class KField(enum.Enum):
     Float = "Float"
     Double = "Double"
 
+    # Fixed point
+    BigDecimal = "BigDecimal"
+
     # Boolean
     Boolean = "Boolean"
 
@@ -156,66 +160,128 @@ class KGenerator(enum.Enum):
             }[self]
 
 
-@dataclass
-class BasicField:
-    name: str
-    nullable: bool
-    field_class: str
-    type: KField
-    validation: [KValidation]
-    generator: [KGenerator]
+# Meta option of a model marking its entity as cached or read-only, e.g. d2g_cache = "read-only"
+META_CACHE_OPTION = "d2g_cache"
+
+# Entity cache modes, of Meta.d2g_cache or of the entity cache configuration, and the hibernate
+# CacheConcurrencyStrategy they are cached with: read-only entities are also @Immutable,
+# "immutable" ones are @Immutable without being cached
+ENTITY_CACHE_MODES = {
+    "read-only": "READ_ONLY",
+    "nonstrict-read-write": "NONSTRICT_READ_WRITE",
+    "read-write": "READ_WRITE",
+    "transactional": "TRANSACTIONAL",
+    "immutable": None,
+}
+
+
+class GoType(NamedTuple):
+    # Plain copy of the D2GField member, or registered Field, a field is converted with
+    dfield: str
+    gofield: str = None
+    orm: str = None
+    valid: str = None
 
 
-class M2MField(NamedTuple):
+class FieldIR(NamedTuple):
+    # Everything render_go and render_java need about a field or relation of a model, as plain
+    # values only, so that models can be hashed, pickled to worker processes and cached
     name: str
-    model: str
-    db_table: str = ""
-    column_id: str = ""
-    reverse_column_id: str = ""
+    field_class: str
+    go: GoType = None                   # None when no go type is registered for field_class
+    java: KField = None                 # None for relations
+    validation: Tuple[KValidation, ...] = ()
+    generator: Tuple[KGenerator, ...] = ()
+    column: str = None
+    primary_key: bool = False
+    null: bool = None
+    blank: bool = None
+    db_index: bool = None
+    unique: bool = None
+    max_length: int = None
+    cardinality: str = None             # o2o, m2o, o2m or m2m for relations, None otherwise
     reverse: bool = False
-    reverse_field: str = None
-
-    def __str__(self):
-        return "name=%s - model=%s db_table=%s - column_id=%s - reverse_column_id=%s\
-         - reverse=%s - reverse_field=%s" % (
-            self.name, self.model, self.db_table, self.column_id,
-            self.reverse_column_id, self.reverse, self.reverse_field
-        )
+    related_object_name: str = None
+    related_model_name: str = None
+    accessor: str = None                # reverse relations only
+    remote_field_name: str = None       # reverse relations only, name of the forward field
+    attname: str = None
+    on_delete: str = None
+    m2m_db_table: str = None
+    m2m_column_name: str = None
+    m2m_reverse_name: str = None
+    related_label: str = None           # app_label.ObjectName of the related model, for relations
+    choices: Tuple = ()                 # values of the choices, flattened, () without choices
+    min_value: float = None             # from MinValueValidator
+    max_value: float = None             # from MaxValueValidator
+    max_digits: int = None              # DecimalField only
+    decimal_places: int = None          # DecimalField only
+    related_cache: str = None           # Meta.d2g_cache of the related model, for relations
+    target: "FieldIR" = None            # field the column of a forward to-one relation refers to
+
+
+class RelationPath(NamedTuple):
+    # A relation followed from a model, with the relations followed from its related model in turn
+    name: str
+    cardinality: str
+    reverse: bool
+    accessor: str = None
+    related_object_name: str = None
+    related_label: str = None
+    children: Tuple["RelationPath", ...] = ()
 
 
-class M2OField(NamedTuple):
-    # M2O is never in reverse
+class IndexIR(NamedTuple):
+    # Index or unique constraint of a model, from Meta.indexes, constraints, unique_together
+    # or index_together. Single column field indexes (db_index, unique) stay on FieldIR.
     name: str
-    model: str
-    attname: str
+    columns: Tuple[str, ...]            # column names, followed by " DESC" for descending ones
+    unique: bool = False
+    condition: str = None               # SQL condition of partial indexes
 
-    def __str__(self):
-        return "name=%s - model=%s - attname=%s" % (
-            self.name, self.model, self.attname
-        )
 
+class ModelIR(NamedTuple):
+    app_name: str
+    class_name: str
+    table: str
+    fields: Tuple[FieldIR, ...]         # in _meta.get_fields() order
+    indexes: Tuple[IndexIR, ...] = ()
+    relation_paths: Tuple[RelationPath, ...] = ()   # only when asked for, see graph.relation_paths
+    cache: str = None                   # Meta.d2g_cache, see ENTITY_CACHE_MODES
+    read_db: str = None                 # database alias of DATABASE_ROUTERS db_for_read, None without django
+    write_db: str = None                # database alias of DATABASE_ROUTERS db_for_write, None without django
 
-class O2MField(NamedTuple):
-    # O2M is always reversed
-    name: str
-    model: str
-    reverse_field: str = None
 
-    def __str__(self):
-        return "name=%s - model=%s - reverse_field=%s" % (
-            self.name, self.model, self.reverse_field
-        )
+class ProtoNumbers(NamedTuple):
+    # Field numbers of the proto message of a model, and the numbers and names it must not reuse
+    fields: Tuple[Tuple[str, int], ...]
+    reserved_numbers: Tuple[int, ...] = ()
+    reserved_names: Tuple[str, ...] = ()
+
 
+class OutputDir(NamedTuple):
+    # Where generated code is written when not written to a single stream
+    path: str
+    split: str = "app"          # one file per "app" or per "model"
+    package: str = "models"     # go package / kotlin package of the generated files
 
-class O2OField(NamedTuple):
+
+class Relation(NamedTuple):
+    # A forward or reverse relation of a model, resolved once per run by the RelationGraph
+    kind: str                   # django class name, e.g. ForeignKey, ManyToManyRel
+    cardinality: str            # o2o, m2o, o2m or m2m
     name: str
-    model: str
-    nullable: bool
-    attname: str
     reverse: bool
-    reverse_field: str = None
-
-    def __str__(self):
-        return "name=%s - model=%s - attname=%s reverse=%s - reverse_field=%s" % (
-            self.name, self.model, self.attname, self.reverse, self.reverse_field
-        )
+    related_label: str = None
+    related_object_name: str = None
+    related_model_name: str = None
+    accessor: str = None        # reverse relations only
+    remote_field_name: str = None   # reverse relations only, name of the forward field
+    attname: str = None
+    column: str = None
+    null: bool = None
+    on_delete: str = None
+    m2m_db_table: str = None
+    m2m_column_name: str = None
+    m2m_reverse_name: str = None
+    related_cache: str = None   # Meta.d2g_cache of the related model
@@ -0,0 +1,668 @@
+"""
+Static extractor, reads models.py files with the `ast` module and builds the same ModelIR as
+`get_model_structure`, without importing django, settings or any app.
+
+It follows django's own defaults (implicit primary key, db_table and column names, reverse
+relations, auto-created m2m tables). Anything that can only be known at runtime (custom field
+classes, non literal arguments, swappable models, multi-table inheritance, ...) is reported as
+a problem and the field or model is left out.
+"""
+import ast
+import hashlib
+import os
+from .cleaner import get_go_type
+from .data import META_CACHE_OPTION, FieldIR, IndexIR, ModelIR
+from .registry import is_registered, resolve_name
+from .snapshot import SNAPSHOT_VERSION, dump_model
+
+RELATION_FIELDS = ("ForeignKey", "OneToOneField", "ManyToManyField")
+
+REVERSE_RELATIONS = {
+    "ForeignKey": "ManyToOneRel",
+    "OneToOneField": "OneToOneRel",
+    "ManyToManyField": "ManyToManyRel",
+}
+
+CARDINALITIES = {
+    "ForeignKey": "m2o",
+    "OneToOneField": "o2o",
+    "ManyToManyField": "m2m",
+    "ManyToOneRel": "o2m",
+    "OneToOneRel": "o2o",
+    "ManyToManyRel": "m2m",
+}
+
+DEFAULT_MAX_LENGTH = {
+    "EmailField": 254,
+    "SlugField": 50,
+    "URLField": 200,
+    "FileField": 100,
+    "ImageField": 100,
+    "FilePathField": 100,
+    "GenericIPAddressField": 39,
+    "IPAddressField": 15,
+    "UUIDField": 32,
+}
+
+# Keyword arguments the renderers depend on, they must be literals
+USED_KWARGS = (
+    "null", "blank", "db_index", "unique", "primary_key", "max_length", "db_column",
+    "related_name", "related_query_name", "db_table", "auto_now", "auto_now_add", "symmetrical",
+    "through_fields", "max_digits", "decimal_places", "to_field",
+)
+
+# Validators whose limit narrows the types and checks of a field
+LIMIT_VALIDATORS = ("MinValueValidator", "MaxValueValidator")
+
+# Enumeration types whose members are the values of `choices=<Class>.choices`
+CHOICES_CLASSES = ("IntegerChoices", "TextChoices")
+
+
+# Meta options holding indexes, kept as ast nodes until the fields of the model are known
+INDEX_OPTIONS = ("unique_together", "index_together", "indexes", "constraints")
+
+# Without a database connection the max identifier length is unknown, this is django's fallback
+MAX_NAME_LENGTH = 200
+
+
+class ExtractionProblem(Exception):
+    pass
+
+
+def _names_digest(*args, length):
+    h = hashlib.md5()
+    for arg in args:
+        h.update(arg.encode())
+    return h.hexdigest()[:length]
+
+
+def _create_index_name(table_name, column_names, suffix):
+    # Same as django's BaseDatabaseSchemaEditor._create_index_name, names unique/index_together indexes
+    hash_suffix_part = "%s%s" % (_names_digest(table_name, *column_names, length=8), suffix)
+    index_name = "%s_%s_%s" % (table_name, "_".join(column_names), hash_suffix_part)
+    if len(index_name) <= MAX_NAME_LENGTH:
+        return index_name
+    if len(hash_suffix_part) > MAX_NAME_LENGTH / 3:
+        hash_suffix_part = hash_suffix_part[:MAX_NAME_LENGTH // 3]
+    other_length = (MAX_NAME_LENGTH - len(hash_suffix_part)) // 2 - 1
+    index_name = "%s_%s_%s" % (table_name[:other_length], "_".join(column_names)[:other_length], hash_suffix_part)
+    if index_name[0] == "_" or index_name[0].isdigit():
+        index_name = "D%s" % index_name[:-1]
+    return index_name
+
+
+def _index_name(table_name, column_names, orders):
+    # Same as django's Index.set_name_with_model, names Meta.indexes without a name
+    hash_data = [table_name] + [("-%s" if desc else "%s") % c for c, desc in zip(column_names, orders)] + ["idx"]
+    name = "%s_%s_%s_idx" % (table_name[:11], column_names[0][:7], _names_digest(*hash_data, length=6))
+    if name[0] == "_" or name[0].isdigit():
+        name = "D%s" % name[1:]
+    return name
+
+
+class StaticModel:
+
+    def __init__(self, app_label, object_name, path=None, node=None, bases=(), meta=None):
+        meta = meta or {}
+        self.app_label = meta.get("app_label", app_label)
+        self.object_name = object_name
+        self.model_name = object_name.lower()
+        self.path = path
+        self.node = node
+        self.bases = bases
+        self.db_table = meta.get("db_table", "%s_%s" % (self.app_label, self.model_name))
+        self.abstract = meta.get("abstract", False)
+        self.proxy = meta.get("proxy", False)
+        self.cache = meta.get(META_CACHE_OPTION)
+        self.index_options = {key: meta[key] for key in INDEX_OPTIONS if key in meta}
+        self.fields = []
+        self.related = []
+
+    @property
+    def label(self):
+        return "%s.%s" % (self.app_label, self.object_name)
+
+
+class StaticField:
+    """
+    Field parsed from a model class body. Mirrors the attributes of django fields that the
+    introspection helpers in cleaner.py read.
+    """
+
+    def __init__(self, model, name, field_class, kwargs, to=None, on_delete=None, through=None):
+        self.model = model
+        self.name = name
+        self.field_class = field_class
+        self.to = to
+        self.through = through
+        self.related_model = None
+        self.through_model = None
+        self.on_delete = on_delete
+        self.primary_key = kwargs.get("primary_key", False)
+        self.null = kwargs.get("null", False)
+        self.blank = kwargs.get("blank", False)
+        self.db_index = kwargs.get("db_index", field_class in ("ForeignKey", "OneToOneField", "SlugField"))
+        self.unique = kwargs.get("unique", field_class == "OneToOneField") or self.primary_key
+        self.max_length = kwargs.get("max_length", DEFAULT_MAX_LENGTH.get(field_class))
+        self.auto_now = kwargs.get("auto_now", False)
+        self.auto_now_add = kwargs.get("auto_now_add", False)
+        self.kwargs = kwargs
+        if field_class == "NullBooleanField":
+            self.null = self.blank = True
+        if field_class in ("AutoField", "BigAutoField", "SmallAutoField") or self.auto_now or self.auto_now_add:
+            self.blank = True
+
+    @property
+    def attname(self):
+        return "%s_id" % self.name if self.field_class in ("ForeignKey", "OneToOneField") else self.name
+
+    @property
+    def column(self):
+        return self.kwargs.get("db_column") or self.attname
+
+    def get_internal_type(self):
+        return resolve_name(self.field_class).internal_type
+
+    def _placeholder(self, name):
+        return name % {"class": self.model.model_name, "app_label": self.model.app_label} if name else name
+
+    @property
+    def related_name(self):
+        return self._placeholder(self.kwargs.get("related_name"))
+
+    def related_query_name(self):
+        return (
+            self._placeholder(self.kwargs.get("related_query_name")) or self.related_name or self.model.model_name
+        )
+
+    @property
+    def symmetrical(self):
+        return self.kwargs.get("symmetrical", self.to == "self")
+
+    def has_reverse(self):
+        if self.related_name and self.related_name.endswith("+"):
+            return False
+        return not (self.field_class == "ManyToManyField" and self.symmetrical and self.related_model is self.model)
+
+    def get_accessor_name(self):
+        if self.related_name:
+            return self.related_name
+        return self.model.model_name + ("" if self.field_class == "OneToOneField" else "_set")
+
+    def m2m_db_table(self):
+        if self.through_model:
+            return self.through_model.db_table
+        return self.kwargs.get("db_table") or "%s_%s" % (self.model.db_table, self.name)
+
+    def _m2m_link(self, index, target):
+        through_fields = self.kwargs.get("through_fields")
+        for f in self.through_model.fields:
+            if through_fields and f.name == through_fields[index]:
+                return f.column
+            if not through_fields and f.field_class == "ForeignKey" and f.related_model is target:
+                return f.column
+        raise ExtractionProblem("could not find the %s link of through model %s" % (
+            "source" if index == 0 else "target", self.through_model.object_name
+        ))
+
+    def m2m_column_name(self):
+        if self.through_model:
+            return self._m2m_link(0, self.model)
+        if self.related_model is self.model:
+            return "from_%s_id" % self.model.model_name
+        return "%s_id" % self.model.model_name
+
+    def m2m_reverse_name(self):
+        if self.through_model:
+            return self._m2m_link(1, self.related_model)
+        if self.related_model is self.model:
+            return "to_%s_id" % self.related_model.model_name
+        return "%s_id" % self.related_model.model_name
+
+
+def _dotted(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        value = _dotted(node.value)
+        return value and "%s.%s" % (value, node.attr)
+    return None
+
+
+def _literal(node, name):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise ExtractionProblem("%s=%s is not a literal" % (name, ast.unparse(node)))
+
+
+def _flat_choices(node):
+    """
+    Values of literal choices, flattened, () when they are not literals (e.g. a TextChoices class),
+    the field is then converted as if it had none.
+    """
+    try:
+        choices = ast.literal_eval(node)
+        values = []
+        for value, label in choices:
+            if isinstance(label, (list, tuple)):
+                values.extend(v for v, _ in label)
+            else:
+                values.append(value)
+    except (ValueError, TypeError):
+        return ()
+    return tuple(values)
+
+
+def _limits(node):
+    """
+    (min, max) of the literal MinValueValidator / MaxValueValidator of a validators list, None where it has
+    none, other validators are left out
+    """
+    low = high = None
+    for v in node.elts if isinstance(node, (ast.List, ast.Tuple)) else ():
+        name = isinstance(v, ast.Call) and _dotted(v.func)
+        if not name or name.split(".")[-1] not in LIMIT_VALIDATORS:
+            continue
+        limit = v.args[0] if v.args else next((kw.value for kw in v.keywords if kw.arg == "limit_value"), None)
+        try:
+            limit = ast.literal_eval(limit)
+        except ValueError:
+            continue
+        if isinstance(limit, bool) or not isinstance(limit, (int, float)):
+            continue
+        if name.endswith("MinValueValidator"):
+            low = limit if low is None else max(low, limit)
+        else:
+            high = limit if high is None else min(high, limit)
+    return low, high
+
+
+def _field_class(call):
+    name = _dotted(call.func)
+    if not name:
+        return None
+    parts = name.split(".")
+    if len(parts) == 1 or parts[:-1] in (["models"], ["django", "db", "models"]):
+        return parts[-1]
+    return name
+
+
+def _is_field_call(stmt):
+    if not (isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Call)):
+        return False
+    field_class = _field_class(stmt.value)
+    return bool(field_class) and field_class.endswith(("Field", "ForeignKey", "Relation"))
+
+
+def _is_model_base(name):
+    return name in ("Model", "models.Model", "django.db.models.Model")
+
+
+class Extractor:
+
+    def __init__(self, default_auto_field="AutoField"):
+        self.default_auto_field = default_auto_field
+        self.models = []
+        self.by_label = {}
+        self.imports = {}
+        self.problems = []
+
+    def report(self, path, node, message):
+        self.problems.append("%s:%s: %s" % (path, getattr(node, "lineno", "?"), message))
+
+    def add_file(self, path, app_label=None):
+        if os.path.isdir(path):
+            path = os.path.join(path, "models.py")
+        app_label = app_label or os.path.basename(os.path.dirname(os.path.abspath(path)))
+        with open(path, "r", encoding="utf-8") as fh:
+            tree = ast.parse(fh.read(), filename=path)
+
+        imports = self.imports.setdefault(path, {})
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom) and node.module and node.module.split(".")[-1] == "models":
+                module_app = node.module.split(".")[-2] if "." in node.module else app_label
+                for alias in node.names:
+                    imports[alias.asname or alias.name] = "%s.%s" % (module_app, alias.name)
+            if isinstance(node, ast.ClassDef):
+                self._add_class(path, app_label, node)
+
+    def _add_class(self, path, app_label, node):
+        meta = {}
+        for stmt in node.body:
+            if not (isinstance(stmt, ast.ClassDef) and stmt.name == "Meta"):
+                continue
+            for option in stmt.body:
+                if isinstance(option, ast.Assign) and isinstance(option.targets[0], ast.Name):
+                    key = option.targets[0].id
+                    if key in INDEX_OPTIONS:
+                        meta[key] = option.value
+                    elif key in ("db_table", "abstract", "app_label", "proxy", META_CACHE_OPTION):
+                        try:
+                            meta[key] = _literal(option.value, key)
+                        except ExtractionProblem as e:
+                            self.report(path, option, "%s.Meta: %s" % (node.name, e))
+        model = StaticModel(app_label, node.name, path, node, [_dotted(b) for b in node.bases], meta)
+        self.models.append(model)
+        self.by_label.setdefault(model.label, model)
+
+    def _resolve_model(self, model, name):
+        if name == "self":
+            return model
+        if "." not in name:
+            name = self.imports.get(model.path, {}).get(name, "%s.%s" % (model.app_label, name))
+        if name in self.by_label:
+            return self.by_label[name]
+        if name.count(".") != 1:
+            raise ExtractionProblem("related model %s can not be resolved statically" % name)
+        # Model of an app that was not parsed, assume django's defaults for it
+        app_label, object_name = name.split(".")
+        external = StaticModel(app_label, object_name)
+        self.by_label[name] = external
+        return external
+
+    def _parse_field(self, model, name, call):
+        field_class = _field_class(call)
+        if not is_registered(field_class) or field_class.endswith("Rel"):
+            raise ExtractionProblem("unsupported field class %s" % field_class)
+        kwargs = {}
+        for kw in call.keywords:
+            if kw.arg in USED_KWARGS:
+                kwargs[kw.arg] = _literal(kw.value, kw.arg)
+            elif kw.arg == "choices":
+                kwargs["choices"] = self._enum_choices(model, kw.value) or _flat_choices(kw.value)
+            elif kw.arg == "validators":
+                kwargs["validators"] = _limits(kw.value)
+        if field_class not in RELATION_FIELDS:
+            return StaticField(model, name, field_class, kwargs)
+
+        args = {kw.arg: kw.value for kw in call.keywords}
+        to = args.get("to", call.args[0] if call.args else None)
+        on_delete = args.get("on_delete", call.args[1] if len(call.args) > 1 else None)
+        if isinstance(to, ast.Constant) and isinstance(to.value, str):
+            to = to.value
+        elif isinstance(to, ast.Name):
+            to = to.id
+        else:
+            raise ExtractionProblem("related model %s can not be resolved statically" % (
+                ast.unparse(to) if to else None
+            ))
+        if on_delete is not None:
+            if isinstance(on_delete, ast.Call) and _dotted(on_delete.func) in ("SET", "models.SET"):
+                on_delete = "set_on_delete"
+            elif _dotted(on_delete):
+                on_delete = _dotted(on_delete).split(".")[-1]
+            else:
+                raise ExtractionProblem("on_delete=%s can not be resolved statically" % ast.unparse(on_delete))
+        through = args.get("through")
+        if through is not None:
+            through = through.value if isinstance(through, ast.Constant) else _dotted(through)
+        return StaticField(model, name, field_class, kwargs, to=to, on_delete=on_delete, through=through)
+
+    def _enum_choices(self, model, node):
+        """
+        Values of `choices=<Class>.choices`, for IntegerChoices / TextChoices of the same app whose
+        members are literals, () otherwise.
+        """
+        if not (isinstance(node, ast.Attribute) and node.attr == "choices" and isinstance(node.value, ast.Name)):
+            return ()
+        enum = self.by_label.get("%s.%s" % (model.app_label, node.value.id))
+        if enum is None or not enum.node or not any(
+            b and b.split(".")[-1] in CHOICES_CLASSES for b in enum.bases
+        ):
+            return ()
+        values = []
+        for stmt in enum.node.body:
+            if not (isinstance(stmt, ast.Assign) and isinstance(stmt.targets[0], ast.Name)):
+                continue
+            if stmt.targets[0].id.startswith("_"):
+                continue
+            # NAME = value, or NAME = value, "label" (or _("label"))
+            value = stmt.value.elts[0] if isinstance(stmt.value, ast.Tuple) and stmt.value.elts else stmt.value
+            try:
+                values.append(ast.literal_eval(value))
+            except ValueError:
+                return ()
+        return tuple(values)
+
+    def _own_fields(self, model):
+        fields = []
+        for stmt in model.node.body:
+            if not _is_field_call(stmt) or len(stmt.targets) != 1 or not isinstance(stmt.targets[0], ast.Name):
+                continue
+            name = stmt.targets[0].id
+            try:
+                fields.append(self._parse_field(model, name, stmt.value))
+            except ExtractionProblem as e:
+                self.report(model.path, stmt, "%s.%s: %s" % (model.object_name, name, e))
+        return fields
+
+    def _collect_fields(self, model, seen=()):
+        fields = []
+        is_model = False
+        unresolved = []
+        for base in model.bases:
+            if _is_model_base(base):
+                is_model = True
+                continue
+            parent = self.by_label.get(self.imports.get(model.path, {}).get(base, "%s.%s" % (model.app_label, base)))
+            if parent is None or parent.node is None or parent in seen:
+                unresolved.append(base)
+                continue
+            if not parent.abstract:
+                raise ExtractionProblem("multi-table inheritance from %s is not supported" % base)
+            parent_fields = self._collect_fields(parent, seen + (model,))
+            if parent_fields is not None:
+                is_model = True
+                fields.extend(parent_fields)
+        if not is_model:
+            if unresolved and any(_is_field_call(stmt) for stmt in model.node.body):
+                raise ExtractionProblem("base class %s can not be resolved statically" % ", ".join(unresolved))
+            return None
+        return fields + self._own_fields(model)
+
+    def _build(self):
+        concrete = []
+        for model in self.models:
+            try:
+                fields = self._collect_fields(model)
+                if fields is None:
+                    continue
+                if model.proxy:
+                    raise ExtractionProblem("proxy models are not supported")
+            except ExtractionProblem as e:
+                self.report(model.path, model.node, "%s: %s" % (model.object_name, e))
+                continue
+            if model.abstract:
+                continue
+            # Fields inherited from abstract models belong to the concrete model
+            model.fields = [
+                f if f.model is model else StaticField(model, f.name, f.field_class, f.kwargs, f.to, f.on_delete, f.through)
+                for f in fields
+            ]
+            if not any(f.primary_key for f in model.fields):
+                model.fields.insert(0, StaticField(
+                    model, "id", self.default_auto_field, {"primary_key": True}
+                ))
+            concrete.append(model)
+
+        for model in concrete:
+            for f in list(model.fields):
+                if not f.to:
+                    continue
+                try:
+                    f.related_model = self._resolve_model(model, f.to)
+                    if f.through:
+                        f.through_model = self._resolve_model(model, f.through)
+                except ExtractionProblem as e:
+                    self.report(model.path, model.node, "%s.%s: %s" % (model.object_name, f.name, e))
+                    model.fields.remove(f)
+
+        # django orders the fields as: reverse relations (in model registration order),
+        # local concrete fields, then local many to many fields
+        for model in concrete:
+            model.fields.sort(key=lambda f: f.field_class == "ManyToManyField")
+            for f in model.fields:
+                if f.related_model is not None and f.has_reverse():
+                    f.related_model.related.append(f)
+        return concrete
+
+    def _field_ir(self, f):
+        kind = resolve_name(f.field_class)
+        relation = f.field_class in RELATION_FIELDS
+        return FieldIR(
+            name=f.name,
+            field_class=f.field_class,
+            go=get_go_type(kind),
+            java=None if relation else kind.java,
+            validation=() if relation else tuple(kind.validation),
+            generator=() if relation else tuple(kind.generator(f)),
+            column=f.column,
+            primary_key=f.primary_key,
+            null=f.null,
+            blank=f.blank,
+            db_index=f.db_index,
+            unique=f.unique,
+            max_length=f.max_length,
+            cardinality=CARDINALITIES.get(f.field_class),
+            related_object_name=f.related_model.object_name if f.related_model else None,
+            related_model_name=f.related_model.model_name.title() if f.related_model else None,
+            attname=f.attname if relation else None,
+            on_delete=f.on_delete,
+            m2m_db_table=f.m2m_db_table() if f.field_class == "ManyToManyField" else None,
+            m2m_column_name=f.m2m_column_name() if f.field_class == "ManyToManyField" else None,
+            m2m_reverse_name=f.m2m_reverse_name() if f.field_class == "ManyToManyField" else None,
+            related_label=f.related_model.label if f.related_model else None,
+            choices=() if relation else f.kwargs.get("choices", ()),
+            min_value=None if relation else f.kwargs.get("validators", (None, None))[0],
+            max_value=None if relation else f.kwargs.get("validators", (None, None))[1],
+            max_digits=f.kwargs.get("max_digits"),
+            decimal_places=f.kwargs.get("decimal_places"),
+            related_cache=f.related_model.cache if f.related_model else None,
+            target=self._target_ir(f) if f.field_class in ("ForeignKey", "OneToOneField") else None,
+        )
+
+    def _target_ir(self, f):
+        # field the column of a forward relation refers to, the related primary key or to_field,
+        # None if the related model was not parsed (another app, unsupported model)
+        name = f.kwargs.get("to_field")
+        for target in f.related_model.fields:
+            if (target.name == name) if name else target.primary_key:
+                return self._target_ir(target) if target.related_model is not None else self._field_ir(target)
+        return None
+
+    def _reverse_field_ir(self, f):
+        # Mirrors the ForeignObjectRel django adds to the related model
+        reverse_class = REVERSE_RELATIONS[f.field_class]
+        return FieldIR(
+            name=f.related_query_name(),
+            field_class=reverse_class,
+            go=get_go_type(resolve_name(reverse_class)),
+            null=True,
+            cardinality=CARDINALITIES[reverse_class],
+            reverse=True,
+            related_object_name=f.model.object_name,
+            related_model_name=f.model.model_name.title(),
+            accessor=f.get_accessor_name(),
+            remote_field_name=f.name,
+            m2m_db_table=f.m2m_db_table() if f.field_class == "ManyToManyField" else None,
+            m2m_column_name=f.m2m_column_name() if f.field_class == "ManyToManyField" else None,
+            m2m_reverse_name=f.m2m_reverse_name() if f.field_class == "ManyToManyField" else None,
+            related_label=f.model.label,
+            related_cache=f.model.cache,
+        )
+
+    def _column(self, model, name):
+        for f in model.fields:
+            if f.name == name or f.attname == name:
+                return f.column
+        raise ExtractionProblem("unknown field %s" % name)
+
+    def _together_indexes(self, model, key, node):
+        together = _literal(node, key)
+        if together and isinstance(together[0], str):
+            together = [together]
+        for fields in together:
+            columns = tuple(self._column(model, name) for name in fields)
+            unique = key == "unique_together"
+            yield IndexIR(_create_index_name(model.db_table, columns, "_uniq" if unique else "_idx"), columns, unique)
+
+    def _meta_index(self, model, call):
+        """
+        :return: IndexIR of a Meta.indexes Index or Meta.constraints UniqueConstraint call, None for
+                 other constraints and indexes on expressions
+        """
+        kind = _field_class(call)
+        if kind not in ("Index", "UniqueConstraint") or call.args:
+            return None
+        kwargs = {kw.arg: kw.value for kw in call.keywords}
+        if "condition" in kwargs:
+            raise ExtractionProblem("condition of %s can not be resolved statically" % kind)
+        fields = _literal(kwargs["fields"], "fields") if "fields" in kwargs else None
+        if not fields:
+            return None
+        names = [name.lstrip("-") for name in fields]
+        orders = [name.startswith("-") for name in fields]
+        columns = [self._column(model, name) for name in names]
+        name = _literal(kwargs["name"], "name") if "name" in kwargs else _index_name(model.db_table, columns, orders)
+        return IndexIR(
+            name, tuple(c + (" DESC" if desc else "") for c, desc in zip(columns, orders)), kind == "UniqueConstraint"
+        )
+
+    def _indexes(self, model):
+        indexes = []
+        # in the order of get_model_indexes
+        for key in INDEX_OPTIONS:
+            node = model.index_options.get(key)
+            if node is None:
+                continue
+            try:
+                if key in ("unique_together", "index_together"):
+                    indexes.extend(self._together_indexes(model, key, node))
+                    continue
+                if not isinstance(node, (ast.List, ast.Tuple)):
+                    raise ExtractionProblem("%s=%s is not a list" % (key, ast.unparse(node)))
+                for call in node.elts:
+                    try:
+                        index = self._meta_index(model, call) if isinstance(call, ast.Call) else None
+                    except ExtractionProblem as e:
+                        self.report(model.path, call, "%s.Meta.%s: %s, left out" % (model.object_name, key, e))
+                        continue
+                    if index:
+                        indexes.append(index)
+            except ExtractionProblem as e:
+                self.report(model.path, node, "%s.Meta.%s: %s, left out" % (model.object_name, key, e))
+        return tuple(indexes)
+
+    def structure(self, model):
+        return ModelIR(
+            app_name=model.app_label,
+            class_name=model.object_name,
+            table=model.db_table,
+            fields=tuple(
+                [self._reverse_field_ir(f) for f in model.related] + [self._field_ir(f) for f in model.fields]
+            ),
+            indexes=self._indexes(model),
+            cache=model.cache,
+        )
+
+    def snapshot(self):
+        entries = []
+        for model in self._build():
+            try:
+                entries.append(dump_model(self.structure(model)))
+            except (ExtractionProblem, LookupError) as e:
+                self.report(model.path, model.node, "%s: %s" % (model.object_name, e))
+        return {"version": SNAPSHOT_VERSION, "models": entries}
+
+
+def extract_snapshot(paths, default_auto_field="AutoField"):
+    """
+    :param paths: models.py files or app directories, in INSTALLED_APPS order
+    :param default_auto_field: Field class of implicit primary keys (DEFAULT_AUTO_FIELD)
+    :return: (snapshot, problems), the snapshot can be rendered with convert_snapshot
+    """
+    extractor = Extractor(default_auto_field)
+    for path in paths:
+        extractor.add_file(path)
+    return extractor.snapshot(), extractor.problems
@@ -0,0 +1,161 @@
+"""
+Type selection: the go / kotlin type of a field picked from its constraints (class, min / max
+validators, choices, max_digits / decimal_places, null) rather than from its class alone, so that
+generated structs and entities hold each value in the smallest type that can represent it exactly.
+"""
+import math
+from .data import KField
+
+# Values of the integer fields, as stored by postgres (django's integer_field_ranges), by D2GField dfield
+INTEGER_RANGES = {
+    "SmallIntegerField": (-2 ** 15, 2 ** 15 - 1),
+    "IntegerField": (-2 ** 31, 2 ** 31 - 1),
+    "BigIntegerField": (-2 ** 63, 2 ** 63 - 1),
+    "PositiveSmallIntegerField": (0, 2 ** 15 - 1),
+    "PositiveIntegerField": (0, 2 ** 31 - 1),
+    "PositiveBigIntegerField": (0, 2 ** 63 - 1),
+}
+
+# Widest decimal held in an int64, larger ones need an arbitrary precision type
+MAX_INTEGER_DIGITS = 18
+
+GO_DECIMAL = "decimal.Decimal"  # github.com/shopspring/decimal
+
+# Kotlin integer types, smallest first
+KOTLIN_INTEGERS = (
+    (KField.Byte, 8),
+    (KField.Short, 16),
+    (KField.Int, 32),
+    (KField.Long, 64),
+)
+
+# database/sql (or library) types holding a go type or NULL
+GO_SQL_NULL_TYPES = {
+    "bool": "sql.NullBool",
+    "uint8": "sql.NullByte",
+    "int16": "sql.NullInt16",
+    "int32": "sql.NullInt32",
+    "int64": "sql.NullInt64",
+    "float64": "sql.NullFloat64",
+    "string": "sql.NullString",
+    "time.Time": "sql.NullTime",
+    "uuid.UUID": "uuid.NullUUID",
+    GO_DECIMAL: "decimal.NullDecimal",
+}
+
+# Types of the values held by the sql.Null* types, e.g. sql.NullString -> string (in its String field)
+GO_SQL_NULL_VALUES = {null_type: vtype for vtype, null_type in GO_SQL_NULL_TYPES.items()}
+
+# Go types whose zero value can't tell NULL apart, the others (slices, maps, json, pointers) hold nil
+GO_VALUE_TYPES = {
+    "bool", "int8", "uint8", "int16", "uint16", "int32", "uint32", "int64", "uint64", "float32", "float64",
+    "string", "time.Time", "datatypes.Date", "uuid.UUID", GO_DECIMAL,
+}
+
+NULL_POLICIES = ("value", "pointer", "sql")
+
+
+def integer_range(field):
+    """
+    :param field: FieldIR
+    :return: (min, max) of the values an integer field may hold, from its class narrowed by its
+             choices and min / max validators, None for other fields
+    """
+    dfield = field.go.dfield if field.go else None
+    if dfield == "DecimalField" and field.decimal_places == 0 and field.max_digits:
+        if field.max_digits > MAX_INTEGER_DIGITS:
+            return None
+        low, high = -(10 ** field.max_digits - 1), 10 ** field.max_digits - 1
+    elif dfield in INTEGER_RANGES:
+        low, high = INTEGER_RANGES[dfield]
+    else:
+        return None
+    values = [c for c in field.choices if c is not None]
+    if values and all(isinstance(c, int) and not isinstance(c, bool) for c in values):
+        low, high = max(low, min(values)), min(high, max(values))
+    if field.min_value is not None:
+        low = max(low, math.ceil(field.min_value))
+    if field.max_value is not None:
+        high = min(high, math.floor(field.max_value))
+    return (low, high) if low <= high else None
+
+
+def go_integer_type(low, high) -> str:
+    # smallest go integer holding low..high, unsigned when it can't be negative
+    for bits in (8, 16, 32, 64):
+        if low >= 0 and high < 2 ** bits:
+            return "uint%d" % bits
+        if -2 ** (bits - 1) <= low and high < 2 ** (bits - 1):
+            return "int%d" % bits
+    raise ValueError("No go integer holds %d..%d" % (low, high))
+
+
+def kotlin_integer_type(low, high) -> KField:
+    for kfield, bits in KOTLIN_INTEGERS:
+        if -2 ** (bits - 1) <= low and high < 2 ** (bits - 1):
+            return kfield
+    raise ValueError("No kotlin integer holds %d..%d" % (low, high))
+
+
+def go_field_type(field, compact=False, null="value"):
+    """
+    Go type of a (non relation) field.
+    :param field: FieldIR
+    :param compact: Pick the smallest integer holding the values the field allows, and an exact
+                    decimal type for decimals (an integer for those without decimal places)
+    :param null: How nullable columns are held: "value" as their zero value (NULL is lost),
+                 "pointer" through a pointer (nil for NULL), "sql" in the sql.Null* type of their
+                 type, or a pointer for types without one
+    :return: (go type, whether it holds NULL)
+    """
+    vtype = field.go.gofield
+    if compact and not field.primary_key:
+        limits = integer_range(field)
+        if limits is not None:
+            vtype = go_integer_type(*limits)
+        elif field.go.dfield == "DecimalField":
+            vtype = GO_DECIMAL
+    if not field.null or null == "value" or field.primary_key or vtype not in GO_VALUE_TYPES:
+        return vtype, False
+    if null == "sql" and vtype in GO_SQL_NULL_TYPES:
+        return GO_SQL_NULL_TYPES[vtype], True
+    return "*" + vtype, True
+
+
+def go_foreign_key_type(field, compact=False, null="value"):
+    """
+    Go type of the column of a forward o2o / m2o relation: the type of the field it refers to,
+    picked as go_field_type picks it, nullable as the relation is.
+    :return: (go type, whether it holds NULL)
+    """
+    if field.target is None or field.target.go is None:
+        return "uint32", False
+    return go_field_type(field.target._replace(primary_key=False, null=field.null), compact, null)
+
+
+def java_field_type(field, compact=False) -> KField:
+    """
+    Kotlin type of a (non relation) field.
+    :param compact: Pick the smallest integer holding the values the field allows, BigDecimal for
+                    decimals (an integer for those without decimal places), and Double for
+                    FloatField, which is double precision
+    """
+    if not compact or field.primary_key or field.go is None:
+        return field.java
+    limits = integer_range(field)
+    if limits is not None:
+        return kotlin_integer_type(*limits)
+    if field.go.dfield == "DecimalField":
+        return KField.BigDecimal
+    if field.go.dfield == "FloatField":
+        return KField.Double
+    return field.java
+
+
+def kotlin_type(name, field, null="value") -> str:
+    """
+    :param name: kotlin type of a field or relation
+    :param null: "pointer" or "sql" make the types of nullable columns and relations nullable (T?),
+                 "value" leaves them as they are
+    """
+    return name + "?" if field.null and null != "value" else name
@@ -0,0 +1,193 @@
+from .data import META_CACHE_OPTION, Relation, RelationPath
+
+
+def _cardinality(f):
+    if f.one_to_one:
+        return "o2o"
+    if f.many_to_one:
+        return "m2o"
+    if f.one_to_many:
+        return "o2m"
+    return "m2m"
+
+
+def _relation(f, m2m_names):
+    reverse = f.auto_created and not f.concrete
+    related = f.related_model
+    on_delete = getattr(getattr(f, "remote_field", None), "on_delete", None)
+    m2m = (None, None, None)
+    if f.many_to_many:
+        # Both ends of a many to many share the names of the forward field, resolve them once
+        forward = f.field if reverse else f
+        m2m = m2m_names.get(forward)
+        if m2m is None:
+            m2m = m2m_names[forward] = (
+                forward.m2m_db_table(), forward.m2m_column_name(), forward.m2m_reverse_name()
+            )
+    return Relation(
+        kind=f.__class__.__name__,
+        cardinality=_cardinality(f),
+        name=f.name,
+        reverse=reverse,
+        related_label=related._meta.label if related else None,
+        related_object_name=related._meta.object_name if related else None,
+        related_model_name=related._meta.model_name.title() if related else None,
+        accessor=f.get_accessor_name() if reverse else None,
+        remote_field_name=f.field.name if reverse else None,
+        attname=getattr(f, "attname", None),
+        column=getattr(f, "column", None),
+        null=getattr(f, "null", None),
+        on_delete=on_delete.__name__ if on_delete else None,
+        m2m_db_table=m2m[0],
+        m2m_column_name=m2m[1],
+        m2m_reverse_name=m2m[2],
+        related_cache=getattr(related._meta, META_CACHE_OPTION, None) if related else None,
+    )
+
+
+class RelationGraph:
+    """
+    Forward and reverse relations of every model, resolved in a single pass over the app registry.
+    `fields[label]` holds (field, Relation or None) pairs in `_meta.get_fields()` order.
+    """
+
+    def __init__(self, models, fields, selected=None):
+        self.models = models
+        self.fields = fields
+        self.selected = selected
+        self._relations = None
+
+    @classmethod
+    def build(cls, models):
+        """
+        :param models: every registered model, in registry order
+        """
+        graph = cls({}, {})
+        m2m_names = {}
+        for model in models:
+            label = model._meta.label
+            graph.models[label] = model
+            graph.fields[label] = [
+                (f, _relation(f, m2m_names) if f.is_relation else None)
+                for f in model._meta.get_fields()
+            ]
+        return graph
+
+    def restrict(self, selected):
+        """
+        Graph where reverse relations from models outside of `selected` are left out, so that
+        converting only the selected models does not generate references to missing types.
+        """
+        selected = set(selected)
+        return RelationGraph(self.models, {
+            label: [
+                (f, rel) for f, rel in fields
+                if rel is None or not rel.reverse or rel.related_label in selected
+            ]
+            for label, fields in self.fields.items()
+        }, selected)
+
+    def related_labels(self, label, forward_only=False):
+        return set(
+            rel.related_label for _, rel in self.fields[label]
+            if rel is not None and rel.related_label and not (forward_only and rel.reverse)
+        )
+
+    def closure(self, labels):
+        """
+        The given models plus every model they reference through forward relations, transitively.
+        :return: labels in registry order
+        """
+        selected = set()
+        pending = list(labels)
+        while pending:
+            label = pending.pop()
+            if label in selected:
+                continue
+            selected.add(label)
+            pending.extend(self.related_labels(label, forward_only=True) - selected)
+            for f, rel in self.fields[label]:
+                through = getattr(getattr(f, "remote_field", None), "through", None)
+                # auto created through tables are not models of their own, they are rendered as many to many
+                if rel is not None and not rel.reverse and through is not None and not through._meta.auto_created:
+                    pending.append(through._meta.label)
+        return [label for label in self.models if label in selected]
+
+    def neighbours(self, labels, depth=1):
+        """
+        The given models plus every model at most `depth` relations away from them, in either direction.
+        Labels unknown to the graph (e.g. removed models) are kept but have no neighbours.
+        """
+        selected = set(labels)
+        frontier = set(selected)
+        for _ in range(depth):
+            frontier = set(
+                related for label in frontier if label in self.fields for related in self.related_labels(label)
+            ) - selected
+            selected |= frontier
+        return selected
+
+    def relation_paths(self, label, depth):
+        if self._relations is None:
+            self._relations = {
+                model_label: [rel for _, rel in fields if rel is not None]
+                for model_label, fields in self.fields.items()
+            }
+        return relation_paths(self._relations, label, depth)
+
+
+def relation_paths(relations, label, depth, _path=()):
+    """
+    Relations of a model, and of the models they lead to, up to `depth` relations away.
+    Relations back to a model already on the path are kept but not followed, so cycles end.
+    :param relations: label -> relations of the model, Relation or FieldIR
+    :return: tuple of RelationPath
+    """
+    if depth <= 0:
+        return ()
+    path = _path + (label,)
+    return tuple(
+        RelationPath(
+            name=rel.name,
+            cardinality=rel.cardinality,
+            reverse=rel.reverse,
+            accessor=rel.accessor,
+            related_object_name=rel.related_object_name,
+            related_label=rel.related_label,
+            children=(
+                () if rel.related_label in path else relation_paths(relations, rel.related_label, depth - 1, path)
+            ),
+        )
+        for rel in relations.get(label, ())
+        if rel.related_label     # generic foreign keys
+    )
+
+
+def path_labels(paths):
+    """
+    :return: labels of every model reached by relation paths
+    """
+    labels = set()
+    for p in paths:
+        labels.add(p.related_label)
+        labels.update(path_labels(p.children))
+    return labels
+
+
+_graph = None
+
+
+def relation_graph():
+    """
+    RelationGraph of the current app registry, built once and shared by every introspection.
+    """
+    global _graph
+    if _graph is None:
+        from django.apps import apps
+        _graph = RelationGraph.build(apps.get_models())
+    return _graph
+
+
+def clear_relation_graph():
+    global _graph
+    _graph = None
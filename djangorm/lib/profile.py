@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:     # not available on windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:     # optional, start time of the process where there is no /proc
+    psutil = None
+
+# Phases in the order they happen in a run, app_loading_cpu stands in for app_loading where the
+# start time of the process is unknown
+PHASES = ("app_loading", "app_loading_cpu", "get_models", "cache", "introspection", "rendering", "output")
+
+# Phases timed per model
+MODEL_PHASES = ("cache", "introspection", "rendering")
+
+
+def peak_memory():
+    """
+    :return: Peak resident memory in bytes of this process and of its (finished) worker processes,
+             None when it can't be measured
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macos, in kilobytes elsewhere
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+    }
+
+
+def process_uptime():
+    """
+    :return: Wall seconds since this process started, from /proc or else psutil, None when the
+             start time is unknown
+    """
+    uptime = _proc_uptime()
+    if uptime is None and psutil is not None:
+        try:
+            uptime = max(time.time() - psutil.Process().create_time(), 0.0)
+        except psutil.Error:
+            pass
+    return uptime
+
+
+def _proc_uptime():
+    if not hasattr(time, "CLOCK_BOOTTIME"):
+        return None
+    try:
+        with open("/proc/self/stat", "r") as fh:
+            # fields after the command name, which may hold spaces, starttime (ticks since boot) is field 22
+            start_ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+    return max(time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+
+
+class Profiler:
+    """
+    Hook collecting the time spent in each phase of a conversion, see model_to_class.add_hook.
+    Rendering in worker processes is timed in the workers, so with --jobs the rendering time
+    is the sum over every process and can exceed the wall time of the run.
+    """
+
+    def __init__(self):
+        self.phases = {}    # phase -> [seconds, calls]
+        self.models = {}    # model label -> {phase: seconds}
+
+    def __call__(self, phase, seconds, label=None):
+        total = self.phases.setdefault(phase, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+        if label is not None:
+            timings = self.models.setdefault(label, {})
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+    def slowest(self, top=10):
+        """
+        :return: (label, {phase: seconds}) of the `top` models that took the longest
+        """
+        return sorted(self.models.items(), key=lambda i: (-sum(i[1].values()), i[0]))[:top]
+
+    def report(self, top=10):
+        phases = sorted(self.phases, key=lambda p: (PHASES.index(p) if p in PHASES else len(PHASES), p))
+        return {
+            "phases": {p: {"seconds": self.phases[p][0], "calls": self.phases[p][1]} for p in phases},
+            "models": len(self.models),
+            "slowest_models": [
+                dict(timings, label=label, seconds=sum(timings.values()))
+                for label, timings in self.slowest(top)
+            ],
+            "peak_memory_bytes": peak_memory(),
+        }
+
+    def format_json(self, top=10):
+        return json.dumps(self.report(top), indent=2) + "\n"
+
+    def format_table(self, top=10):
+        report = self.report(top)
+        lines = ["{:20s} {:>10s} {:>8s}".format("phase", "seconds", "calls")]
+        for phase, total in report["phases"].items():
+            lines.append("{:20s} {:10.4f} {:8d}".format(phase, total["seconds"], total["calls"]))
+
+        if report["slowest_models"]:
+            lines.append("")
+            lines.append("{:40s} {:>10s}".format("slowest models", "seconds") + "".join(
+                " {:>13s}".format(p) for p in MODEL_PHASES
+            ))
+            for timings in report["slowest_models"]:
+                lines.append("{:40s} {:10.4f}".format(timings["label"], timings["seconds"]) + "".join(
+                    " {:13.4f}".format(timings.get(p, 0.0)) for p in MODEL_PHASES
+                ))
+
+        memory = report["peak_memory_bytes"]
+        if memory:
+            lines.append("")
+            lines.append("peak memory: %.1f MB (workers %.1f MB)" % (
+                memory["self"] / 1024 / 1024, memory["workers"] / 1024 / 1024
+            ))
+        return "\n".join(lines) + "\n"
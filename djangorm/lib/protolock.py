@@ -0,0 +1,96 @@
+import json
+import os
+import re
+from .data import ProtoNumbers
+from .render import proto_fields
+
+LOCK_VERSION = 1
+
+# Field numbers reserved by the protobuf implementation
+PROTO_RESERVED_RANGE = range(19000, 20000)
+
+_JSON_LIST = re.compile(r"\[\s+([^\[\]{}]*?)\s+\]")
+
+
+class ProtoLock:
+    """
+    Field numbers of the proto messages of the models, kept in a lock file across runs: a field
+    keeps its number as long as it exists with the same type, the numbers and names of removed
+    fields (and the numbers of fields whose type changed) are reserved and never reused.
+    The lock file is meant to be committed along with the generated .proto files.
+    """
+
+    def __init__(self, path=None, relations="ids"):
+        """
+        :param path: Lock file, missing for the first run, None to number every run from scratch
+        :param relations: see render.proto_fields
+        """
+        self.path = path
+        self.relations = relations
+        self.messages = {}
+        self.changed = False
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                lock = json.load(fh)
+            if lock.get("version") != LOCK_VERSION:
+                raise ValueError("Unsupported proto lock version %r in %s" % (lock.get("version"), path))
+            self.messages = lock["messages"]
+
+    def entry(self, label):
+        """
+        :return: locked numbers of the message of a model, None if it was never numbered
+        """
+        return self.messages.get(label)
+
+    def number(self, label, model) -> ProtoNumbers:
+        """
+        Number the fields of the message of a model, and record them in the lock.
+        :param model: ModelIR of the model
+        """
+        entry = self.messages.get(label) or {"fields": {}, "reserved_numbers": [], "reserved_names": []}
+        locked_fields = entry["fields"]
+        fields = [
+            (name, "repeated " + ptype if kind == "repeated" else ptype)
+            for name, ptype, kind in proto_fields(model, self.relations)
+        ]
+        types = dict(fields)
+
+        numbers = {}
+        reserved_numbers = set(entry["reserved_numbers"])
+        reserved_names = set(entry["reserved_names"]) - set(types)
+        for name, (number, ptype) in locked_fields.items():
+            if types.get(name) == ptype:
+                numbers[name] = number
+            else:
+                reserved_numbers.add(number)
+                if name not in types:
+                    reserved_names.add(name)
+
+        # new numbers follow every number used so far, gaps are reserved numbers anyway
+        used = reserved_numbers | set(number for number, _ in locked_fields.values())
+        number = max(used, default=0) + 1
+        for name, _ in fields:
+            if name not in numbers:
+                while number in PROTO_RESERVED_RANGE:
+                    number += 1
+                numbers[name] = number
+                number += 1
+
+        new_entry = {
+            "fields": {name: [numbers[name], ptype] for name, ptype in fields},
+            "reserved_numbers": sorted(reserved_numbers),
+            "reserved_names": sorted(reserved_names),
+        }
+        if new_entry != entry:
+            self.messages[label] = new_entry
+            self.changed = True
+        return ProtoNumbers(
+            tuple((name, numbers[name]) for name, _ in fields),
+            tuple(new_entry["reserved_numbers"]),
+            tuple(new_entry["reserved_names"]),
+        )
+
+    def dumps(self) -> str:
+        lock = json.dumps({"version": LOCK_VERSION, "messages": self.messages}, indent=2, sort_keys=True)
+        # one line per field, for readable diffs
+        return _JSON_LIST.sub(lambda m: "[%s]" % re.sub(r",\s+", ", ", m.group(1)), lock) + "\n"
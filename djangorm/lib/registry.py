@@ -0,0 +1,186 @@
+from typing import Callable, List, NamedTuple, Union
+from .data import (
+    D2GField, Field, KField, KGenerator, KValidation, DjangoField as DJ,
+)
+
+
+class FieldKind(NamedTuple):
+    # How a django field class is converted, resolved once per field class
+    name: str
+    go: Union[D2GField, Field, None]
+    java: KField
+    validation: List[KValidation]
+    generator: Callable     # field -> List[KGenerator]
+    internal_type: str
+
+
+# Fields whose get_internal_type() is inherited from their parent class
+INTERNAL_TYPES = {
+    "EmailField": "CharField",
+    "URLField": "CharField",
+    "CommaSeparatedIntegerField": "CharField",
+    "ImageField": "FileField",
+}
+
+# D2GField members named differently from the django field class
+GO_NAMES = {
+    "JSONField": "JsonField",
+}
+
+RELATIONS = (
+    "ForeignKey", "OneToOneField", "ManyToManyField",
+    "ManyToOneRel", "OneToOneRel", "ManyToManyRel",
+)
+
+JAVA_TYPES = {
+    DJ.AutoField: KField.Int,
+    DJ.BigAutoField: KField.Long,
+    DJ.BigIntegerField: KField.Long,
+    DJ.BinaryField: KField.ByteArray,
+    DJ.BooleanField: KField.Boolean,
+    DJ.CharField: KField.String,
+    DJ.DateField: KField.LocalDate,
+    DJ.DateTimeField: KField.LocalDateTime,
+    DJ.DecimalField: KField.Double,
+    DJ.DurationField: KField.String,
+    DJ.EmailField: KField.String,
+    DJ.FileField: KField.String,
+    DJ.FilePathField: KField.String,
+    DJ.FloatField: KField.Float,
+    DJ.ImageField: KField.String,
+    DJ.IntegerField: KField.Int,
+    DJ.GenericIPAddressField: KField.String,
+    DJ.JSONField: KField.Json,
+    DJ.NullBooleanField: KField.Boolean,
+    DJ.PositiveBigIntegerField: KField.Long,
+    DJ.PositiveIntegerField: KField.Int,
+    DJ.PositiveSmallIntegerField: KField.Int,
+    DJ.SlugField: KField.String,
+    DJ.SmallAutoField: KField.Short,
+    DJ.SmallIntegerField: KField.Int,
+    DJ.TextField: KField.String,
+    DJ.TimeField: KField.LocalTime,
+    DJ.URLField: KField.String,
+    DJ.UUIDField: KField.String,
+    DJ.CommaSeparatedIntegerField: KField.String,
+    DJ.IPAddressField: KField.String,
+}
+
+JAVA_VALIDATIONS = {
+    DJ.URLField: [KValidation.URLValidator],
+    DJ.EmailField: [KValidation.EmailValidator],
+    DJ.FloatField: [KValidation.EmailValidator],
+    DJ.IPAddressField: [KValidation.IPValidator],
+}
+
+
+def _constant(generators):
+    return lambda f: generators
+
+
+def _datetime_generator(f):
+    if f.auto_now:
+        return [KGenerator.CREATE_DATETIME_GENERATOR]
+    elif f.auto_now_add:
+        return [KGenerator.MODIFY_DATETIME_GENERATOR]
+    else:
+        return [KGenerator.Noop]
+
+
+JAVA_GENERATORS = {
+    DJ.AutoField: _constant([KGenerator.AutoGenerator]),
+    DJ.BigAutoField: _constant([KGenerator.AutoGenerator]),
+    DJ.SmallAutoField: _constant([KGenerator.AutoGenerator]),
+    DJ.UUIDField: _constant([KGenerator.UUIDGenerator]),
+    DJ.DateTimeField: _datetime_generator,
+}
+
+_NOOP_VALIDATION = [KValidation.Noop]
+_NOOP_GENERATOR = _constant([KGenerator.Noop])
+
+_registry = {}
+_resolved = {}
+
+# Fields registered by the project (register_field / D2G_FIELDS setting), as given
+CUSTOM_FIELDS = {}
+
+
+def register_field(name, go=None, java=None, validation=None, generator=None, like=None, internal_type=None):
+    """
+    Register how a django field class, and its subclasses, are converted.
+    :param name: Class name of the django field, e.g. "ArrayField"
+    :param go: D2GField member, or a Field / (dfield, gofield, orm, valid) tuple for new go types
+    :param java: KField (or its name) of the kotlin property
+    :param validation: KValidation list (or names) of the kotlin property
+    :param generator: Callable returning the KGenerator list of a field
+    :param like: Name of an already registered field to copy unspecified conversions from,
+                 e.g. register_field("CITextField", like="TextField")
+    """
+    base = resolve_name(like) if like else None
+    if isinstance(go, (list, tuple)):
+        go = Field(*go)
+    if isinstance(java, str):
+        java = KField[java]
+    if validation is not None:
+        validation = [KValidation[v] if isinstance(v, str) else v for v in validation]
+    _registry[name] = FieldKind(
+        name=name,
+        go=go if go is not None else (base.go if base else None),
+        java=java if java is not None else (base.java if base else KField.String),
+        validation=validation if validation is not None else (base.validation if base else _NOOP_VALIDATION),
+        generator=generator or (base.generator if base else _NOOP_GENERATOR),
+        internal_type=internal_type or (base.internal_type if base else name),
+    )
+    CUSTOM_FIELDS[name] = dict(
+        go=go, java=java, validation=validation, generator=generator, like=like, internal_type=internal_type
+    )
+    _resolved.clear()
+
+
+def is_registered(name):
+    return name in _registry
+
+
+def _not_registered(name):
+    return LookupError(
+        "No conversion registered for field class %s, register one with "
+        "djangorm.lib.registry.register_field or the D2G_FIELDS setting" % name
+    )
+
+
+def resolve_name(name) -> FieldKind:
+    try:
+        return _registry[name]
+    except KeyError:
+        raise _not_registered(name)
+
+
+def resolve_field(f) -> FieldKind:
+    """
+    Conversion of a django field, the closest registered class in its MRO wins.
+    """
+    cls = f.__class__
+    kind = _resolved.get(cls)
+    if kind is None:
+        for klass in cls.__mro__:
+            if klass.__name__ in _registry:
+                kind = _registry[klass.__name__]
+                break
+        else:
+            raise _not_registered("%s.%s" % (cls.__module__, cls.__name__))
+        _resolved[cls] = kind
+    return kind
+
+
+for _dj in DJ:
+    _internal = DJ(INTERNAL_TYPES.get(_dj.value, _dj.value))
+    _registry[_dj.value] = FieldKind(
+        name=_dj.value,
+        go=D2GField.__members__.get(GO_NAMES.get(_dj.value, _dj.value)),
+        java=JAVA_TYPES[_internal],
+        validation=JAVA_VALIDATIONS.get(_internal, _NOOP_VALIDATION),
+        generator=JAVA_GENERATORS.get(_internal, _NOOP_GENERATOR),
+        internal_type=_internal.value,
+    )
+for _relation in RELATIONS:
+    _registry[_relation] = FieldKind(_relation, D2GField[_relation], None, _NOOP_VALIDATION, _NOOP_GENERATOR, _relation)
@@ -1,86 +1,1018 @@
-from dataclasses import dataclass
-from typing import List
-from .cleaner import get_go_field_name
-from .data import D2GField
+import re
+from typing import List, NamedTuple
+from .cleaner import get_go_field_name, get_java_field_name
+from .data import ENTITY_CACHE_MODES, D2GField, KField, KGenerator, ProtoNumbers
+from .fieldtypes import GO_SQL_NULL_VALUES, go_field_type, go_foreign_key_type, java_field_type, kotlin_type
+from .validation import go_field_checks, go_foreign_key_checks, render_go_validate
 
 
-@dataclass
-class Field:
-    name: str
+class GoStructField(NamedTuple):
+    # A rendered line of a go struct
+    code: str
     type: str
-    orm: List[str]
-    valid: List[str]
+    primary_key: bool = False
+    name: str = None
+    column: str = None      # None for fields not mapped to a column of the table
+    null: bool = False
+    attname: str = None     # django name of the column, e.g. author_id
 
 
-def render_go(struct, for_orm=True, for_validation=True) -> str:
-    class_name = struct["class_name"]
-    table = struct["model"]._meta.db_table
-    go_code_fields = []
+def _emit_skip(go_field, field, vname, vtype, orm_tags, valid_tags, go_code_fields, for_orm, index_tags,
+               column_type=None):
+    return None
 
-    for go_field, field in struct["fields"]:
-        vname = get_go_field_name(field.name)
-        vtype = go_field.gofield
 
-        if go_field.orm:
-            orm_tags = [go_field.orm]
-        else:
-            orm_tags = []
+def _emit_m2m_rel(go_field, field, vname, vtype, orm_tags, valid_tags, go_code_fields, for_orm, index_tags,
+                  column_type=None):
+    orm_tags[0] = orm_tags[0] % {'m2m_db_table': field.m2m_db_table}
+    return "%ss" % vname, vtype % {'foreign_model': field.related_model_name}
+
+
+def _emit_m2m(go_field, field, vname, vtype, orm_tags, valid_tags, go_code_fields, for_orm, index_tags,
+              column_type=None):
+    orm_tags[0] = orm_tags[0] % {'m2m_db_table': field.m2m_db_table}
+    return vname, vtype % {'foreign_model': field.related_model_name}
+
+
+def _emit_foreign_key(go_field, field, vname, vtype, orm_tags, valid_tags, go_code_fields, for_orm, index_tags,
+                      column_type=None):
+    one_to_one = go_field.dfield == D2GField.OneToOneField.dfield
+    orm_tags[0] = orm_tags[0] % {'foreign_model_id': get_go_field_name(field.column)}
+    delete_behavior = field.on_delete.replace("_", " ")
+    orm_tags.append("constraint:OnDelete:%s" % delete_behavior)
+    if one_to_one or for_orm:
+        # typed as the field it refers to, see fieldtypes.go_foreign_key_type
+        ctype, holds_null = column_type or ("uint32", False)
+        fk_field = '{:20s} {:25s} {:20s} '.format(
+            get_go_field_name(field.column),
+            ctype,
+            '`gorm:"%s"`' % ";".join((["index", "unique"] if one_to_one else ["index"]) + index_tags)
+        )
+        go_code_fields.append(GoStructField(
+            fk_field, ctype, False, get_go_field_name(field.column), field.column, field.null and not holds_null,
+            field.attname
+        ))
+    foreign_model = field.related_model_name if one_to_one else field.related_object_name
+    return vname, vtype % {'foreign_model': foreign_model}
+
+
+def _emit_char(go_field, field, vname, vtype, orm_tags, valid_tags, go_code_fields, for_orm, index_tags,
+               column_type=None):
+    orm_tags[0] = orm_tags[0] % {'max_length': field.max_length}
+    valid_tags.append("max=%s" % field.max_length)
+    return vname, vtype
+
 
-        if go_field.valid:
-            valid_tags = [go_field.valid]
+def _emit_positive(go_field, field, vname, vtype, orm_tags, valid_tags, go_code_fields, for_orm, index_tags,
+                   column_type=None):
+    orm_tags[0] = orm_tags[0] % {'field_name': field.column}
+    return vname, vtype
+
+
+def _emit_basic(go_field, field, vname, vtype, orm_tags, valid_tags, go_code_fields, for_orm, index_tags,
+                column_type=None):
+    if orm_tags and "%(" in orm_tags[0]:
+        # registered custom fields may use the same placeholders as the builtin ones
+        orm_tags[0] = orm_tags[0] % {'max_length': field.max_length, 'field_name': field.column}
+    return vname, vtype
+
+
+# Per field kind go emitters, keyed by D2GField.dfield
+GO_EMITTERS = {
+    D2GField.ManyToOneRel.dfield: _emit_skip,
+    D2GField.OneToOneRel.dfield: _emit_skip,
+    D2GField.ManyToManyRel.dfield: _emit_m2m_rel,
+    D2GField.ManyToManyField.dfield: _emit_m2m,
+    D2GField.OneToOneField.dfield: _emit_foreign_key,
+    D2GField.ForeignKey.dfield: _emit_foreign_key,
+    D2GField.CharField.dfield: _emit_char,
+    D2GField.PositiveBigIntegerField.dfield: _emit_positive,
+    D2GField.PositiveIntegerField.dfield: _emit_positive,
+    D2GField.PositiveSmallIntegerField.dfield: _emit_positive,
+}
+
+
+# (size, alignment) of go types on 64 bit platforms
+GO_LAYOUTS = {
+    "bool": (1, 1),
+    "int8": (1, 1),
+    "uint8": (1, 1),
+    "int16": (2, 2),
+    "uint16": (2, 2),
+    "int32": (4, 4),
+    "uint32": (4, 4),
+    "float32": (4, 4),
+    "int64": (8, 8),
+    "uint64": (8, 8),
+    "float64": (8, 8),
+    "string": (16, 8),
+    "time.Time": (24, 8),
+    "datatypes.Date": (24, 8),
+    "datatypes.JSON": (24, 8),
+    "uuid.UUID": (16, 1),
+    "decimal.Decimal": (16, 8),
+    "sql.NullBool": (2, 1),
+    "sql.NullByte": (2, 1),
+    "sql.NullInt16": (4, 2),
+    "sql.NullInt32": (8, 4),
+    "sql.NullInt64": (16, 8),
+    "sql.NullFloat64": (16, 8),
+    "sql.NullString": (24, 8),
+    "sql.NullTime": (32, 8),
+    "uuid.NullUUID": (17, 1),
+    "decimal.NullDecimal": (24, 8),
+}
+
+
+def go_type_layout(vtype):
+    """
+    :return: (size, alignment) of a go type, size is None for the structs of other models
+    """
+    if vtype.startswith("[]"):
+        return 24, 8
+    if vtype.startswith("*") or vtype.startswith("map["):
+        return 8, 8
+    return GO_LAYOUTS.get(vtype, (None, 8))
+
+
+def go_struct_size(types):
+    """
+    :param types: go types of the struct fields, in order
+    :return: (size of the struct, types of the embedded structs whose size is not included)
+    """
+    offset, alignment, embedded = 0, 1, []
+    for vtype in types:
+        size, field_alignment = go_type_layout(vtype)
+        offset = -(-offset // field_alignment) * field_alignment
+        if size is None:
+            embedded.append(vtype)
         else:
-            valid_tags = []
+            offset += size
+        alignment = max(alignment, field_alignment)
+    return -(-offset // alignment) * alignment, embedded
 
-        # print("-------------->> ", repr(go_field), field)
 
-        if go_field == D2GField.ManyToOneRel:
+def pack_go_fields(go_code_fields):
+    """
+    Order (code, go type, primary key) struct fields so that no padding is needed between them:
+    primary key first, then by decreasing alignment, keeping the declaration order of ties.
+    """
+    return sorted(go_code_fields, key=lambda field: (not field.primary_key, -go_type_layout(field.type)[1]))
+
+
+def go_index_tags(indexes):
+    """
+    :return: (gorm index tags of each column, names of the indexes that can't be written as tags)
+    """
+    tags, skipped = {}, []
+    for index in indexes:
+        condition = index.condition
+        if condition and ("," in condition or ";" in condition):
+            skipped.append(index.name)
             continue
+        for priority, column in enumerate(index.columns, 1):
+            column, _, order = column.partition(" ")
+            settings = [index.name]
+            if len(index.columns) > 1:
+                settings.append("priority:%d" % priority)
+            if order == "DESC":
+                settings.append("sort:desc")
+            if condition and priority == 1:
+                # struct tag values are go string literals
+                settings.append("where:%s" % condition.replace("\\", "\\\\").replace('"', '\\"'))
+            tags.setdefault(column, []).append(
+                "%s:%s" % ("uniqueIndex" if index.unique else "index", ",".join(settings))
+            )
+    return tags, skipped
+
 
-        if go_field == D2GField.ManyToManyRel:
-            vname = "%ss" % vname
-            vtype = vtype % {'foreign_model': field.related_model._meta.model_name.title()}
-            orm_tags[0] = orm_tags[0] % {'m2m_db_table': field.field.m2m_db_table()}
+def render_go_scan(class_name, go_code_fields) -> str:
+    """
+    Column constants, column list and ScanRow / Values methods of a struct, so that rows can be
+    read and written in a fixed column order without reflection.
+    Nullable columns are scanned through pointers, NULL leaves the zero value (and Values returns
+    the zero value, not NULL), unless their struct fields hold NULL themselves (see null_policy).
+    """
+    columns = [f for f in go_code_fields if f.column]
+    constants = ["%sColumn%s" % (class_name, f.name) for f in columns]
+    targets = ["&null%s" % f.name if f.null else "&m.%s" % f.name for f in columns]
+    nullable = [f for f in columns if f.null]
 
-        if go_field == D2GField.ManyToManyField:
-            vtype = vtype % {'foreign_model': field.related_model._meta.model_name.title()}
-            orm_tags[0] = orm_tags[0] % {'m2m_db_table': field.m2m_db_table()}
+    s = list()
+    s.append("")
+    s.append("const (")
+    for constant, f in zip(constants, columns):
+        s.append('    %s = "%s"' % (constant, f.column))
+    s.append(")")
+    s.append("")
+    s.append("// %sColumns lists the columns read by ScanRow and returned by Values, in order" % class_name)
+    s.append("var %sColumns = []string{%s}" % (class_name, ", ".join(constants)))
+    s.append("")
+    s.append("func (m *%s) ScanRow(rows *sql.Rows) error {" % class_name)
+    for f in nullable:
+        s.append("    var null%s *%s" % (f.name, f.type))
+    if nullable:
+        s.append("    if err := rows.Scan(%s); err != nil {" % ", ".join(targets))
+        s.append("        return err")
+        s.append("    }")
+        for f in nullable:
+            s.append("    if null%s != nil {" % f.name)
+            s.append("        m.%s = *null%s" % (f.name, f.name))
+            s.append("    }")
+        s.append("    return nil")
+    else:
+        s.append("    return rows.Scan(%s)" % ", ".join(targets))
+    s.append("}")
+    s.append("")
+    s.append("func (m *%s) Values() []interface{} {" % class_name)
+    s.append("    return []interface{}{%s}" % ", ".join("m.%s" % f.name for f in columns))
+    s.append("}")
+    return "\n".join(s) + "\n"
+
+
+# Bytes MarshalJSON reserves for each value, beyond its key
+GO_JSON_SIZE = 16
+
+# Statements of generated AppendJSON methods writing a value of a go type with a d2gJSONWriter w
+GO_JSON_WRITERS = {
+    "bool": "w.bool(%s)",
+    "int8": "w.int(int64(%s))",
+    "int16": "w.int(int64(%s))",
+    "int32": "w.int(int64(%s))",
+    "int64": "w.int(%s)",
+    "uint8": "w.uint(uint64(%s))",
+    "uint16": "w.uint(uint64(%s))",
+    "uint32": "w.uint(uint64(%s))",
+    "uint64": "w.uint(%s)",
+    "float32": "w.float(float64(%s), 32)",
+    "float64": "w.float(%s, 64)",
+    "string": "w.string(%s)",
+    "time.Time": "w.time(%s)",
+    "datatypes.Date": "w.time(time.Time(%s))",
+    "datatypes.JSON": "w.json(%s)",
+    "uuid.UUID": "w.text(%s.MarshalText())",
+    "decimal.Decimal": "w.text(%s.MarshalText())",
+}
+
+# Statements of generated UnmarshalJSON methods reading a value of a go type with a d2gJSONReader r
+GO_JSON_READERS = {
+    "bool": "%s = r.bool()",
+    "int8": "%s = int8(r.int(8))",
+    "int16": "%s = int16(r.int(16))",
+    "int32": "%s = int32(r.int(32))",
+    "int64": "%s = r.int(64)",
+    "uint8": "%s = uint8(r.uint(8))",
+    "uint16": "%s = uint16(r.uint(16))",
+    "uint32": "%s = uint32(r.uint(32))",
+    "uint64": "%s = r.uint(64)",
+    "float32": "%s = float32(r.float(32))",
+    "float64": "%s = r.float(64)",
+    "string": "%s = r.string()",
+    "time.Time": "%s = r.time()",
+    "datatypes.Date": "%s = datatypes.Date(r.time())",
+    "datatypes.JSON": "%s = r.raw()",
+    "uuid.UUID": "r.text(&%s)",
+    "decimal.Decimal": "r.text(&%s)",
+}
 
-        if go_field == D2GField.OneToOneRel:
+
+def _go_json_write(expr, vtype):
+    if vtype.startswith("*"):
+        return ["if %s == nil {" % expr, "    w.null()", "} else {"] + [
+            "    " + line for line in _go_json_write("*" + expr, vtype[1:])
+        ] + ["}"]
+    if vtype in GO_SQL_NULL_VALUES:
+        value = "%s.%s" % (expr, vtype.split(".Null", 1)[1])
+        return ["if %s.Valid {" % expr] + [
+            "    " + line for line in _go_json_write(value, GO_SQL_NULL_VALUES[vtype])
+        ] + ["} else {", "    w.null()", "}"]
+    # types the generator knows nothing about are written by encoding/json
+    writer = GO_JSON_WRITERS.get(vtype, "w.value(%s)")
+    if expr.startswith("*") and "%s." in writer:
+        # *m.X.MarshalText() would dereference the result of the call
+        expr = "(%s)" % expr
+    return [writer % expr]
+
+
+def _go_json_read(expr, vtype):
+    if vtype.startswith("*"):
+        return ["if r.null() {", "    %s = nil" % expr, "} else {", "    %s = new(%s)" % (expr, vtype[1:])] + [
+            "    " + line.replace("&*", "") for line in _go_json_read("*" + expr, vtype[1:])
+        ] + ["}"]
+    if vtype in GO_SQL_NULL_VALUES:
+        value = "%s.%s" % (expr, vtype.split(".Null", 1)[1])
+        return ["if r.null() {", "    %s = %s{}" % (expr, vtype), "} else {"] + [
+            "    " + line for line in _go_json_read(value, GO_SQL_NULL_VALUES[vtype])
+        ] + ["    %s.Valid = true" % expr, "}"]
+    return [GO_JSON_READERS.get(vtype, "r.value(&%s)") % expr]
+
+
+def render_go_json(class_name, go_code_fields) -> str:
+    """
+    AppendJSON / MarshalJSON / UnmarshalJSON methods of a struct, writing and reading the JSON object
+    of its columns keyed by django field name, without reflection (see GO_JSON_RUNTIME).
+    Relations are left out, their foreign keys are written.
+    """
+    columns = [f for f in go_code_fields if f.column]
+    s = list()
+    s.append("")
+    s.append("// AppendJSON appends the JSON object of the columns of m to buf, keyed by django field name")
+    s.append("func (m *%s) AppendJSON(buf []byte) ([]byte, error) {" % class_name)
+    s.append("    w := d2gJSONWriter{buf: buf}")
+    for i, f in enumerate(columns):
+        s.append('    w.raw(`%s"%s":`)' % ("," if i else "{", f.attname))
+        s.extend("    " + line for line in _go_json_write("m." + f.name, f.type))
+    s.append("    w.raw(`%s}`)" % ("" if columns else "{"))
+    s.append("    return w.buf, w.err")
+    s.append("}")
+    s.append("")
+    s.append("func (m %s) MarshalJSON() ([]byte, error) {" % class_name)
+    s.append("    return m.AppendJSON(make([]byte, 0, %d))" % (
+        2 + sum(len(f.attname) + 4 + GO_JSON_SIZE for f in columns)
+    ))
+    s.append("}")
+    s.append("")
+    s.append("func (m *%s) UnmarshalJSON(data []byte) error {" % class_name)
+    s.append("    r := d2gJSONReader{data: data}")
+    s.append("    for r.object(); r.more(); {")
+    s.append("        switch string(r.key()) {")
+    for f in columns:
+        s.append('        case "%s":' % f.attname)
+        s.extend("            " + line for line in _go_json_read("m." + f.name, f.type))
+    s.append("        default:")
+    s.append("            r.skip()")
+    s.append("        }")
+    s.append("    }")
+    s.append("    return r.end()")
+    s.append("}")
+    return "\n".join(s) + "\n"
+
+
+# Go code the generated JSON methods call, written once per output (a d2g_json.go file in --out-dir)
+GO_JSON_RUNTIME = r'''
+// d2gJSONWriter appends the JSON encoding of the columns of generated structs to a buffer, without
+// reflection, for their AppendJSON methods. The first error is kept, the value is then written as null.
+type d2gJSONWriter struct {
+    buf []byte
+    err error
+}
+
+func (w *d2gJSONWriter) fail(err error) {
+    if w.err == nil {
+        w.err = err
+    }
+    w.null()
+}
+
+func (w *d2gJSONWriter) raw(s string) {
+    w.buf = append(w.buf, s...)
+}
+
+func (w *d2gJSONWriter) null() {
+    w.buf = append(w.buf, "null"...)
+}
+
+func (w *d2gJSONWriter) bool(v bool) {
+    w.buf = strconv.AppendBool(w.buf, v)
+}
+
+func (w *d2gJSONWriter) int(v int64) {
+    w.buf = strconv.AppendInt(w.buf, v, 10)
+}
+
+func (w *d2gJSONWriter) uint(v uint64) {
+    w.buf = strconv.AppendUint(w.buf, v, 10)
+}
+
+// float formats v as encoding/json does, NaN and infinities have no JSON encoding
+func (w *d2gJSONWriter) float(v float64, bits int) {
+    if math.IsNaN(v) || math.IsInf(v, 0) {
+        w.fail(errors.New("json: unsupported value: " + strconv.FormatFloat(v, 'g', -1, bits)))
+        return
+    }
+    format := byte('f')
+    if abs := math.Abs(v); abs != 0 {
+        if bits == 64 && (abs < 1e-6 || abs >= 1e21) || bits == 32 && (float32(abs) < 1e-6 || float32(abs) >= 1e21) {
+            format = 'e'
+        }
+    }
+    w.buf = strconv.AppendFloat(w.buf, v, format, -1, bits)
+    if n := len(w.buf); format == 'e' && n >= 4 && w.buf[n-4] == 'e' && w.buf[n-3] == '-' && w.buf[n-2] == '0' {
+        // e-09 to e-9
+        w.buf[n-2] = w.buf[n-1]
+        w.buf = w.buf[:n-1]
+    }
+}
+
+const d2gJSONDigits = "0123456789abcdef"
+
+func (w *d2gJSONWriter) string(s string) {
+    w.buf = append(w.buf, '"')
+    start := 0
+    for i := 0; i < len(s); {
+        c := s[i]
+        if c >= 0x20 && c != '"' && c != '\\' && c < utf8.RuneSelf {
+            i++
+            continue
+        }
+        size := 1
+        switch r, n := utf8.DecodeRuneInString(s[i:]); {
+        case c == '"' || c == '\\':
+            w.buf = append(append(w.buf, s[start:i]...), '\\', c)
+        case c == '\n':
+            w.buf = append(append(w.buf, s[start:i]...), '\\', 'n')
+        case c == '\r':
+            w.buf = append(append(w.buf, s[start:i]...), '\\', 'r')
+        case c == '\t':
+            w.buf = append(append(w.buf, s[start:i]...), '\\', 't')
+        case c < 0x20:
+            w.buf = append(append(w.buf, s[start:i]...), '\\', 'u', '0', '0', d2gJSONDigits[c>>4], d2gJSONDigits[c&0xF])
+        case r == utf8.RuneError && n == 1:
+            w.buf = append(append(w.buf, s[start:i]...), `\ufffd`...)
+        case r == '\u2028' || r == '\u2029':
+            // valid JSON, but not valid javascript
+            size = n
+            w.buf = append(append(w.buf, s[start:i]...), '\\', 'u', '2', '0', '2', d2gJSONDigits[r&0xF])
+        default:
+            i += n
             continue
+        }
+        i += size
+        start = i
+    }
+    w.buf = append(append(w.buf, s[start:]...), '"')
+}
+
+func (w *d2gJSONWriter) time(t time.Time) {
+    w.buf = append(w.buf, '"')
+    w.buf = t.AppendFormat(w.buf, time.RFC3339Nano)
+    w.buf = append(w.buf, '"')
+}
+
+// json appends a JSON document as is, null when empty
+func (w *d2gJSONWriter) json(document []byte) {
+    if len(document) == 0 {
+        w.null()
+        return
+    }
+    w.buf = append(w.buf, document...)
+}
+
+// text appends the result of a MarshalText method (of uuids, decimals) as a string, called by
+// generated code on the value itself, which would escape to the heap as an encoding.TextMarshaler
+func (w *d2gJSONWriter) text(text []byte, err error) {
+    if err != nil {
+        w.fail(err)
+        return
+    }
+    for _, c := range text {
+        if c < 0x20 || c == '"' || c == '\\' || c >= utf8.RuneSelf {
+            w.string(string(text))
+            return
+        }
+    }
+    // nothing to escape, without copying text to a string
+    w.buf = append(append(append(w.buf, '"'), text...), '"')
+}
+
+// value appends v with encoding/json, for the types generated code knows nothing about
+func (w *d2gJSONWriter) value(v interface{}) {
+    document, err := json.Marshal(v)
+    if err != nil {
+        w.fail(err)
+        return
+    }
+    w.buf = append(w.buf, document...)
+}
+
+// d2gJSONReader reads the JSON object of the columns of generated structs, without reflection, for
+// their UnmarshalJSON methods. The first error is kept, reads after a syntax error return zero values.
+// null reads as the zero value of value types.
+type d2gJSONReader struct {
+    data  []byte
+    pos   int
+    err   error
+    first bool
+    buf   []byte // unescaped strings
+}
+
+func (r *d2gJSONReader) fail(err error) {
+    if r.err == nil {
+        r.err = err
+    }
+}
+
+func (r *d2gJSONReader) syntax(message string) {
+    r.fail(errors.New("json: " + message + " at offset " + strconv.Itoa(r.pos)))
+    r.pos = len(r.data)
+}
+
+// space skips white space and returns the next byte, 0 at the end of data
+func (r *d2gJSONReader) space() byte {
+    for ; r.pos < len(r.data); r.pos++ {
+        switch c := r.data[r.pos]; c {
+        case ' ', '\t', '\n', '\r':
+        default:
+            return c
+        }
+    }
+    return 0
+}
+
+func (r *d2gJSONReader) object() {
+    if r.space() != '{' {
+        r.syntax("expected object")
+        return
+    }
+    r.pos++
+    r.first = true
+}
+
+// more tells whether the object has another member, whose key is read next
+func (r *d2gJSONReader) more() bool {
+    if r.pos >= len(r.data) {
+        if r.err == nil {
+            r.syntax("unexpected end of object")
+        }
+        return false
+    }
+    c := r.space()
+    if c == '}' {
+        r.pos++
+        return false
+    }
+    if !r.first {
+        if c != ',' {
+            r.syntax("expected , or }")
+            return false
+        }
+        r.pos++
+    }
+    r.first = false
+    return true
+}
+
+// key returns the key of the next member, valid until the next read
+func (r *d2gJSONReader) key() []byte {
+    key := r.stringBytes()
+    if r.space() != ':' {
+        r.syntax("expected :")
+        return nil
+    }
+    r.pos++
+    return key
+}
+
+// end returns the first error, nothing but white space may follow the object
+func (r *d2gJSONReader) end() error {
+    if r.space(); r.pos < len(r.data) {
+        r.syntax("unexpected data after object")
+    }
+    return r.err
+}
+
+func (r *d2gJSONReader) literal(s string) bool {
+    if len(r.data)-r.pos < len(s) || string(r.data[r.pos:r.pos+len(s)]) != s {
+        r.syntax("invalid literal")
+        return false
+    }
+    r.pos += len(s)
+    return true
+}
+
+// null reads null if it is next
+func (r *d2gJSONReader) null() bool {
+    return r.space() == 'n' && r.literal("null")
+}
+
+func (r *d2gJSONReader) bool() bool {
+    switch r.space() {
+    case 't':
+        return r.literal("true")
+    case 'f':
+        r.literal("false")
+    case 'n':
+        r.literal("null")
+    default:
+        r.syntax("expected boolean")
+    }
+    return false
+}
+
+func d2gJSONNumberByte(c byte) bool {
+    return c >= '0' && c <= '9' || c == '-' || c == '+' || c == '.' || c == 'e' || c == 'E'
+}
+
+// number returns the next number, nil for null
+func (r *d2gJSONReader) number() []byte {
+    if r.null() {
+        return nil
+    }
+    start := r.pos
+    for r.pos < len(r.data) && d2gJSONNumberByte(r.data[r.pos]) {
+        r.pos++
+    }
+    if r.pos == start {
+        r.syntax("expected number")
+        return nil
+    }
+    return r.data[start:r.pos]
+}
+
+func (r *d2gJSONReader) int(bits int) int64 {
+    number := r.number()
+    if number == nil {
+        return 0
+    }
+    v, err := strconv.ParseInt(string(number), 10, bits)
+    if err != nil {
+        r.fail(err)
+    }
+    return v
+}
+
+func (r *d2gJSONReader) uint(bits int) uint64 {
+    number := r.number()
+    if number == nil {
+        return 0
+    }
+    v, err := strconv.ParseUint(string(number), 10, bits)
+    if err != nil {
+        r.fail(err)
+    }
+    return v
+}
+
+func (r *d2gJSONReader) float(bits int) float64 {
+    number := r.number()
+    if number == nil {
+        return 0
+    }
+    v, err := strconv.ParseFloat(string(number), bits)
+    if err != nil {
+        r.fail(err)
+    }
+    return v
+}
+
+// stringBytes returns the next string unescaped, valid until the next read
+func (r *d2gJSONReader) stringBytes() []byte {
+    if r.space() != '"' {
+        r.syntax("expected string")
+        return nil
+    }
+    r.pos++
+    start := r.pos
+    for ; r.pos < len(r.data); r.pos++ {
+        switch c := r.data[r.pos]; {
+        case c == '"':
+            r.pos++
+            return r.data[start : r.pos-1]
+        case c == '\\':
+            return r.unescape(append(r.buf[:0], r.data[start:r.pos]...))
+        case c < 0x20:
+            r.syntax("invalid character in string")
+            return nil
+        }
+    }
+    r.syntax("unexpected end of string")
+    return nil
+}
+
+func (r *d2gJSONReader) unescape(buf []byte) []byte {
+    for r.pos < len(r.data) {
+        c := r.data[r.pos]
+        switch {
+        case c == '"':
+            r.pos++
+            r.buf = buf
+            return buf
+        case c < 0x20:
+            r.syntax("invalid character in string")
+            return nil
+        case c != '\\':
+            buf = append(buf, c)
+            r.pos++
+            continue
+        }
+        if r.pos+1 >= len(r.data) {
+            break
+        }
+        escaped := r.data[r.pos+1]
+        r.pos += 2
+        switch escaped {
+        case '"', '\\', '/':
+            buf = append(buf, escaped)
+        case 'b':
+            buf = append(buf, '\b')
+        case 'f':
+            buf = append(buf, '\f')
+        case 'n':
+            buf = append(buf, '\n')
+        case 'r':
+            buf = append(buf, '\r')
+        case 't':
+            buf = append(buf, '\t')
+        case 'u':
+            c := d2gJSONHex4(r.data[r.pos:])
+            if c < 0 {
+                r.syntax("invalid unicode escape")
+                return nil
+            }
+            r.pos += 4
+            if utf16.IsSurrogate(c) {
+                // unpaired surrogates read as U+FFFD, as with encoding/json
+                low := rune(-1)
+                if len(r.data)-r.pos >= 6 && r.data[r.pos] == '\\' && r.data[r.pos+1] == 'u' {
+                    low = d2gJSONHex4(r.data[r.pos+2:])
+                }
+                if c = utf16.DecodeRune(c, low); c != utf8.RuneError {
+                    r.pos += 6
+                }
+            }
+            buf = utf8.AppendRune(buf, c)
+        default:
+            r.syntax("invalid escape in string")
+            return nil
+        }
+    }
+    r.syntax("unexpected end of string")
+    return nil
+}
+
+// d2gJSONHex4 returns the value of the 4 hex digits of a \u escape, -1 if they are not
+func d2gJSONHex4(digits []byte) rune {
+    if len(digits) < 4 {
+        return -1
+    }
+    var v rune
+    for _, c := range digits[:4] {
+        switch {
+        case c >= '0' && c <= '9':
+            v = v<<4 | rune(c-'0')
+        case c >= 'a' && c <= 'f':
+            v = v<<4 | rune(c-'a'+10)
+        case c >= 'A' && c <= 'F':
+            v = v<<4 | rune(c-'A'+10)
+        default:
+            return -1
+        }
+    }
+    return v
+}
+
+func (r *d2gJSONReader) string() string {
+    if r.null() {
+        return ""
+    }
+    return string(r.stringBytes())
+}
+
+func (r *d2gJSONReader) time() time.Time {
+    if r.null() {
+        return time.Time{}
+    }
+    s := r.stringBytes()
+    if s == nil {
+        return time.Time{}
+    }
+    t, err := time.Parse(time.RFC3339, string(s))
+    if err != nil {
+        r.fail(err)
+    }
+    return t
+}
+
+// text reads a string into v (uuids, decimals), null leaves v unchanged
+func (r *d2gJSONReader) text(v encoding.TextUnmarshaler) {
+    if r.null() {
+        return
+    }
+    if s := r.stringBytes(); s != nil {
+        if err := v.UnmarshalText(s); err != nil {
+            r.fail(err)
+        }
+    }
+}
+
+// raw returns a copy of the next value, nil for null
+func (r *d2gJSONReader) raw() []byte {
+    if r.null() {
+        return nil
+    }
+    r.space()
+    start := r.pos
+    r.skip()
+    if r.err != nil {
+        return nil
+    }
+    return append([]byte(nil), r.data[start:r.pos]...)
+}
+
+// value reads the next value with encoding/json, for the types generated code knows nothing about
+func (r *d2gJSONReader) value(v interface{}) {
+    if document := r.raw(); document != nil {
+        if err := json.Unmarshal(document, v); err != nil {
+            r.fail(err)
+        }
+    }
+}
+
+// skip reads past the next value
+func (r *d2gJSONReader) skip() {
+    switch r.space() {
+    case '"':
+        r.stringBytes()
+    case '{', '[':
+        closing := r.data[r.pos] + 2 // } and ]
+        r.pos++
+        for first := true; r.pos < len(r.data); first = false {
+            c := r.space()
+            if c == closing {
+                r.pos++
+                return
+            }
+            if !first {
+                if c != ',' {
+                    r.syntax("expected , or " + string(closing))
+                    return
+                }
+                r.pos++
+            }
+            if closing == '}' {
+                r.key()
+            }
+            r.skip()
+        }
+        r.syntax("unexpected end of data")
+    case 't':
+        r.literal("true")
+    case 'f':
+        r.literal("false")
+    default:
+        r.number()
+    }
+}
+'''
 
-        if go_field == D2GField.OneToOneField:
-            vtype = vtype % {'foreign_model': field.related_model._meta.model_name.title()}
-            orm_tags[0] = orm_tags[0] % {'foreign_model_id': get_go_field_name(field.column)}
-            delete_behavior = field.deconstruct()[3]['on_delete'].__name__.replace("_", " ")
-            orm_tags.append("constraint:OnDelete:%s" % delete_behavior)
-            fk_field = '{:20s} {:25s} {:20s} '.format(
-                get_go_field_name(field.column),
-                "uint32",
-                '`gorm:"index;unique"`'
-            )
-            # print(fk_field)
-            go_code_fields.append(fk_field)
-
-        if go_field == D2GField.ForeignKey:
-            vtype = vtype % {'foreign_model': field.related_model._meta.object_name}
-            orm_tags[0] = orm_tags[0] % {'foreign_model_id': get_go_field_name(field.column)}
-            delete_behavior = field.deconstruct()[3]['on_delete'].__name__.replace("_", " ")
-            orm_tags.append("constraint:OnDelete:%s" % delete_behavior)
-            if for_orm:
-                fk_field = '{:20s} {:25s} {:20s} '.format(
-                    get_go_field_name(field.column),
-                    "uint32",
-                    '`gorm:"index"`'
-                )
-                # print(fk_field)
-                go_code_fields.append(fk_field)
-
-        if go_field == D2GField.CharField:
-            orm_tags[0] = orm_tags[0] % {'max_length': field.max_length}
-            valid_tags.append("max=%s" % field.max_length)
-
-        if go_field.dfield.lower().find("positive") != -1:
-            orm_tags[0] = orm_tags[0] % {'field_name': field.column}
+
+def _go_relation_name(p):
+    # struct field of a relation, see GO_EMITTERS, reverse to-one and one to many relations have none
+    if p.cardinality == "o2m" or (p.reverse and p.cardinality != "m2m"):
+        return None
+    name = get_go_field_name(p.name)
+    return "%ss" % name if p.reverse else name
+
+
+def go_preload_paths(model, depth):
+    """
+    Relations of a model to load with it, from model.relation_paths, up to depth relations away
+    and not back into the models of the path.
+    :return: (paths of the to-one relations reached through to-one relations only, which can be
+              joined, paths of the others, preloaded with a query each)
+    """
+    joins, preloads = [], []
+
+    def follow(paths, prefix, labels, joined, depth):
+        for p in paths:
+            name = _go_relation_name(p)
+            if name is None or (prefix and p.related_label in labels):
+                continue
+            to_one = p.cardinality in ("o2o", "m2o")
+            (joins if joined and to_one else preloads).append(prefix + name)
+            if depth > 1:
+                follow(p.children, prefix + name + ".", labels + (p.related_label,), joined and to_one, depth - 1)
+
+    follow(model.relation_paths, "", ("%s.%s" % (model.app_name, model.class_name),), True, depth)
+    return joins, preloads
+
+
+def render_go_preload(class_name, joins, preloads) -> str:
+    """
+    Named lists of the relations of a struct to load with it, and a gorm scope loading them:
+    to-one relations with a join, collections with one batched query each.
+    """
+    s = list()
+    s.append("")
+    s.append("// %sJoins are the to-one relations of %s loaded with a join by Preload%s" % (
+        class_name, class_name, class_name
+    ))
+    s.append("var %sJoins = []string{%s}" % (class_name, ", ".join('"%s"' % j for j in joins)))
+    s.append("")
+    s.append("// %sPreloads are the collections of %s loaded with a query each by Preload%s" % (
+        class_name, class_name, class_name
+    ))
+    s.append("var %sPreloads = []string{%s}" % (class_name, ", ".join('"%s"' % p for p in preloads)))
+    s.append("")
+    s.append("// Preload%s is a scope loading the relations of %s, e.g. db.Scopes(Preload%s).Find(&rows)" % (
+        class_name, class_name, class_name
+    ))
+    s.append("func Preload%s(db *gorm.DB) *gorm.DB {" % class_name)
+    s.append("    for _, name := range %sJoins {" % class_name)
+    s.append("        db = db.Joins(name)")
+    s.append("    }")
+    s.append("    for _, name := range %sPreloads {" % class_name)
+    s.append("        db = db.Preload(name)")
+    s.append("    }")
+    s.append("    return db")
+    s.append("}")
+    return "\n".join(s) + "\n"
+
+
+# Go code the generated routes register into, written once per output (a d2g_routes.go file in --out-dir)
+GO_ROUTES_RUNTIME = '''
+// DBRoute is the DATABASES alias django reads the rows of a table from, and the one it writes them to
+type DBRoute struct {
+    Read  string
+    Write string
+}
+
+// DBRoutes are the routes of the generated structs, by table, as DATABASE_ROUTERS decided them
+var DBRoutes = map[string]DBRoute{}
+'''
+
+# Registration of the generated routes, tells that GO_ROUTES_RUNTIME is needed
+GO_ROUTES_MARKER = "DBRoutes["
+
+
+def render_go_routes(class_name, table, read_db, write_db) -> str:
+    """
+    ReadDB / WriteDB methods of a struct returning the database aliases of its model, and their
+    registration in DBRoutes.
+    """
+    s = list()
+    s.append("")
+    s.append("// ReadDB is the database django reads %s rows from (DATABASE_ROUTERS db_for_read)" % class_name)
+    s.append("func (%s) ReadDB() string {" % class_name)
+    s.append('    return "%s"' % read_db)
+    s.append("}")
+    s.append("")
+    s.append("// WriteDB is the database django writes %s rows to (DATABASE_ROUTERS db_for_write)" % class_name)
+    s.append("func (%s) WriteDB() string {" % class_name)
+    s.append('    return "%s"' % write_db)
+    s.append("}")
+    s.append("")
+    s.append("func init() {")
+    s.append('    %s"%s"] = DBRoute{Read: "%s", Write: "%s"}' % (GO_ROUTES_MARKER, table, read_db, write_db))
+    s.append("}")
+    return "\n".join(s) + "\n"
+
+
+def render_go(model, for_orm=True, for_validation=True, pack=False, scan=False, preload_depth=0,
+              compact_types=False, null_policy="value", json_methods=False, validate_methods=False,
+              routes=False) -> str:
+    """
+    :param model: ModelIR of the model
+    :param pack: Order the struct fields by alignment to avoid padding, primary key first
+    :param scan: Also generate column constants and reflection free ScanRow / Values methods
+    :param preload_depth: Also generate the relations to load with the struct, up to this many
+                          relations away, and a gorm scope loading them,
+                          model.relation_paths must be that deep
+    :param compact_types: Pick field types from the constraints of the fields, see fieldtypes.go_field_type
+    :param null_policy: "value", "pointer" or "sql", see fieldtypes.go_field_type
+    :param json_methods: Also generate reflection free AppendJSON / MarshalJSON / UnmarshalJSON
+                         methods, which need GO_JSON_RUNTIME
+    :param validate_methods: Generate a Validate method checking the values as django does instead of
+                             validate tags, see validation.go_field_checks, it needs GO_VALIDATE_RUNTIME
+    :param routes: Also generate ReadDB / WriteDB methods returning the databases DATABASE_ROUTERS
+                   route the model to, registered in DBRoutes of GO_ROUTES_RUNTIME, for models
+                   whose routes are known (model.read_db is None without django)
+    """
+    class_name = model.class_name
+    table = model.table
+    go_code_fields = []
+    index_tags, skipped_indexes = go_index_tags(model.indexes)
+    declarations, checks = [], []
+    for_validation = for_validation and not validate_methods
+
+    for field in model.fields:
+        go_field = field.go
+        if go_field is None:
+            raise LookupError("No go type registered for field class %s" % field.field_class)
+        orm_tags = [go_field.orm] if go_field.orm else []
+        valid_tags = [go_field.valid] if go_field.valid else []
+
+        emit = GO_EMITTERS.get(go_field.dfield, _emit_basic)
+        emitted_columns = len(go_code_fields)
+        emitted = emit(
+            go_field, field, get_go_field_name(field.name), go_field.gofield,
+            orm_tags, valid_tags, go_code_fields, for_orm, index_tags.get(field.column, []),
+            column_type=go_foreign_key_type(field, compact_types, null_policy) if field.target else None
+        )
+        if emitted is None:
+            continue
+        vname, vtype = emitted
+        holds_null = False
+        if field.cardinality is None:
+            vtype, holds_null = go_field_type(field, compact_types, null_policy)
+            if validate_methods:
+                field_declarations, field_checks = go_field_checks(class_name, field, "m." + vname, vtype)
+                declarations.extend(field_declarations)
+                checks.extend(field_checks)
+        elif validate_methods and len(go_code_fields) > emitted_columns:
+            # foreign key column emitted along with the relation
+            column = go_code_fields[-1]
+            checks.extend(go_foreign_key_checks(field, "m." + column.name, column.type))
 
         if not field.null:
            orm_tags.append("not null")
@@ -91,6 +1023,9 @@ def render_go(struct, for_orm=True, for_validation=True) -> str:
         if getattr(field, 'unique', None) and field.unique:
             orm_tags.append("unique")
 
+        if field.cardinality is None:
+            orm_tags.extend(index_tags.get(field.column, []))
+
         if getattr(field, 'blank', None) and not field.blank:
             valid_tags.append("required")
 
@@ -112,10 +1047,32 @@ def render_go(struct, for_orm=True, for_validation=True) -> str:
         field_verbose = '{:25s} {:12s} {:1s}'.format(vname, vtype, all_tags)
 
         # print(field_verbose)
-        go_code_fields.append(field_verbose)
+        go_code_fields.append(GoStructField(
+            field_verbose, vtype, field.primary_key, vname,
+            field.column if field.cardinality is None else None, field.null and not holds_null, field.name
+        ))
+
+    layout = "".join(
+        "\n// %s: index %s is left out, its condition can not be written in a gorm tag" % (class_name, name)
+        for name in skipped_indexes
+    )
+    # JSON members are written in declaration order, not packed order
+    json_fields = go_code_fields
+    if pack:
+        size, embedded = go_struct_size(f.type for f in go_code_fields)
+        go_code_fields = pack_go_fields(go_code_fields)
+        packed_size, _ = go_struct_size(f.type for f in go_code_fields)
+        layout += "\n// %s: %d bytes on 64 bit platforms, %d in declaration order%s" % (
+            class_name, packed_size, size, "".join(", plus %s" % e for e in embedded)
+        )
 
+    preload = ""
+    if preload_depth:
+        joins, preloads = go_preload_paths(model, preload_depth)
+        if joins or preloads:
+            preload = render_go_preload(class_name, joins, preloads)
 
-    code = """
+    code = """%(layout)s
 type %(class_name)s struct {
 %(fields)s
 }
@@ -123,78 +1080,572 @@ type %(class_name)s struct {
 func(%(class_name)s) TableName() string {
     return "%(table)s"
 }
-""" % {
+%(scan)s%(preload)s%(json)s%(validate)s%(routes)s""" % {
+        "layout": layout,
         "class_name": class_name,
         "table": table,
         "fields": "\n".join([
-            "    %s" % f
+            "    %s" % f.code
             for f in go_code_fields
-        ])
+        ]),
+        "scan": render_go_scan(class_name, go_code_fields) if scan else "",
+        "preload": preload,
+        "json": render_go_json(class_name, json_fields) if json_methods else "",
+        "validate": render_go_validate(class_name, declarations, checks) if validate_methods else "",
+        "routes": render_go_routes(
+            class_name, table, model.read_db, model.write_db
+        ) if routes and model.read_db else "",
     }
 
     return code
 
 
-def render_java(c) -> str:
+def render_java_table(model) -> List[str]:
+    """
+    @Table annotation holding the multi column and named indexes of a model. JPA has no partial
+    indexes, indexes with a condition are left out.
+    """
+    indexes = [
+        'Index(name = "%s", columnList = "%s")' % (i.name, ", ".join(i.columns))
+        for i in model.indexes if not i.unique and not i.condition
+    ]
+    unique_constraints = [
+        'UniqueConstraint(name = "%s", columnNames = [%s])' % (i.name, ", ".join('"%s"' % c for c in i.columns))
+        for i in model.indexes if i.unique and not i.condition
+    ]
+    if not indexes and not unique_constraints:
+        return []
+    s = list()
+    s.append("@Table(")
+    s.append('    name = "%s",' % model.table)
+    if indexes:
+        s.append("    indexes = [")
+        s.extend("        %s," % i for i in indexes)
+        s.append("    ],")
+    if unique_constraints:
+        s.append("    uniqueConstraints = [")
+        s.extend("        %s," % c for c in unique_constraints)
+        s.append("    ],")
+    s.append(")")
+    return s
+
+
+def _java_relation_name(p):
+    # property of a relation in the generated classes, FieldIR or RelationPath
+    return p.accessor if p.cardinality == "o2m" or (p.cardinality == "m2m" and p.reverse) else p.name
+
+
+def _java_to_one(p):
+    return p.cardinality in ("o2o", "m2o") and _java_relation_name(p)
+
+
+def _java_graph_nodes(prefix, paths, depth, subgraphs, labels):
+    """
+    NamedAttributeNodes of paths, the to-one relations of their models are followed through
+    subgraphs up to depth relations away, but not back into the models of `labels`.
+    Subgraphs are added to `subgraphs` as (name, nodes).
+    """
+    nodes = []
+    for p in paths:
+        name = _java_relation_name(p)
+        subgraph = "%s.%s" % (prefix, name)
+        index = len(subgraphs)
+        children = [] if depth <= 1 else [
+            c for c in p.children if _java_to_one(c) and c.related_label not in labels + (p.related_label,)
+        ]
+        children = _java_graph_nodes(subgraph, children, depth - 1, subgraphs, labels + (p.related_label,))
+        if children:
+            subgraphs.insert(index, (subgraph, children))
+            nodes.append('NamedAttributeNode(value = "%s", subgraph = "%s")' % (name, subgraph))
+        else:
+            nodes.append('NamedAttributeNode("%s")' % name)
+    return nodes
+
+
+def render_java_entity_graphs(model, depth) -> List[str]:
+    """
+    @NamedEntityGraphs of a model, from model.relation_paths: "<Class>.related" fetches the to-one
+    relations, followed up to depth relations away, and "<Class>.<collection>" fetches a collection
+    with the to-one relations of its elements. Collections are never fetched together, which
+    would multiply the rows of the join (and Hibernate refuses to fetch several lists at once).
+    """
+    graphs = []
+    to_one = [p for p in model.relation_paths if _java_to_one(p)]
+    if to_one:
+        graphs.append(("%s.related" % model.class_name, to_one))
+    for p in model.relation_paths:
+        if p.cardinality in ("o2m", "m2m") and _java_relation_name(p):
+            graphs.append(("%s.%s" % (model.class_name, _java_relation_name(p)), [p]))
+    if not graphs:
+        return []
+
+    s = list()
+    s.append("@NamedEntityGraphs(")
+    for name, paths in graphs:
+        subgraphs = []
+        nodes = _java_graph_nodes(name, paths, depth, subgraphs, ("%s.%s" % (model.app_name, model.class_name),))
+        s.append("    NamedEntityGraph(")
+        s.append('        name = "%s",' % name)
+        s.append("        attributeNodes = [")
+        s.extend("            %s," % n for n in nodes)
+        s.append("        ],")
+        if subgraphs:
+            s.append("        subgraphs = [")
+            for subgraph, subgraph_nodes in subgraphs:
+                s.append("            NamedSubgraph(")
+                s.append('                name = "%s",' % subgraph)
+                s.append("                attributeNodes = [")
+                s.extend("                    %s," % n for n in subgraph_nodes)
+                s.append("                ],")
+                s.append("            ),")
+            s.append("        ],")
+        s.append("    ),")
+    s.append(")")
+    return s
+
+
+# Longest identifier postgres keeps, NAMEDATALEN - 1
+POSTGRES_MAX_NAME_LENGTH = 63
+
+
+def postgres_sequence_name(table, column):
+    """
+    Name postgres gives the sequence of a serial / identity column, "<table>_<column>_seq", with
+    the longer of table and column shortened until it fits, as postgres' makeObjectName does.
+    """
+    available = POSTGRES_MAX_NAME_LENGTH - len("_seq") - 1
+    table_length, column_length = len(table), len(column)
+    while table_length + column_length > available:
+        if table_length > column_length:
+            table_length -= 1
+        else:
+            column_length -= 1
+    return "%s_%s_seq" % (table[:table_length], column[:column_length])
+
+
+def _java_column_count(model):
+    # columns of the table mapped by the entity, i.e. fields and foreign keys
+    return sum(
+        1 for p in model.fields
+        if p.cardinality is None or (p.cardinality in ("o2o", "m2o") and p.attname and not p.reverse)
+    )
+
+
+def _java_generator(model, p, generator, id_generation, allocation_size):
+    if generator == KGenerator.AutoGenerator and id_generation == "sequence":
+        sequence = postgres_sequence_name(model.table, p.column)
+        return [
+            "@GeneratedValue(strategy=GenerationType.SEQUENCE, generator=\"%s\")" % sequence,
+            "@SequenceGenerator(name=\"%s\", sequenceName=\"%s\", allocationSize=%d)" % (
+                sequence, sequence, allocation_size
+            ),
+        ]
+    return [generator.render()] if generator.render() else []
+
+
+def entity_cache_mode(label, meta_cache=None, entity_cache=None):
+    """
+    :param label: app_label.ObjectName of a model
+    :param meta_cache: its Meta.d2g_cache
+    :param entity_cache: cache modes by model label, or by app label for every model of the app
+    :return: cache mode of the entity, see ENTITY_CACHE_MODES: the one of the model in
+             entity_cache, else its Meta.d2g_cache, else the one of its app, None when not cached
+    """
+    entity_cache = entity_cache or {}
+    mode = entity_cache.get(label) or meta_cache or entity_cache.get(label.split(".", 1)[0])
+    if mode is not None and mode not in ENTITY_CACHE_MODES:
+        raise ValueError("Unknown cache mode %r of %s, expected one of %s" % (
+            mode, label, ", ".join(ENTITY_CACHE_MODES)
+        ))
+    return mode
+
+
+def render_java(model, lazy=False, batch_size=None, entity_graph_depth=0, id_generation="identity",
+                allocation_size=1, dynamic_update=None, compact_types=False, entity_cache=None,
+                routes=False, null_policy="value") -> str:
+    """
+    :param model: ModelIR of the model
+    :param lazy: Fetch to-one relations lazily, collections already are by default
+    :param batch_size: Load lazy collections, and lazy references to this entity, in batches of
+                       this many with @BatchSize
+    :param entity_graph_depth: Also generate named entity graphs following relations up to this
+                               many relations away, model.relation_paths must be that deep
+    :param id_generation: "identity", or "sequence" to take auto field values from the sequence
+                          postgres created for the column, which lets Hibernate batch inserts
+    :param allocation_size: Ids Hibernate takes per sequence call, above 1 the sequence must be
+                            altered to be incremented by as much
+    :param dynamic_update: Generate @DynamicUpdate on entities of at least this many columns, so
+                           that updates only write the changed columns
+    :param compact_types: Pick property types from the constraints of the fields, see fieldtypes.java_field_type
+    :param entity_cache: Cache modes by model label or app label, which take precedence over (the
+                         former) or default (the latter) Meta.d2g_cache, see entity_cache_mode.
+                         Cached entities get @Cacheable / @Cache, and their collections of cached
+                         entities @Cache, read-only ones @Immutable
+    :param routes: Also generate READ_DB / WRITE_DB constants holding the databases DATABASE_ROUTERS
+                   route the model to, for models whose routes are known
+    :param null_policy: "value", or "pointer" / "sql" for nullable types of nullable columns and
+                        relations, see fieldtypes.kotlin_type
+    """
+    fetch = "fetch=FetchType.LAZY" if lazy else ""
+    cache_mode = entity_cache_mode("%s.%s" % (model.app_name, model.class_name), model.cache, entity_cache)
+    usage = ENTITY_CACHE_MODES.get(cache_mode)
+    immutable = cache_mode in ("read-only", "immutable")
+
+    def collection_cache(p):
+        # collections only hold ids, caching them is a query per element unless their entities are cached too
+        lines = ["    @Immutable"] if immutable else []
+        if usage and ENTITY_CACHE_MODES.get(entity_cache_mode(p.related_label, p.related_cache, entity_cache)):
+            lines.append("    @Cache(usage=CacheConcurrencyStrategy.%s)" % usage)
+        return lines
+
     s = list()
     s.append("@Entity")
-    s.append("class %s (" % c["class_name"])
+    s.extend(render_java_table(model))
+    if immutable:
+        s.append("@Immutable")
+    if usage:
+        s.append("@Cacheable")
+        s.append("@Cache(usage=CacheConcurrencyStrategy.%s)" % usage)
+    if dynamic_update and _java_column_count(model) >= dynamic_update:
+        s.append("@DynamicUpdate")
+    if batch_size:
+        s.append("@BatchSize(size=%d)" % batch_size)
+    if entity_graph_depth:
+        s.extend(render_java_entity_graphs(model, entity_graph_depth))
+    s.append("class %s (" % model.class_name)
 
-    for p in c["primitive_fields"]:
+    fields = model.fields
+    for p in fields:
+        if p.cardinality is not None:
+            continue
         s.append("")
-        if p.nullable:
+        if p.null:
             s.append("    @Column(nullable=true)")
         else:
             s.append("    @NotNull")
 
         for v in p.generator:
-            if v.render():
-                s.append("    %s" % v.render())
+            s.extend("    %s" % a for a in _java_generator(model, p, v, id_generation, allocation_size))
         for v in p.validation:
             if v.render():
                 s.append("    %s" % v.render())
-        s.append("    var %s: %s," % (p.name, p.type.name))
+        s.append("    var %s: %s," % (
+            get_java_field_name(p.name), kotlin_type(java_field_type(p, compact_types).name, p, null_policy)
+        ))
 
-    for p in c["o2o_fields"]:
+    for p in fields:
+        if p.cardinality != "o2o":
+            continue
         s.append("")
-        if p.nullable:
+        if p.null:
             s.append("    @Column(nullable=true)")
         else:
             s.append("    @NotNull")
 
         if p.reverse:
-            s.append("    @OneToOne(mappedBy=\"%s\")" % p.reverse_field)
+            s.append("    @OneToOne(mappedBy=\"%s\"%s)" % (p.remote_field_name, ", " + fetch if fetch else ""))
         else:
-            s.append("    @OneToOne")
+            s.append("    @OneToOne(%s)" % fetch if fetch else "    @OneToOne")
             s.append("    @JoinColumn(name=\"%s\")" % p.attname)
 
-        s.append("    var %s: %s," % (p.name, p.model.__name__))
+        s.append("    var %s: %s," % (p.name, kotlin_type(p.related_object_name, p, null_policy)))
 
-    for p in c["m2o_fields"]:
+    for p in fields:
+        if p.cardinality != "m2o" or not p.attname:     # Generic Foreign Key fails this test
+            continue
         s.append("")
-        s.append("    @ManyToOne")
+        s.append("    @ManyToOne(%s)" % fetch if fetch else "    @ManyToOne")
         s.append("    @JoinColumn(name=\"%s\")" % p.attname)
-        s.append("    var %s: %s," % (p.name, p.model.__name__))
+        s.append("    var %s: %s," % (p.name, kotlin_type(p.related_object_name, p, null_policy)))
 
-    for p in c["o2m_fields"]:
+    for p in fields:
+        if p.cardinality != "o2m":
+            continue
         s.append("")
-        s.append("    @OneToMany(mappedBy=\"%s\")" % p.reverse_field)
-        s.append("    var %s: List<%s>," % (p.name, p.model.__name__))
+        s.append("    @OneToMany(mappedBy=\"%s\")" % p.name)
+        if batch_size:
+            s.append("    @BatchSize(size=%d)" % batch_size)
+        s.extend(collection_cache(p))
+        s.append("    var %s: List<%s>," % (p.accessor, p.related_object_name))
 
-    for p in c["m2m_fields"]:
+    for p in fields:
+        if p.cardinality != "m2m":
+            continue
         s.append("")
         if p.reverse:
-            s.append("    @ManyToMany(mappedBy=\"%s\")" % p.reverse_field)
-            s.append("    var %s: List<%s>," % (p.name, p.model.__name__))
+            s.append("    @ManyToMany(mappedBy=\"%s\")" % p.remote_field_name)
+            if batch_size:
+                s.append("    @BatchSize(size=%d)" % batch_size)
+            s.extend(collection_cache(p))
+            s.append("    var %s: List<%s>," % (p.accessor, p.related_object_name))
         else:
             s.append("    @ManyToMany")
             s.append("    @JoinTable(")
-            s.append("        name= \"%s\"" % p.db_table)
-            s.append("        joinColumns= @JoinColumn(name=\"%s\")" % p.column_id)
-            s.append("        inverseJoinColumns= @JoinColumn(name=\"%s\")" % p.reverse_column_id)
+            s.append("        name= \"%s\"" % p.m2m_db_table)
+            s.append("        joinColumns= @JoinColumn(name=\"%s\")" % p.m2m_column_name)
+            s.append("        inverseJoinColumns= @JoinColumn(name=\"%s\")" % p.m2m_reverse_name)
             s.append("    )")
-            s.append("    var %s: List<%s>," % (p.name, p.model.__name__))
+            if batch_size:
+                s.append("    @BatchSize(size=%d)" % batch_size)
+            s.extend(collection_cache(p))
+            s.append("    var %s: List<%s>," % (p.name, p.related_object_name))
 
-    s.append(")")
+    if routes and model.read_db:
+        s.append(") {")
+        s.append("    companion object {")
+        s.append("        // databases django reads the rows from and writes them to (DATABASE_ROUTERS)")
+        s.append('        const val READ_DB = "%s"' % model.read_db)
+        s.append('        const val WRITE_DB = "%s"' % model.write_db)
+        s.append("    }")
+        s.append("}")
+    else:
+        s.append(")")
 
     return "\n".join(s)
+
+
+# Proto types of the fields converted like these D2GField members, by dfield
+PROTO_TYPES = {
+    "BinaryField": "bytes",
+    "DateField": "string",          # ISO 8601 date
+    "DateTimeField": "google.protobuf.Timestamp",
+    "DecimalField": "string",       # exact decimal text
+    "DurationField": "google.protobuf.Duration",
+    "FloatField": "double",
+    "GenericIPAddressField": "string",
+    "JsonField": "google.protobuf.Value",
+    "TimeField": "string",          # ISO 8601 time
+}
+
+# Proto scalars of the go types of the other fields
+PROTO_SCALARS = {
+    "bool": "bool",
+    "int16": "int32",
+    "int32": "int32",
+    "int64": "int64",
+    "uint16": "uint32",
+    "uint32": "uint32",
+    "uint64": "uint64",
+    "float32": "float",
+    "float64": "double",
+    "string": "string",
+    "uuid.UUID": "string",
+}
+
+# Proto types of the kotlin types, for fields without a go type
+PROTO_KFIELDS = {
+    KField.Byte: "int32",
+    KField.Short: "int32",
+    KField.Int: "int32",
+    KField.Long: "int64",
+    KField.Float: "float",
+    KField.Double: "double",
+    KField.BigDecimal: "string",
+    KField.Boolean: "bool",
+    KField.String: "string",
+    KField.Json: "google.protobuf.Value",
+    KField.LocalDate: "string",
+    KField.LocalDateTime: "google.protobuf.Timestamp",
+    KField.LocalTime: "string",
+    KField.ByteArray: "bytes",
+}
+
+# Type of the ids of related rows, wide enough for both AutoField and BigAutoField primary keys
+PROTO_ID_TYPE = "uint64"
+
+
+def proto_type(field) -> str:
+    go = field.go
+    if go is not None and go.dfield in PROTO_TYPES:
+        return PROTO_TYPES[go.dfield]
+    if go is not None and go.gofield in PROTO_SCALARS:
+        return PROTO_SCALARS[go.gofield]
+    if field.java in PROTO_KFIELDS:
+        return PROTO_KFIELDS[field.java]
+    raise LookupError("No proto type for field class %s" % field.field_class)
+
+
+def proto_fields(model, relations="ids"):
+    """
+    Fields of the message of a model, in model order.
+    :param relations: "ids" for the ids of the rows forward relations refer to, "messages" for the
+                      related messages as well. Reverse relations are left out, they would make
+                      the files of related messages import each other, which protoc rejects
+    :return: [(name, type, label)], label being "", "optional" or "repeated"
+    """
+    messages = relations == "messages"
+    fields = []
+    for p in model.fields:
+        if p.cardinality is None:
+            ptype = proto_type(p)
+            # scalars have no presence unless optional, messages always have one
+            fields.append((p.name, ptype, "optional" if p.null and "." not in ptype else ""))
+        elif p.reverse or not p.related_label:
+            continue    # reverse and generic relations
+        elif p.cardinality in ("o2o", "m2o"):
+            fields.append((p.attname, PROTO_ID_TYPE, "optional" if p.null else ""))
+            if messages:
+                fields.append((p.name, p.related_object_name, ""))
+        elif p.cardinality == "m2m":
+            fields.append((p.name, p.related_object_name if messages else PROTO_ID_TYPE, "repeated"))
+    return fields
+
+
+def render_proto(model, numbers=None, relations="ids") -> str:
+    """
+    :param model: ModelIR of the model
+    :param numbers: ProtoNumbers of the fields, from the lock file (see protolock.ProtoLock),
+                    numbered in model order when not given
+    :param relations: see proto_fields
+    """
+    fields = proto_fields(model, relations)
+    if numbers is None:
+        numbers = ProtoNumbers(tuple((name, number) for number, (name, _, _) in enumerate(fields, 1)))
+    number = dict(numbers.fields)
+
+    s = list()
+    s.append("message %s {" % model.class_name)
+    if numbers.reserved_numbers:
+        s.append("    reserved %s;" % ", ".join(str(n) for n in numbers.reserved_numbers))
+    if numbers.reserved_names:
+        s.append("    reserved %s;" % ", ".join('"%s"' % n for n in numbers.reserved_names))
+    for name, ptype, label in fields:
+        s.append("    %s%s %s = %d;" % (label + " " if label else "", ptype, name, number[name]))
+    s.append("}")
+    return "\n".join(s) + "\n"
+
+
+GENERATED_HEADER = "// Code generated by djangorm. DO NOT EDIT."
+
+# Import paths of the go packages generated types may refer to, by package name
+GO_IMPORTS = {
+    "datatypes": "gorm.io/datatypes",
+    "decimal": "github.com/shopspring/decimal",
+    "encoding": "encoding",
+    "errors": "errors",
+    "gorm": "gorm.io/gorm",
+    "json": "encoding/json",
+    "math": "math",
+    "regexp": "regexp",
+    "sql": "database/sql",
+    "strconv": "strconv",
+    "strings": "strings",
+    "time": "time",
+    "utf16": "unicode/utf16",
+    "utf8": "unicode/utf8",
+    "uuid": "github.com/google/uuid",
+}
+
+# Classes of the annotations and types generated classes may refer to
+JAVA_IMPORTS = {
+    "Cacheable": "javax.persistence.Cacheable",
+    "Column": "javax.persistence.Column",
+    "Entity": "javax.persistence.Entity",
+    "FetchType": "javax.persistence.FetchType",
+    "GeneratedValue": "javax.persistence.GeneratedValue",
+    "GenerationType": "javax.persistence.GenerationType",
+    "Index": "javax.persistence.Index",
+    "JoinColumn": "javax.persistence.JoinColumn",
+    "JoinTable": "javax.persistence.JoinTable",
+    "ManyToMany": "javax.persistence.ManyToMany",
+    "ManyToOne": "javax.persistence.ManyToOne",
+    "NamedAttributeNode": "javax.persistence.NamedAttributeNode",
+    "NamedEntityGraphs": "javax.persistence.NamedEntityGraphs",
+    "NamedEntityGraph": "javax.persistence.NamedEntityGraph",
+    "NamedSubgraph": "javax.persistence.NamedSubgraph",
+    "OneToMany": "javax.persistence.OneToMany",
+    "OneToOne": "javax.persistence.OneToOne",
+    "SequenceGenerator": "javax.persistence.SequenceGenerator",
+    "Table": "javax.persistence.Table",
+    "UniqueConstraint": "javax.persistence.UniqueConstraint",
+    "Email": "javax.validation.constraints.Email",
+    "NotNull": "javax.validation.constraints.NotNull",
+    "URL": "org.hibernate.validator.constraints.URL",
+    "BatchSize": "org.hibernate.annotations.BatchSize",
+    "Cache": "org.hibernate.annotations.Cache",
+    "CacheConcurrencyStrategy": "org.hibernate.annotations.CacheConcurrencyStrategy",
+    "CreationTimestamp": "org.hibernate.annotations.CreationTimestamp",
+    "DynamicUpdate": "org.hibernate.annotations.DynamicUpdate",
+    "GenericGenerator": "org.hibernate.annotations.GenericGenerator",
+    "Immutable": "org.hibernate.annotations.Immutable",
+    "UpdateTimestamp": "org.hibernate.annotations.UpdateTimestamp",
+    "LocalDate": "java.time.LocalDate",
+    "LocalDateTime": "java.time.LocalDateTime",
+    "LocalTime": "java.time.LocalTime",
+    "BigDecimal": "java.math.BigDecimal",
+}
+
+# Files declaring the well-known types generated messages may refer to
+PROTO_IMPORTS = {
+    "google.protobuf.Duration": "google/protobuf/duration.proto",
+    "google.protobuf.Timestamp": "google/protobuf/timestamp.proto",
+    "google.protobuf.Value": "google/protobuf/struct.proto",
+}
+
+_GO_QUALIFIER = re.compile(r"\b([a-z]\w*)\.[A-Z]")
+_JAVA_NAME = re.compile(
+    r"@(\w+)|\b((?:BigDecimal|CacheConcurrencyStrategy|FetchType|GenerationType|LocalDate|LocalDateTime|LocalTime)\b"
+    r"|(?:Index|UniqueConstraint|NamedEntityGraph|NamedAttributeNode|NamedSubgraph)(?=\())"
+)
+
+
+def render_go_file(package, codes) -> str:
+    """
+    Go source file holding the given rendered structs, importing only the packages they use.
+    """
+    body = "".join(codes)
+    paths = set(GO_IMPORTS[name] for name in _GO_QUALIFIER.findall(body) if name in GO_IMPORTS)
+    if len(paths) > 1:
+        # standard library first, as goimports does
+        groups = [
+            "\n".join('    "%s"' % path for path in sorted(paths) if ("." in path.split("/")[0]) == third_party)
+            for third_party in (False, True)
+        ]
+        imports = "\nimport (\n%s\n)\n" % "\n\n".join(group for group in groups if group)
+    elif paths:
+        imports = '\nimport "%s"\n' % paths.pop()
+    else:
+        imports = ""
+    return "%s\n\npackage %s\n%s%s\n" % (GENERATED_HEADER, package, imports, body)
+
+
+def render_java_file(package, codes) -> str:
+    """
+    Kotlin source file holding the given rendered classes, importing only the classes they use.
+    """
+    body = "\n\n".join(codes)
+    names = set(a or t for a, t in _JAVA_NAME.findall(body))
+    imports = "".join("import %s\n" % path for path in sorted(JAVA_IMPORTS[n] for n in names if n in JAVA_IMPORTS))
+    return "%s\npackage %s\n\n%s%s\n" % (GENERATED_HEADER, package, imports + "\n" if imports else "", body)
+
+
+_PROTO_MESSAGE = re.compile(r"^message (\w+) \{", re.M)
+_PROTO_TYPE = re.compile(r"^    (?:optional |repeated )?([\w.]+) \w+ = \d+;", re.M)
+
+
+def proto_file_imports(files):
+    """
+    :param files: file name -> rendered messages of the file
+    :return: file name -> names of the other files declaring the messages its messages refer to
+    """
+    declared = {}
+    for name, codes in files.items():
+        for message in _PROTO_MESSAGE.findall("".join(codes)):
+            declared.setdefault(message, name)
+    return {
+        name: sorted(set(declared[t] for t in _PROTO_TYPE.findall("".join(codes)) if t in declared) - {name})
+        for name, codes in files.items()
+    }
+
+
+def render_proto_file(package, codes, imports=()) -> str:
+    """
+    Proto file holding the given rendered messages, importing the well-known types they use.
+    :param imports: other files to import, see proto_file_imports
+    """
+    body = "\n".join(codes)
+    paths = sorted(set(PROTO_IMPORTS[t] for t in _PROTO_TYPE.findall(body) if t in PROTO_IMPORTS) | set(imports))
+    imports = "".join('import "%s";\n' % path for path in paths)
+    return '%s\n\nsyntax = "proto3";\n\npackage %s;\n\n%s%s' % (
+        GENERATED_HEADER, package, imports + "\n" if imports else "", body
+    )
@@ -0,0 +1,79 @@
+import json
+from .data import FieldIR, GoType, IndexIR, KField, KGenerator, KValidation, ModelIR
+
+# Bump whenever the layout below changes, old snapshots are then refused instead of misread.
+SNAPSHOT_VERSION = 8
+
+
+def _dump_field(f):
+    # Enums are stored by name, the go type as a list
+    return list(f._replace(
+        go=list(f.go) if f.go else None,
+        java=f.java.name if f.java else None,
+        validation=[v.name for v in f.validation],
+        generator=[g.name for g in f.generator],
+        target=_dump_field(f.target) if f.target else None,
+    ))
+
+
+def _load_field(values):
+    f = FieldIR(*values)
+    return f._replace(
+        go=GoType(*f.go) if f.go else None,
+        java=KField[f.java] if f.java else None,
+        validation=tuple(KValidation[v] for v in f.validation),
+        generator=tuple(KGenerator[g] for g in f.generator),
+        choices=tuple(f.choices),
+        target=_load_field(f.target) if f.target else None,
+    )
+
+
+def dump_model(model):
+    """
+    Serialize a ModelIR into json friendly values.
+    Fields are stored as plain lists, in FieldIR order, to keep snapshots compact.
+    """
+    entry = {
+        "app_name": model.app_name,
+        "class_name": model.class_name,
+        "table": model.table,
+        "fields": [_dump_field(f) for f in model.fields],
+        "indexes": [[i.name, list(i.columns), i.unique, i.condition] for i in model.indexes],
+    }
+    for key in ("cache", "read_db", "write_db"):
+        # left out when unknown, e.g. routes of models parsed without django
+        if getattr(model, key):
+            entry[key] = getattr(model, key)
+    return entry
+
+
+def load_model(app_name, entry):
+    return ModelIR(
+        app_name=app_name,
+        class_name=entry["class_name"],
+        table=entry["table"],
+        fields=tuple(_load_field(f) for f in entry["fields"]),
+        indexes=tuple(
+            IndexIR(name, tuple(columns), unique, condition) for name, columns, unique, condition in entry["indexes"]
+        ),
+        cache=entry.get("cache"),
+        read_db=entry.get("read_db"),
+        write_db=entry.get("write_db"),
+    )
+
+
+def write_snapshot(models, fh):
+    """
+    :param models: iterable of snapshot entries, as returned by dump_model
+    :param fh: text file object the snapshot is written to
+    """
+    json.dump({"version": SNAPSHOT_VERSION, "models": list(models)}, fh, separators=(",", ":"))
+
+
+def read_snapshot(fh):
+    snapshot = json.load(fh)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError("Unsupported snapshot version %r, expected %r (re-export the snapshot)" % (
+            snapshot.get("version"), SNAPSHOT_VERSION
+        ))
+    return snapshot
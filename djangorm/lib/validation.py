@@ -0,0 +1,206 @@
+"""
+Validation compiled to go: the checks django's full_clean runs on the value of a field (blank,
+choices, max_length, min / max validators, email and slug validators) as straight-line go
+statements, for generated Validate() methods that need neither reflection nor tag parsing.
+"""
+import json
+import math
+from .fieldtypes import GO_DECIMAL, GO_SQL_NULL_VALUES, INTEGER_RANGES
+
+# Values of the go integer types
+GO_INTEGER_LIMITS = dict(
+    [("int%d" % bits, (-2 ** (bits - 1), 2 ** (bits - 1) - 1)) for bits in (8, 16, 32, 64)] +
+    [("uint%d" % bits, (0, 2 ** bits - 1)) for bits in (8, 16, 32, 64)]
+)
+
+GO_FLOATS = ("float32", "float64")
+
+# Package level regexps of GO_VALIDATE_RUNTIME validating fields, and the rule they report, by D2GField dfield
+GO_PATTERNS = {
+    "EmailField": ("d2gEmailPattern", "email"),
+    "SlugField": ("d2gSlugPattern", "slug"),
+}
+
+# Go code the generated Validate methods refer to, written once per output (a d2g_validate.go file in --out-dir)
+GO_VALIDATE_RUNTIME = r'''
+// ValidationError is a field whose value django would reject, as found by the generated Validate methods
+type ValidationError struct {
+    Field string // django field name
+    Rule  string // e.g. required, max_length=20, choices
+}
+
+func (e ValidationError) Error() string {
+    return e.Field + ": " + e.Rule
+}
+
+// ValidationErrors lists the invalid fields of a struct, in declaration order
+type ValidationErrors []ValidationError
+
+func (errs ValidationErrors) Error() string {
+    messages := make([]string, len(errs))
+    for i, e := range errs {
+        messages[i] = e.Error()
+    }
+    return strings.Join(messages, "; ")
+}
+
+// django's EmailValidator, but internationalized domain names are rejected and ip literals are not checked
+var d2gEmailPattern = regexp.MustCompile("(?i)^(?:[-!#$%&'*+/=?^_`{}|~0-9a-z]+(?:\\.[-!#$%&'*+/=?^_`{}|~0-9a-z]+)*|\"(?:[\\x01-\\x08\\x0b\\x0c\\x0e-\\x1f!#-\\[\\]-\\x7f]|\\\\[\\x01-\\x09\\x0b\\x0c\\x0e-\\x7f])*\")@(?:(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\\.)+[a-z0-9-]{1,62}[a-z0-9]|localhost|\\[[0-9a-f:.]+\\])$")
+
+// django's validate_slug
+var d2gSlugPattern = regexp.MustCompile(`^[-a-zA-Z0-9_]+$`)
+'''
+
+# Declared by every generated Validate method with checks, tells that GO_VALIDATE_RUNTIME is needed
+GO_VALIDATE_MARKER = "var errs ValidationErrors"
+
+
+def go_string(s) -> str:
+    # go interpreted string literal, json escapes are valid go escapes but for \u of surrogates
+    return json.dumps(s, ensure_ascii=False)
+
+
+def _go_number(value) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _switch(value, cases, error):
+    return ["switch %s {" % value, "case %s:" % ", ".join(cases), "default:", "    " + error, "}"]
+
+
+def _field_limits(field):
+    # (min, max) of the values of the field, from its class (the range django's integer fields
+    # validate) and its min / max validators, None where unbounded
+    low, high = INTEGER_RANGES.get(field.go.dfield, (None, None))
+    if field.min_value is not None:
+        low = field.min_value if low is None else max(low, field.min_value)
+    if field.max_value is not None:
+        high = field.max_value if high is None else min(high, field.max_value)
+    return low, high
+
+
+def go_field_checks(class_name, field, expr, vtype):
+    """
+    Checks of the value of a (non relation) field of a struct.
+    :param field: FieldIR
+    :param expr: the struct field, e.g. m.Label
+    :param vtype: its go type, a pointer or sql.Null* type for nullable columns holding NULL
+    :return: (package level declarations, statements appending a ValidationError to errs for each
+             check the value fails)
+    """
+    error = "errs = append(errs, ValidationError{%s, %%s})" % go_string(field.name)
+    guard = missing = None
+    value = expr
+    if vtype.startswith("*"):
+        value, vtype = "*" + expr, vtype[1:]
+        guard, missing = "%s != nil" % expr, "%s == nil" % expr
+    elif vtype in GO_SQL_NULL_VALUES:
+        value = "%s.%s" % (expr, vtype.split(".Null", 1)[1])
+        guard, missing = "%s.Valid" % expr, "!%s.Valid" % expr
+        vtype = GO_SQL_NULL_VALUES[vtype]
+
+    declarations, statements, checks = [], [], []
+
+    def fail(condition, rule, into=checks):
+        into.extend(["if %s {" % condition, "    " + error % go_string(rule), "}"])
+
+    if not field.blank and not field.primary_key:
+        # blank=False, django rejects None and empty values
+        conditions = [missing] if missing else []
+        if vtype == "string":
+            conditions.append('%s == ""' % value)
+        elif vtype == "datatypes.JSON":
+            conditions.append("len(%s) == 0" % value)
+        if conditions:
+            fail(" || ".join(conditions), "required", statements)
+
+    choices = [c for c in field.choices if c is not None]
+    if vtype == "string":
+        # validators are not run on empty values
+        if field.max_length:
+            fail("len(%s) > %d && utf8.RuneCountInString(%s) > %d" % (
+                value, field.max_length, value, field.max_length
+            ), "max_length=%d" % field.max_length)
+        if field.go.dfield in GO_PATTERNS:
+            pattern, rule = GO_PATTERNS[field.go.dfield]
+            fail('%s != "" && !%s.MatchString(%s)' % (value, pattern, value), rule)
+        if choices and all(isinstance(c, str) for c in choices):
+            cases = [go_string(c) for c in dict.fromkeys([""] + choices)]
+            checks.extend(_switch(value, cases, error % go_string("choices")))
+    elif vtype in GO_INTEGER_LIMITS or vtype in GO_FLOATS or vtype == GO_DECIMAL:
+        numbers = choices and all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in choices)
+        if numbers and vtype != GO_DECIMAL and (vtype in GO_FLOATS or all(isinstance(c, int) for c in choices)):
+            cases = [_go_number(c) for c in dict.fromkeys(choices)]
+            checks.extend(_switch(value, cases, error % go_string("choices")))
+        else:
+            low, high = _field_limits(field)
+            if vtype in GO_INTEGER_LIMITS:
+                type_low, type_high = GO_INTEGER_LIMITS[vtype]
+                low = math.ceil(low) if low is not None and math.ceil(low) > type_low else None
+                high = math.floor(high) if high is not None and math.floor(high) < type_high else None
+            for limit, operator, suffix in ((low, "<", "Min"), (high, ">", "Max")):
+                if limit is None:
+                    continue
+                rule = "%s_value=%s" % (suffix.lower(), _go_number(limit))
+                if vtype == GO_DECIMAL:
+                    name = "%s%s%s" % (class_name[0].lower() + class_name[1:], expr.rsplit(".", 1)[-1], suffix)
+                    declarations.append('%s = decimal.RequireFromString("%s")' % (name, _go_number(limit)))
+                    method = "LessThan" if operator == "<" else "GreaterThan"
+                    operand = "(%s)" % value if value.startswith("*") else value
+                    fail("%s.%s(%s)" % (operand, method, name), rule)
+                else:
+                    fail("%s %s %s" % (value, operator, _go_number(limit)), rule)
+
+    if checks and guard:
+        checks = ["if %s {" % guard] + ["    " + line for line in checks] + ["}"]
+    return declarations, statements + checks
+
+
+# Conditions telling that a foreign key column of a go type refers to no row, "%s == 0" for the others
+GO_MISSING_KEYS = {
+    "string": '%s == ""',
+    "uuid.UUID": "%s == uuid.Nil",
+    GO_DECIMAL: "%s.IsZero()",
+}
+
+
+def go_foreign_key_checks(field, expr, vtype):
+    """
+    Checks of the foreign key column of a forward relation, e.g. m.AuthorId, of go type vtype.
+    """
+    if field.blank or field.primary_key:
+        return []
+    if vtype.startswith("*"):
+        missing = "%s == nil" % expr
+    elif vtype in GO_SQL_NULL_VALUES:
+        missing = "!%s.Valid" % expr
+    else:
+        missing = GO_MISSING_KEYS.get(vtype, "%s == 0") % expr
+    return ["if %s {" % missing, "    errs = append(errs, ValidationError{%s, %s})" % (
+        go_string(field.name), go_string("required")
+    ), "}"]
+
+
+def render_go_validate(class_name, declarations, statements) -> str:
+    """
+    Validate method of a struct running the given checks, and the package level values they use.
+    """
+    s = list()
+    if declarations:
+        s.append("")
+        s.append("var (")
+        s.extend("    " + d for d in declarations)
+        s.append(")")
+    s.append("")
+    s.append("// Validate checks the values of m as django's full_clean does, uniqueness and relations aside,")
+    s.append("// the error is ValidationErrors")
+    s.append("func (m *%s) Validate() error {" % class_name)
+    if statements:
+        s.append("    %s" % GO_VALIDATE_MARKER)
+        s.extend("    " + line for line in statements)
+        s.append("    if errs != nil {")
+        s.append("        return errs")
+        s.append("    }")
+    s.append("    return nil")
+    s.append("}")
+    return "\n".join(s) + "\n"
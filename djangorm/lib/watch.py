@@ -0,0 +1,84 @@
+import importlib
+import os
+import sys
+
+from .cache import model_fingerprint
+from .graph import clear_relation_graph
+
+
+class ModelWatcher:
+    """
+    Polls the models modules of the given apps and reloads the apps whose sources changed,
+    keeping django (and every other app) loaded.
+    """
+
+    def __init__(self, app_names):
+        from django.apps import apps
+
+        self.apps = apps
+        self.app_configs = [apps.get_app_config(name) for name in app_names]
+        self.mtimes = self._mtimes()
+
+    def _modules(self, app_config):
+        if app_config.models_module is None:
+            return []
+        prefix = app_config.models_module.__name__
+        # models may be a package, reload its submodules before the package itself
+        return sorted(
+            [m for name, m in list(sys.modules.items())
+             if m is not None and (name == prefix or name.startswith(prefix + ".")) and getattr(m, "__file__", None)],
+            key=lambda m: -len(m.__name__)
+        )
+
+    def _mtimes(self):
+        mtimes = {}
+        for app_config in self.app_configs:
+            for module in self._modules(app_config):
+                try:
+                    mtimes[module.__file__] = (app_config.label, os.stat(module.__file__).st_mtime)
+                except OSError:
+                    pass
+        return mtimes
+
+    def poll(self):
+        """
+        :return: labels of apps whose models modules changed since the last poll
+        """
+        mtimes = self._mtimes()
+        changed = set(
+            label for path, (label, mtime) in mtimes.items()
+            if self.mtimes.get(path, (label, None))[1] != mtime
+        )
+        self.mtimes = mtimes
+        return changed
+
+    def _fingerprints(self, app_config):
+        return {model._meta.label: model_fingerprint(model) for model in app_config.get_models()}
+
+    def reload(self, app_label):
+        """
+        Re-import the models of an app, replacing its model classes in the app registry.
+        On import errors the previous models are restored and the error is raised.
+        :return: labels of the models added, removed or changed by the reload
+        """
+        app_config = self.apps.get_app_config(app_label)
+        before = self._fingerprints(app_config)
+        registered = self.apps.all_models[app_label]
+        previous = dict(registered)
+        # Unregister first so that django does not warn about models being reloaded
+        registered.clear()
+        try:
+            for module in self._modules(app_config):
+                importlib.reload(module)
+        except Exception:
+            registered.clear()
+            registered.update(previous)
+            raise
+        finally:
+            self.apps.clear_cache()
+            clear_relation_graph()
+        app_config.models_module = sys.modules[app_config.models_module.__name__]
+        self.mtimes = self._mtimes()
+        after = self._fingerprints(app_config)
+        return set(label for label in set(before) | set(after) if before.get(label) != after.get(label))
+
@@ -1,6 +1,17 @@
 import argparse
+import json
+import os
+import sys
+import time
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from djangorm.model_to_class import convert_models
+from djangorm.lib.cache import RenderCache
+from djangorm.lib.data import ENTITY_CACHE_MODES, OutputDir
+from djangorm.lib.profile import Profiler, process_uptime
+from djangorm.lib.registry import register_field
+from djangorm.model_to_class import (
+    add_hook, convert_models, export_snapshot, notify_hooks, remove_hook, watch_models
+)
 
 
 class Command(BaseCommand):
@@ -14,13 +25,254 @@ class Command(BaseCommand):
         )
         parser.add_argument(
             "--lang",
-            required=True,
-            help="java or go"
+            nargs="+",
+            choices=["go", "java", "proto"],
+            help="java, go or proto, or several of them to introspect the models once for all of them"
+        )
+        parser.add_argument(
+            "--snapshot",
+            help="write the introspected schema to this file instead of generating code, "
+                 "render it later without django using `python -m djangorm <snapshot> --lang=go`"
+        )
+        parser.add_argument(
+            "--with-related", action="store_true",
+            help="also convert the models of other apps that the selected models reference"
         )
         parser.add_argument("--orm", action="store_false", dest="orm", help="if you want orm tags (only go)")
+        parser.add_argument(
+            "--pack", action="store_true",
+            help="order struct fields by alignment to avoid padding, primary key first (only go)"
+        )
+        parser.add_argument(
+            "--scan", action="store_true",
+            help="also generate column constants and reflection free ScanRow/Values methods (only go)"
+        )
+        parser.add_argument(
+            "--preload", type=int, default=0, metavar="DEPTH",
+            help="generate the relations to load with each struct up to DEPTH relations away, and a gorm scope "
+                 "joining the to-one ones and preloading the collections (only go)"
+        )
         parser.add_argument("--valid", action="store_false", dest="valid", help="if you want valid tags (only go)")
+        parser.add_argument(
+            "--json", action="store_true", dest="json_methods",
+            help="also generate reflection free AppendJSON/MarshalJSON/UnmarshalJSON methods, keyed by django "
+                 "field name (only go)"
+        )
+        parser.add_argument(
+            "--validate", action="store_true", dest="validate_methods",
+            help="generate Validate() methods checking the choices, max lengths, min/max validators, emails and "
+                 "blank fields as django does, instead of validate tags (only go)"
+        )
+        parser.add_argument(
+            "--compact-types", action="store_true",
+            help="pick the smallest integer types allowed by the choices and min/max validators of the fields, "
+                 "and exact types for decimals"
+        )
+        parser.add_argument(
+            "--null-policy", choices=["value", "pointer", "sql"], default="value",
+            help="hold nullable columns as plain values (NULL reads as the zero value), pointers, or sql.Null* "
+                 "types (go; java makes them nullable, T?, unless value)"
+        )
+        parser.add_argument(
+            "--lazy", action="store_true", help="fetch to-one relations lazily, with FetchType.LAZY (only java)"
+        )
+        parser.add_argument(
+            "--batch-size", type=int,
+            help="load lazy collections and references in batches of this many, with @BatchSize (only java)"
+        )
+        parser.add_argument(
+            "--entity-graphs", type=int, default=0, metavar="DEPTH",
+            help="generate named entity graphs following relations up to DEPTH relations away (only java)"
+        )
+        parser.add_argument(
+            "--id-generation", choices=["identity", "sequence"], default="identity",
+            help="take auto field values from the identity column, or from its postgres sequence so that "
+                 "inserts can be batched (only java)"
+        )
+        parser.add_argument(
+            "--allocation-size", type=int, default=1,
+            help="ids taken per sequence call, the sequence must be incremented by as much (only java)"
+        )
+        parser.add_argument(
+            "--dynamic-update", type=int, metavar="COLUMNS",
+            help="generate @DynamicUpdate on entities of at least COLUMNS columns (only java)"
+        )
+        parser.add_argument(
+            "--entity-cache", metavar="FILE",
+            help="json file of the cache modes of the entities, by model label or app label, e.g. "
+                 "{\"geo.Country\": \"read-only\", \"catalog\": \"read-write\"}, added to the D2G_ENTITY_CACHE "
+                 "setting, they take precedence over Meta.d2g_cache for models and default it for apps (only java)"
+        )
+        parser.add_argument(
+            "--routes", action="store_true",
+            help="also generate the databases DATABASE_ROUTERS read and write the rows of each model from, "
+                 "ReadDB/WriteDB methods and a DBRoutes map by table (go), READ_DB/WRITE_DB constants (java)"
+        )
+        parser.add_argument(
+            "--proto-relations", choices=["ids", "messages"], default="ids",
+            help="represent forward relations by the ids they refer to, or also embed the related messages, "
+                 "and those of reverse relations (only proto)"
+        )
+        parser.add_argument(
+            "--proto-lock", default="d2g.proto.lock",
+            help="file keeping the field numbers of the messages across runs, to commit with the .proto files "
+                 "(only proto)"
+        )
+        parser.add_argument(
+            "--output", nargs="+",
+            help="file the generated code is written to (default: stdout), one per language of --lang"
+        )
+        parser.add_argument(
+            "--out-dir",
+            help="write one file per app (or per model, see --split) in this directory instead, "
+                 "files whose content did not change are not rewritten, in a subdirectory per language "
+                 "for several languages"
+        )
+        parser.add_argument("--split", choices=["app", "model"], default="app", help="one file per app or per model")
+        parser.add_argument(
+            "--package", default="models",
+            help="go/kotlin/proto package of the files written to --out-dir, and of streamed proto"
+        )
+        parser.add_argument("--jobs", type=int, default=1, help="number of worker processes used for rendering")
+        parser.add_argument(
+            "--watch", action="store_true",
+            help="keep running, and regenerate the models whose source changed (and the models related to them)"
+        )
+        parser.add_argument("--watch-interval", type=float, default=1.0, help="seconds between checks for changes")
+        parser.add_argument("--cache-dir", help="directory to cache rendered models, unchanged models are not re-rendered")
+        parser.add_argument("--cache-size", type=int, help="max size of the cache directory in MB")
+        parser.add_argument("--invalidate-cache", action="store_true", help="drop the cache before generating")
+        parser.add_argument(
+            "--profile", nargs="?", const="table", choices=["table", "json"],
+            help="print the time spent in each phase, the slowest models and the peak memory to stderr"
+        )
+        parser.add_argument("--profile-top", type=int, default=10, help="number of slowest models to report")
 
     def handle(self, *args, **options):
+        profiler = None
+        if options["profile"]:
+            if options["watch"]:
+                raise CommandError("--profile can't be used with --watch")
+            profiler = Profiler()
+            add_hook(profiler)
+            # django and the apps are loaded before the command runs, timed from the start of the process
+            uptime = process_uptime()
+            if uptime is None:
+                notify_hooks("app_loading_cpu", time.process_time())
+            else:
+                notify_hooks("app_loading", uptime)
+        try:
+            self.generate(options)
+        finally:
+            if profiler:
+                remove_hook(profiler)
+                report = profiler.format_json if options["profile"] == "json" else profiler.format_table
+                sys.stderr.write(report(options["profile_top"]))
+
+    def generate(self, options):
         apps = options["apps"]
         lang = options["lang"]
-        convert_models(apps=apps, lang=lang, for_orm=options["orm"], for_validation=options["valid"])
+        # e.g. D2G_FIELDS = {"CITextField": {"like": "TextField"}}
+        for name, conversion in getattr(settings, "D2G_FIELDS", {}).items():
+            register_field(name, **conversion)
+        if options["snapshot"]:
+            with open(options["snapshot"], "w", encoding="utf-8") as fh:
+                export_snapshot(apps, fh, with_related=options["with_related"], routes=options["routes"])
+            return
+        if not lang:
+            raise CommandError("--lang is required unless --snapshot is given")
+        cache = None
+        if options["cache_dir"]:
+            max_size = options["cache_size"] * 1024 * 1024 if options["cache_size"] else None
+            cache = RenderCache(options["cache_dir"], max_size=max_size)
+            if options["invalidate_cache"]:
+                cache.invalidate()
+        outputs = options["output"] or []
+        if len(outputs) not in (0, len(lang)):
+            raise CommandError("--output takes one file per language of --lang")
+        out_dir = None
+        if options["out_dir"]:
+            if options["watch"] or outputs:
+                raise CommandError("--out-dir can't be used with --watch or --output")
+            out_dir = OutputDir(options["out_dir"], options["split"], options["package"])
+        go_options = {
+            "pack": options["pack"], "scan": options["scan"], "preload_depth": options["preload"],
+            "compact_types": options["compact_types"], "null_policy": options["null_policy"],
+            "json_methods": options["json_methods"], "validate_methods": options["validate_methods"],
+            "routes": options["routes"],
+        }
+        java_options = {
+            "lazy": options["lazy"], "batch_size": options["batch_size"], "entity_graph_depth": options["entity_graphs"],
+            "id_generation": options["id_generation"], "allocation_size": options["allocation_size"],
+            "dynamic_update": options["dynamic_update"], "compact_types": options["compact_types"],
+            "entity_cache": self.entity_cache(options["entity_cache"]), "routes": options["routes"],
+            "null_policy": options["null_policy"],
+        }
+        proto_options = {
+            "relations": options["proto_relations"], "lock": options["proto_lock"], "package": options["package"]
+        }
+        if len(lang) > 1:
+            self.generate_targets(options, lang, cache, outputs, out_dir, go_options, java_options, proto_options)
+            return
+        lang = lang[0]
+        if options["watch"]:
+            try:
+                watch_models(
+                    apps=apps, lang=lang, for_orm=options["orm"], for_validation=options["valid"],
+                    cache=cache, output=outputs[0] if outputs else None, interval=options["watch_interval"],
+                    with_related=options["with_related"], go_options=go_options, java_options=java_options,
+                    proto_options=proto_options
+                )
+            except KeyboardInterrupt:
+                pass
+            return
+
+        out = open(outputs[0], "w", encoding="utf-8") if outputs else None
+        try:
+            written = convert_models(
+                apps=apps, lang=lang, for_orm=options["orm"], for_validation=options["valid"],
+                cache=cache, jobs=options["jobs"], out=out,
+                with_related=options["with_related"], out_dir=out_dir, go_options=go_options,
+                java_options=java_options, proto_options=proto_options
+            )
+        finally:
+            if out:
+                out.close()
+        if written:
+            self.stderr.write("Wrote %d file(s) to %s, %d unchanged" % (written[0], out_dir.path, written[1]))
+
+    def entity_cache(self, path):
+        # e.g. D2G_ENTITY_CACHE = {"geo.Country": "read-only", "catalog": "read-write"}
+        entity_cache = dict(getattr(settings, "D2G_ENTITY_CACHE", {}))
+        if path:
+            with open(path, "r", encoding="utf-8") as fh:
+                entity_cache.update(json.load(fh))
+        for label, mode in entity_cache.items():
+            if mode not in ENTITY_CACHE_MODES:
+                raise CommandError("Unknown cache mode %r of %s, expected one of %s" % (
+                    mode, label, ", ".join(ENTITY_CACHE_MODES)
+                ))
+        return entity_cache or None
+
+    def generate_targets(self, options, langs, cache, outputs, out_dir, go_options, java_options, proto_options):
+        # Several languages from a single introspection, each one written to its own file or directory
+        if options["watch"]:
+            raise CommandError("--watch takes a single language")
+        if not outputs and not out_dir:
+            raise CommandError("several languages need --output (one file per language) or --out-dir")
+        out_dirs = None
+        if out_dir:
+            out_dirs = {lang: out_dir._replace(path=os.path.join(out_dir.path, lang)) for lang in langs}
+        outs = {lang: open(path, "w", encoding="utf-8") for lang, path in zip(langs, outputs)}
+        try:
+            written = convert_models(
+                apps=options["apps"], lang=langs, for_orm=options["orm"], for_validation=options["valid"],
+                cache=cache, jobs=options["jobs"], out=outs,
+                with_related=options["with_related"], out_dir=out_dirs, go_options=go_options,
+                java_options=java_options, proto_options=proto_options
+            )
+        finally:
+            for out in outs.values():
+                out.close()
+        for lang, (count, unchanged) in written.items():
+            self.stderr.write("Wrote %d file(s) to %s, %d unchanged" % (count, out_dirs[lang].path, unchanged))
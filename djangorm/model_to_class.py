@@ -1,131 +1,641 @@
-from .lib.data import (
-    BasicField, M2MField, M2OField,
-    O2OField, O2MField, D2GField
+import io
+import os
+import sys
+import tempfile
+import time
+import traceback
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, NamedTuple
+
+from .lib.data import META_CACHE_OPTION, ModelIR, OutputDir
+from .lib.cleaner import get_field_ir, get_model_indexes, get_model_routes, iter_models
+from .lib.graph import path_labels, relation_graph, relation_paths
+from .lib.protolock import ProtoLock
+from .lib.render import (
+    GO_JSON_RUNTIME, GO_ROUTES_MARKER, GO_ROUTES_RUNTIME, proto_file_imports, render_go,
+    render_go_file, render_java, render_java_file, render_proto, render_proto_file
 )
-from .lib.cleaner import (
-    get_java_field_name, get_field_validation, get_field_generator,
-    get_field_type, get_models,
-    is_field_reversed
+from .lib.validation import GO_VALIDATE_MARKER, GO_VALIDATE_RUNTIME
+from .lib.watch import ModelWatcher
+from .lib.snapshot import (
+    dump_model, load_model, write_snapshot
 )
-from .lib.render import render_go, render_java
 
+_hooks = []
 
-def get_struct_structure(app_name, model):
-    return {
-        "class_name": model.__name__,
-        "model": model,
-        "fields": [
-            (D2GField[f.__class__.__name__], f)
-            for f in model._meta.get_fields()
-        ]
-    }
+
+def add_hook(hook):
+    """
+    Register a callable invoked as hook(phase, seconds, label) every time a phase of a conversion
+    completes (see lib/profile.PHASES), label is the model label for per model phases, None otherwise.
+    e.g. add_hook(lib.profile.Profiler())
+    """
+    _hooks.append(hook)
 
 
-def get_class_structure(app_name, model):
-    class_name = model.__name__
-    _all_fields = model._meta.get_fields()
-
-    basic_fields = [f for f in _all_fields if not f.is_relation]
-    _m2m_fields = [f for f in _all_fields if f.many_to_many]
-    _o2m_fields = [f for f in _all_fields if f.one_to_many]
-    _m2o_fields = [f for f in _all_fields if f.many_to_one]
-    _o2o_fields = [f for f in _all_fields if f.one_to_one]
-
-    primitive_fields = []
-    for b in basic_fields:
-        primitive_fields.append(BasicField(
-            get_java_field_name(b.name),
-            b.null,
-            b.__class__.__name__,
-            get_field_type(b),
-            get_field_validation(b),
-            get_field_generator(b)
-        ))
-
-    o2o_fields = []
-    for _field in _o2o_fields:
-        if is_field_reversed(_field):
-            o2o_fields.append(
-                O2OField(
-                    _field.name, _field.related_model, _field.null, None, True, _field.field.name
-                )
-            )
-        else:
-            o2o_fields.append(O2OField(_field.name, _field.related_model, _field.null, _field.attname, False))
-
-    m2o_fields = []
-    for _field in _m2o_fields:
-        if getattr(_field, "attname", None):     # Generic Foreign Key fails this test
-            m2o_fields.append(M2OField(_field.name, _field.related_model, _field.attname))
-
-    o2m_fields = []
-    for _field in _o2m_fields:
-        o2m_fields.append(O2MField(_field.get_accessor_name(), _field.related_model, _field.name))
-
-    m2m_fields = []
-    for _field in _m2m_fields:
-        if is_field_reversed(_field):
-            m2m_fields.append(M2MField(
-                name=_field.get_accessor_name(),
-                model=_field.related_model,
-                reverse=True,
-                reverse_field=_field.field.name))
-        else:
-            m2m_fields.append(M2MField(
-                name=_field.name,
-                model=_field.related_model,
-                db_table=_field.m2m_db_table(),
-                column_id=_field.m2m_column_name(),
-                reverse_column_id=_field.m2m_reverse_name(),
-            ))
-
-    # print("\n\n------------------", class_name, "---------------")
-    # print("O2O\n", o2o_fields, "\n")
-    # print("M2O\n", m2o_fields, "\n")
-    # print("O2M\n", o2m_fields, "\n")
-    # print("M2M\n", m2m_fields, "\n")
-
-    return {
-        'app_name': app_name,
-        'class_name': class_name,
-        'primitive_fields': primitive_fields,
-        'm2m_fields': m2m_fields,
-        'm2o_fields': m2o_fields,
-        'o2m_fields': o2m_fields,
-        'o2o_fields': o2o_fields
-    }
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def notify_hooks(phase, seconds, label=None):
+    for hook in _hooks:
+        hook(phase, seconds, label)
+
+
+@contextmanager
+def _timed(phase, label=None):
+    if not _hooks:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        notify_hooks(phase, time.perf_counter() - start, label)
+
+
+def _label(app, model):
+    # django models, or snapshot entries
+    return model._meta.label if hasattr(model, "_meta") else "%s.%s" % (app, model["class_name"])
+
+
+def _render_timed(render, *args):
+    # Timed where the rendering happens, which may be a worker process
+    start = time.perf_counter()
+    code = render(*args)
+    return code, time.perf_counter() - start
+
+
+# Render options following relations further than the model's own fields
+RELATION_DEPTH_OPTIONS = ("entity_graph_depth", "preload_depth")
+
+
+def _relation_depth(options):
+    return max(options.get(name) or 0 for name in RELATION_DEPTH_OPTIONS)
+
+
+def get_model_structure(app_name, model, graph=None, relation_depth=0, routes=False) -> ModelIR:
+    """
+    Introspect a model into the structure both render_go and render_java consume.
+    :param relation_depth: Also follow relations this many relations away, into relation_paths
+    :param routes: Also run the DATABASE_ROUTERS for the databases of the model, see --routes
+    """
+    graph = graph or relation_graph()
+    read_db, write_db = get_model_routes(model) if routes else (None, None)
+    return ModelIR(
+        app_name=app_name,
+        class_name=model.__name__,
+        table=model._meta.db_table,
+        fields=tuple(get_field_ir(f, relation) for f, relation in graph.fields[model._meta.label]),
+        indexes=get_model_indexes(model),
+        relation_paths=graph.relation_paths(model._meta.label, relation_depth) if relation_depth else (),
+        cache=getattr(model._meta, META_CACHE_OPTION, None),
+        read_db=read_db,
+        write_db=write_db,
+    )
+
+
+def _related_models(graph, relation_depth):
+    """
+    :return: function giving the other models whose changes alter the output of a model, when
+             relations are followed further than the model's own relations, None otherwise
+    """
+    if relation_depth <= 1:
+        return None
+
+    def related_models(app, model):
+        labels = path_labels(graph.relation_paths(model._meta.label, relation_depth)) - {model._meta.label}
+        return [graph.models[label] for label in sorted(labels) if label in graph.models]
+    return related_models
 
 
-def convert_models(apps, lang, for_orm=True, for_validation=True):
+def _load_snapshot_model(relations, relation_depth, app_name, entry):
+    model = load_model(app_name, entry)
+    label = "%s.%s" % (app_name, entry["class_name"])
+    return model._replace(relation_paths=relation_paths(relations, label, relation_depth))
+
+
+def select_models(apps, with_related=False):
+    """
+    :param with_related: Also select every model the apps' models reference, transitively,
+                         and leave out reverse relations from models that are not selected
+    :return: (iterable of (app_label, model), RelationGraph to introspect them with)
+    """
+    with _timed("get_models"):
+        graph = relation_graph()
+        if not with_related:
+            return list(iter_models(apps)), graph
+        labels = graph.closure(model._meta.label for _, model in iter_models(apps))
+        models = [(graph.models[label]._meta.app_label, graph.models[label]) for label in labels]
+        return models, graph.restrict(labels)
+
+
+def convert_models(apps, lang, for_orm=True, for_validation=True, cache=None, jobs=1, out=None,
+                   with_related=False, out_dir=None, go_options=None, java_options=None, proto_options=None):
+    """
+    :param lang: Target language, or list of target languages converted in a single pass
+                 (see convert_models_to_targets), out and out_dir are then keyed by language
+    :param go_options: Extra keyword arguments of render_go
+    :param java_options: Extra keyword arguments of render_java
+    :param proto_options: Extra keyword arguments of render_proto, the "lock" file of the field numbers and
+                          the "package" of proto streamed to out
+    :return: (files written, files unchanged) when out_dir is given,
+             keyed by language for several languages
+    """
+    written = None
+    if not isinstance(lang, str):
+        written = convert_models_to_targets(
+            apps, lang, for_orm, for_validation, cache=cache, jobs=jobs, outs=out, with_related=with_related,
+            out_dirs=out_dir, go_options=go_options, java_options=java_options, proto_options=proto_options
+        )
+    elif lang == "proto":
+        written = convert_models_to_targets(
+            apps, [lang], cache=cache, jobs=jobs, outs={lang: out or sys.stdout}, with_related=with_related,
+            out_dirs={lang: out_dir} if out_dir else None, proto_options=proto_options
+        ).get(lang)
+    elif lang == "go":
+        written = convert_models_to_gorm(
+            apps, for_orm, for_validation, cache=cache, jobs=jobs, out=out or sys.stdout,
+            with_related=with_related, out_dir=out_dir, go_options=go_options
+        )
+    elif lang == "java":
+        written = convert_models_to_java(
+            apps, cache=cache, jobs=jobs, out=out or sys.stdout, with_related=with_related, out_dir=out_dir,
+            java_options=java_options
+        )
+    if cache:
+        cache.evict()
+    return written
+
+
+# Renderer of each target language
+RENDERERS = {"go": render_go, "java": render_java, "proto": render_proto}
+
+
+def _render_options(lang, for_orm, for_validation, go_options, java_options, proto_options=None):
     if lang == "go":
-        convert_models_to_gorm(apps, for_orm, for_validation)
-    if lang == "java":
-        convert_models_to_java(apps)
+        return dict(go_options or {}, for_orm=for_orm, for_validation=for_validation)
+    if lang == "proto":
+        return dict(proto_options or {})
+    return dict(java_options or {})
+
+
+class Target(NamedTuple):
+    lang: str
+    render: Callable
+    options: dict               # part of the cache key
+    numbering: ProtoLock = None     # numbers the fields of each model, passed to render
+
+
+def _target(lang, options, with_related=None):
+    """
+    Target rendering models in a language with the given options, options that are not render
+    arguments (the lock file of proto field numbers, the package of streamed proto) are taken out.
+    """
+    options = dict(options)
+    numbering = None
+    if lang == "proto":
+        options.pop("package", None)
+        numbering = ProtoLock(options.pop("lock", None), options.get("relations", "ids"))
+    key_options = options if with_related is None else dict(options, with_related=with_related)
+    return Target(lang, partial(RENDERERS[lang], **options), key_options, numbering)
+
+
+def _save_numbering(targets):
+    for target in targets:
+        if target.numbering and target.numbering.path and target.numbering.changed:
+            _write_file(target.numbering.path, target.numbering.dumps())
+            target.numbering.changed = False
+
+
+def _resolve(entry, cache):
+    key, label, code, fresh = entry
+    if isinstance(code, Future):
+        code = code.result()
+    if isinstance(code, tuple):     # rendered by _render_timed
+        code, seconds = code
+        notify_hooks("rendering", seconds, label)
+    if fresh and cache:
+        cache.set(key, code)
+    return code
+
+
+def iter_rendered_targets(models, introspect, targets, cache=None, jobs=1, related_models=None):
+    """
+    Lazily render models for several targets, yielding the codes of each model, one per target,
+    in order as soon as they are ready. Each model is introspected once, only if one of its
+    targets is not served from the cache, and rendered for every target in-process or across
+    `jobs` worker processes with a bounded number of models in flight, so memory stays flat
+    regardless of how many models are selected.
+    :param targets: Target, or (lang, render, options), of each target. Field numbers of targets
+                    with a numbering are assigned here, in order, and rendering is given them
+    :param related_models: Optional function (app, model) -> other models the cached code of a
+                           model depends on
+    """
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    max_in_flight = jobs * 4
+    window = deque()
+    targets = [Target(*target) for target in targets]
+    if _hooks:
+        targets = [target._replace(render=partial(_render_timed, target.render)) for target in targets]
+    try:
+        for app, model in models:
+            label = _label(app, model)
+            related = related_models(app, model) if cache and related_models else ()
+            structure = None
+            entries = []
+            for lang, render, options, numbering in targets:
+                key = code = None
+                numbers = numbering.entry(label) if numbering else None
+                # models missing from the lock are rendered, to be numbered
+                if cache and (numbering is None or numbers is not None):
+                    with _timed("cache", label):
+                        key = cache.key(model, lang, options, related, numbers)
+                        code = cache.get(key)
+                fresh = code is None
+                if fresh:
+                    if structure is None:
+                        with _timed("introspection", label):
+                            structure = introspect(app, model)
+                    args = (structure,)
+                    if numbering:
+                        args += (numbering.number(label, structure),)
+                        key = cache.key(model, lang, options, related, numbering.entry(label)) if cache else None
+                    # Structures hold only plain values, so they can be shipped to worker processes
+                    code = executor.submit(render, *args) if executor else render(*args)
+                entries.append((key, label if _hooks else None, code, fresh))
+            window.append(entries)
+            while window and (
+                not any(isinstance(entry[2], Future) for entry in window[0]) or len(window) > max_in_flight
+            ):
+                yield tuple(_resolve(entry, cache) for entry in window.popleft())
+        while window:
+            yield tuple(_resolve(entry, cache) for entry in window.popleft())
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def iter_rendered(models, introspect, render, lang, options, cache=None, jobs=1, related_models=None):
+    """
+    iter_rendered_targets for a single target, yielding the code of each model.
+    """
+    for codes in iter_rendered_targets(models, introspect, [(lang, render, options)], cache, jobs, related_models):
+        yield codes[0]
+
+
+# Written once at the start, after the code of each model, and once at the end, when streaming the code of a target
+STREAM_SEPARATORS = {"go": ("", "", "\n"), "java": ("", "\n", "")}
+
+
+def _stream_package(proto_options):
+    return (proto_options or {}).get("package") or OutputDir._field_defaults["package"]
+
+
+def _write_code(lang, code, out):
+    with _timed("output"):
+        out.write(code + STREAM_SEPARATORS[lang][1])
+        out.flush()
+
+
+# Go code shared by the generated methods, written once per output when generated code contains
+# its marker: (marker, code, file it is written to in an out dir)
+GO_RUNTIMES = (
+    ("d2gJSONWriter{", GO_JSON_RUNTIME, "d2g_json.go"),
+    (GO_VALIDATE_MARKER, GO_VALIDATE_RUNTIME, "d2g_validate.go"),
+    (GO_ROUTES_MARKER, GO_ROUTES_RUNTIME, "d2g_routes.go"),
+)
+
+
+def _runtimes(lang, code):
+    return set(runtime for runtime in GO_RUNTIMES if runtime[0] in code) if lang == "go" else set()
+
+
+def _write_runtimes(runtimes, out):
+    for runtime in GO_RUNTIMES:
+        if runtime in runtimes:
+            out.write(runtime[1])
+
 
+def _write_proto_stream(codes, out, package):
+    # a proto file can only import the well-known types its messages use once they are all rendered
+    codes = list(codes)
+    with _timed("output"):
+        out.write(render_proto_file(package, codes))
+        out.flush()
 
-def convert_models_to_java(apps):
+
+def _write_stream(lang, codes, out, package=None):
+    """
+    :param package: package of a proto stream
+    """
+    if lang == "proto":
+        return _write_proto_stream(codes, out, package or _stream_package(None))
+    out.write(STREAM_SEPARATORS[lang][0])
+    runtimes = set()
+    for code in codes:
+        _write_code(lang, code, out)
+        runtimes |= _runtimes(lang, code)
+    _write_runtimes(runtimes, out)
+    out.write(STREAM_SEPARATORS[lang][2])
+
+
+_write_java = partial(_write_stream, "java")
+_write_go = partial(_write_stream, "go")
+
+
+def convert_models_to_java(apps, cache=None, jobs=1, out=None, with_related=False, out_dir=None,
+                           java_options=None):
     """
     Function to convert Django models into kotlin classes.
     :param apps: Apps for which the models are to be converted to kotlin classes
-    :return: None (print out the kotlin classes)
+    :param cache: Optional RenderCache, unchanged models reuse their cached output
+    :param jobs: Number of worker processes used for rendering
+    :param out: File like object the classes are written to, as each one is rendered
+    :param with_related: Also convert every model the apps' models reference
+    :param out_dir: Optional OutputDir, the classes are then written to one file per app or model
+    :param java_options: Extra keyword arguments of render_java
+    :return: (files written, files unchanged) when out_dir is given, None when the classes are written to out
     """
-    models = get_models(apps)
-    for app, model in models:
-        class_structure = get_class_structure(app, model)
-        print(render_java(class_structure))
+    options = dict(java_options or {})
+    render = partial(render_java, **options)
+    models, graph = select_models(apps, with_related)
+    depth = _relation_depth(options)
+    introspect = partial(get_model_structure, graph=graph, relation_depth=depth, routes=options.get("routes", False))
+    codes = iter_rendered(
+        models, introspect, render, "java", dict(options, with_related=with_related), cache, jobs,
+        _related_models(graph, depth)
+    )
+    if out_dir:
+        return write_files(models, codes, "java", out_dir)
+    _write_java(codes, out or sys.stdout)
 
 
-def convert_models_to_gorm(apps, for_orm=True, for_validation=True):
+def convert_models_to_gorm(apps, for_orm=True, for_validation=True, cache=None, jobs=1, out=None,
+                           with_related=False, out_dir=None, go_options=None):
     """
     Function to convert Django models into kotlin classes.
     :param apps: Apps for which the models are to be converted to kotlin classes
-    :return: None (print out the gorm struct)
-    """
-    code = ""
-    models = get_models(apps)
-    for app, model in models:
-        struct = get_struct_structure(app, model)
-        # import pprint
-        # pprint.pprint(struct)
-        code += render_go(struct, for_orm, for_validation)
-    print(code)
+    :param cache: Optional RenderCache, unchanged models reuse their cached output
+    :param jobs: Number of worker processes used for rendering
+    :param out: File like object the structs are written to, as each one is rendered
+    :param with_related: Also convert every model the apps' models reference
+    :param out_dir: Optional OutputDir, the structs are then written to one file per app or model
+    :param go_options: Extra keyword arguments of render_go
+    :return: (files written, files unchanged) when out_dir is given, None when the structs are written to out
+    """
+    options = dict(go_options or {}, for_orm=for_orm, for_validation=for_validation)
+    render = partial(render_go, **options)
+    models, graph = select_models(apps, with_related)
+    depth = _relation_depth(options)
+    introspect = partial(get_model_structure, graph=graph, relation_depth=depth, routes=options.get("routes", False))
+    codes = iter_rendered(
+        models, introspect, render, "go", dict(options, with_related=with_related), cache, jobs,
+        _related_models(graph, depth)
+    )
+    if out_dir:
+        return write_files(models, codes, "go", out_dir)
+    _write_go(codes, out or sys.stdout)
+
+
+def convert_models_to_targets(apps, langs, for_orm=True, for_validation=True, cache=None, jobs=1, outs=None,
+                              with_related=False, out_dirs=None, go_options=None, java_options=None,
+                              proto_options=None):
+    """
+    Function to convert Django models into several languages in a single pass, each model is
+    introspected once and its structure rendered for every language.
+    :param langs: Target languages, e.g. ["go", "java"]
+    :param outs: Language -> file like object the code of that language is written to, as each
+                 model is rendered (default: stdout)
+    :param out_dirs: Language -> OutputDir the code of that language is written to instead
+    :return: Language -> (files written, files unchanged), for the languages written to an OutputDir
+    """
+    outs, out_dirs = outs or {}, out_dirs or {}
+    langs = list(OrderedDict.fromkeys(langs))
+    targets = [
+        _target(lang, _render_options(lang, for_orm, for_validation, go_options, java_options, proto_options),
+                with_related)
+        for lang in langs
+    ]
+    models, graph = select_models(apps, with_related)
+    depth = max(_relation_depth(target.options) for target in targets)
+    routes = any(target.options.get("routes") for target in targets)
+    introspect = partial(get_model_structure, graph=graph, relation_depth=depth, routes=routes)
+
+    # code written to out dirs, and proto, is kept until every model is rendered, as by write_files
+    files = {lang: [] for lang in langs if lang in out_dirs or lang == "proto"}
+    runtimes = {lang: set() for lang in langs}
+    for lang in langs:
+        if lang not in files:
+            outs.get(lang, sys.stdout).write(STREAM_SEPARATORS[lang][0])
+    for codes in iter_rendered_targets(models, introspect, targets, cache, jobs, _related_models(graph, depth)):
+        for lang, code in zip(langs, codes):
+            if lang in files:
+                files[lang].append(code)
+            else:
+                _write_code(lang, code, outs.get(lang, sys.stdout))
+                runtimes[lang] |= _runtimes(lang, code)
+    for lang in langs:
+        if lang not in files:
+            _write_runtimes(runtimes[lang], outs.get(lang, sys.stdout))
+            outs.get(lang, sys.stdout).write(STREAM_SEPARATORS[lang][2])
+    written = {
+        lang: write_files(models, codes, lang, out_dirs[lang]) for lang, codes in files.items() if lang in out_dirs
+    }
+    if "proto" in files and "proto" not in out_dirs:
+        _write_proto_stream(files["proto"], outs.get("proto", sys.stdout), _stream_package(proto_options))
+    _save_numbering(targets)
+    return written
+
+
+def export_snapshot(apps, out, with_related=False, routes=False):
+    """
+    Function to write the introspected schema of Django models into a snapshot,
+    which can later be rendered without Django (see convert_snapshot).
+    :param apps: Apps whose models are exported
+    :param out: Text file object the snapshot is written to
+    :param with_related: Also export every model the apps' models reference
+    :param routes: Also export the databases DATABASE_ROUTERS route each model to
+    """
+    models, graph = select_models(apps, with_related)
+    write_snapshot(
+        (dump_model(get_model_structure(app, model, graph, routes=routes)) for app, model in models), out
+    )
+
+
+def convert_snapshot(snapshot, lang, apps=None, for_orm=True, for_validation=True, jobs=1, out=None,
+                     out_dir=None, go_options=None, java_options=None, proto_options=None):
+    """
+    Function to convert a schema snapshot into go structs or kotlin classes, without Django.
+    :param snapshot: Snapshot as loaded by read_snapshot, or built by extract_snapshot
+    :param apps: Optional apps to restrict the conversion to, all models otherwise
+    :param out_dir: Optional OutputDir, the code is then written to one file per app or model
+    :return: (files written, files unchanged) when out_dir is given, None when the code is written to out
+    """
+    out = out or sys.stdout
+    models = [
+        (m["app_name"], m) for m in snapshot["models"]
+        if not apps or m["app_name"] in apps
+    ]
+    target = _target(lang, _render_options(lang, for_orm, for_validation, go_options, java_options, proto_options))
+    introspect = load_model
+    depth = _relation_depth(target.options)
+    if depth:
+        # relations are followed into every model of the snapshot, not only the converted ones
+        relations = {}
+        for entry in snapshot["models"]:
+            fields = load_model(entry["app_name"], entry).fields
+            relations["%s.%s" % (entry["app_name"], entry["class_name"])] = [f for f in fields if f.cardinality]
+        introspect = partial(_load_snapshot_model, relations, depth)
+    codes = (codes[0] for codes in iter_rendered_targets(models, introspect, [target], jobs=jobs))
+    written = None
+    if out_dir:
+        written = write_files(models, codes, lang, out_dir)
+    else:
+        _write_stream(lang, codes, out, _stream_package(proto_options))
+    _save_numbering([target])
+    return written
+
+
+FILE_EXTENSIONS = {"go": ".go", "java": ".kt", "proto": ".proto"}
+FILE_RENDERERS = {"go": render_go_file, "java": render_java_file, "proto": render_proto_file}
+
+
+def _file_name(app, model, lang, split):
+    if split == "model":
+        # django models, or snapshot entries
+        model_name = model._meta.model_name if hasattr(model, "_meta") else model["class_name"].lower()
+        return "%s_%s%s" % (app, model_name, FILE_EXTENSIONS[lang])
+    return app + FILE_EXTENSIONS[lang]
+
+
+def write_files(models, codes, lang, out_dir):
+    """
+    Write rendered models to one source file per app, or per model, each importing only what its
+    models use. Files whose content did not change are left untouched, so that incremental go /
+    gradle builds only recompile what actually changed.
+    :param models: (app_label, model) pairs, in the order of codes
+    :param out_dir: OutputDir
+    :return: (files written, files unchanged)
+    """
+    files = OrderedDict()
+    runtimes = set()
+    for (app, model), code in zip(models, codes):
+        files.setdefault(_file_name(app, model, lang, out_dir.split), []).append(code)
+        runtimes |= _runtimes(lang, code)
+    for marker, runtime, name in GO_RUNTIMES:
+        # shared by the files of the package
+        if (marker, runtime, name) in runtimes:
+            files[name] = [runtime]
+
+    render_file = FILE_RENDERERS[lang]
+    # proto messages referring to messages of other files import them
+    imports = proto_file_imports(files) if lang == "proto" else {}
+    os.makedirs(out_dir.path, exist_ok=True)
+    written = unchanged = 0
+    for name, file_codes in files.items():
+        with _timed("output"):
+            if name in imports:
+                content = render_file(out_dir.package, file_codes, imports[name])
+            else:
+                content = render_file(out_dir.package, file_codes)
+            if _write_file(os.path.join(out_dir.path, name), content):
+                written += 1
+            else:
+                unchanged += 1
+    return written, unchanged
+
+
+def _write_file(path, content):
+    """
+    Atomically replace path with content, leaving it untouched when the content is unchanged.
+    :return: True if the file was written
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            if fh.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(content)
+    # mkstemp creates files readable by their owner only
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp, 0o666 & ~umask)
+    os.replace(tmp, path)
+    return True
+
+
+def watch_models(apps, lang, for_orm=True, for_validation=True, cache=None, output=None, interval=1.0,
+                 with_related=False, go_options=None, java_options=None, proto_options=None):
+    """
+    Function to keep converting Django models as their source changes, without restarting Django.
+    Changed apps are reloaded and only the models that changed and the models related to them are
+    re-rendered.
+    :param output: File rewritten with all the models on every change, when None only the
+                   models whose code changed are printed out
+    :param interval: Seconds between two checks of the models modules
+    """
+    target = _target(
+        lang, _render_options(lang, for_orm, for_validation, go_options, java_options, proto_options), with_related
+    )
+    write = partial(_write_stream, lang, package=_stream_package(proto_options))
+    depth = _relation_depth(target.options)
+    introspect = partial(get_model_structure, relation_depth=depth, routes=target.options.get("routes", False))
+
+    watcher = ModelWatcher(apps)
+    codes = {}
+    affected = None     # labels of the models to re-render, None for all of them
+    while True:
+        previous, codes, rendered = codes, {}, []
+        try:
+            models, graph = select_models(apps, with_related)
+            for app, model in models:
+                label = model._meta.label
+                if affected is None or label in affected or label not in previous:
+                    codes[label], = next(iter_rendered_targets(
+                        [(app, model)], partial(introspect, graph=graph), [target],
+                        cache, related_models=_related_models(graph, depth)
+                    ))
+                    if codes[label] != previous.get(label):
+                        rendered.append(codes[label])
+                else:
+                    codes[label] = previous[label]
+        except Exception:
+            # Keep the last good output, everything is re-rendered after the next change
+            sys.stderr.write("Could not convert models:\n%s" % traceback.format_exc())
+            codes, affected = previous, None
+        else:
+            affected = set()
+            if output:
+                out = io.StringIO()
+                write(codes.values(), out)
+                if _write_file(output, out.getvalue()):
+                    sys.stderr.write("Wrote %d model(s) to %s\n" % (len(rendered), output))
+            elif rendered:
+                write(rendered, sys.stdout)
+            _save_numbering([target])
+            if cache:
+                cache.evict()
+
+        changed = watcher.poll()
+        while not changed:
+            time.sleep(interval)
+            changed = watcher.poll()
+
+        reloaded = set()
+        for app_label in sorted(changed):
+            try:
+                reloaded |= watcher.reload(app_label)
+            except Exception:
+                sys.stderr.write("Could not reload %s:\n%s" % (app_label, traceback.format_exc()))
+        if affected is not None:
+            # a model's code depends on the models up to `depth` relations away, from before the
+            # reload too, for relations that were just removed
+            hops = max(depth, 1)
+            affected = graph.neighbours(reloaded, hops) | relation_graph().neighbours(reloaded, hops)
@@ -11,7 +11,7 @@ setuptools.setup(
     description='Django model to Gorm struct conversion tool',
     long_description=long_description,
     long_description_content_type="text/markdown",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["tests", "tests.*"]),
     url='https://github.com/ranedk/djangorm',
     project_urls = {
         "Bug Tracker": "https://github.com/ranedk/djangorm/issues"
@@ -0,0 +1,25 @@
+import os
+import tempfile
+import textwrap
+from djangorm.lib.extractor import extract_snapshot
+from djangorm.lib.snapshot import load_model
+
+
+def extract_models(source, app_name="shop"):
+    """
+    Parse a models.py source with the static extractor, no django needed.
+    :return: class name -> ModelIR
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(os.path.join(directory, app_name))
+        path = os.path.join(directory, app_name, "models.py")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(textwrap.dedent(source))
+        snapshot, problems = extract_snapshot([path])
+    if problems:
+        raise AssertionError("could not parse models: %s" % "; ".join(problems))
+    return {entry["class_name"]: load_model(entry["app_name"], entry) for entry in snapshot["models"]}
+
+
+def model_field(model, name):
+    return next(f for f in model.fields if f.name == name)
@@ -0,0 +1,59 @@
+import json
+import tempfile
+import unittest
+
+try:
+    import django
+except ImportError:     # the other tests run without django
+    django = None
+
+
+def setUpModule():
+    if django is None:
+        raise unittest.SkipTest("django is not installed")
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(
+            INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth"],
+            DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+            DEFAULT_AUTO_FIELD="django.db.models.BigAutoField",
+        )
+    django.setup()
+
+
+class ModelFingerprintTest(unittest.TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import Group, User
+        self.User, self.Group = User, Group
+
+    def test_fingerprint_on_the_installed_django(self):
+        from djangorm.lib.cache import model_fingerprint
+        fingerprint = model_fingerprint(self.User)
+        self.assertEqual(fingerprint["label"], "auth.User")
+        # json serializable and the same on every call, without memory addresses
+        self.assertEqual(
+            json.dumps(fingerprint, sort_keys=True), json.dumps(model_fingerprint(self.User), sort_keys=True)
+        )
+        self.assertNotIn(" at 0x", json.dumps(fingerprint))
+
+    def test_routes_only_with_the_routes_option(self):
+        from djangorm.lib.cache import model_fingerprint
+        self.assertIsNone(model_fingerprint(self.User)["routes"])
+        self.assertEqual(model_fingerprint(self.User, routes=True)["routes"], ("default", "default"))
+
+    def test_key(self):
+        from djangorm.lib.cache import RenderCache
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RenderCache(directory)
+            key = cache.key(self.User, "go", {"pack": False})
+            self.assertEqual(key, cache.key(self.User, "go", {"pack": False}))
+            self.assertNotEqual(key, cache.key(self.User, "go", {"pack": True}))
+            self.assertNotEqual(key, cache.key(self.User, "java", {"pack": False}))
+            self.assertNotEqual(key, cache.key(self.Group, "go", {"pack": False}))
+            self.assertNotEqual(key, cache.key(self.User, "go", {"pack": False}, related=[self.Group]))
+
+            self.assertIsNone(cache.get(key))
+            cache.set(key, "type User struct {}")
+            self.assertEqual(cache.get(key), "type User struct {}")
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
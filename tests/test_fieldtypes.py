@@ -0,0 +1,196 @@
+import unittest
+from djangorm.lib.data import KField
+from djangorm.lib.fieldtypes import (
+    go_field_type, go_foreign_key_type, go_integer_type, integer_range, java_field_type, kotlin_type
+)
+from .support import extract_models, model_field
+
+MODELS = """
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+
+
+class Measure(models.Model):
+    status = models.IntegerField(choices=[(1, "draft"), (2, "published")])
+    level = models.SmallIntegerField(choices=[(1, "a"), ("Group", [(2, "b"), (300, "c")])])
+    percent = models.PositiveIntegerField(validators=[MinValueValidator(0), MaxValueValidator(100)])
+    delta = models.IntegerField(validators=[MinValueValidator(-5), MaxValueValidator(5)], null=True)
+    ratio = models.IntegerField(validators=[MinValueValidator(0.5), MaxValueValidator(9.5)])
+    big = models.BigIntegerField(null=True)
+    plain = models.IntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    count = models.DecimalField(max_digits=4, decimal_places=0)
+    huge = models.DecimalField(max_digits=30, decimal_places=0)
+    weight = models.FloatField()
+    token = models.UUIDField(null=True)
+    label = models.CharField(max_length=20, null=True)
+    data = models.JSONField(null=True)
+
+
+class Code(models.Model):
+    key = models.CharField(max_length=8, unique=True)
+    token = models.UUIDField(unique=True)
+    level = models.IntegerField(choices=[(1, "a"), (2, "b")], unique=True)
+
+
+class Plan(models.Model):
+    code = models.OneToOneField(Code, on_delete=models.CASCADE, primary_key=True)
+
+
+class Ref(models.Model):
+    measure = models.ForeignKey(Measure, on_delete=models.CASCADE, null=True)
+    code = models.ForeignKey(Code, on_delete=models.CASCADE, to_field="key")
+    token = models.ForeignKey(Code, on_delete=models.CASCADE, to_field="token", null=True, related_name="+")
+    level = models.ForeignKey(Code, on_delete=models.CASCADE, to_field="level", related_name="+")
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE)
+    user = models.ForeignKey("auth.User", on_delete=models.CASCADE)
+"""
+
+
+class IntegerRangeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = extract_models(MODELS)["Measure"]
+
+    def range(self, name):
+        return integer_range(model_field(self.model, name))
+
+    def test_class_range(self):
+        self.assertEqual(self.range("plain"), (-2 ** 31, 2 ** 31 - 1))
+        self.assertEqual(self.range("big"), (-2 ** 63, 2 ** 63 - 1))
+
+    def test_choices_narrow_the_range(self):
+        self.assertEqual(self.range("status"), (1, 2))
+        # grouped choices are flattened
+        self.assertEqual(self.range("level"), (1, 300))
+
+    def test_validators_narrow_the_range(self):
+        self.assertEqual(self.range("percent"), (0, 100))
+        self.assertEqual(self.range("delta"), (-5, 5))
+        # float limits are rounded inwards
+        self.assertEqual(self.range("ratio"), (1, 9))
+
+    def test_decimals_without_decimal_places(self):
+        self.assertEqual(self.range("count"), (-9999, 9999))
+        self.assertIsNone(self.range("huge"))
+        self.assertIsNone(self.range("price"))
+
+    def test_other_fields(self):
+        self.assertIsNone(self.range("weight"))
+        self.assertIsNone(self.range("label"))
+
+    def test_go_integer_type(self):
+        self.assertEqual(go_integer_type(0, 255), "uint8")
+        self.assertEqual(go_integer_type(0, 256), "uint16")
+        self.assertEqual(go_integer_type(-128, 127), "int8")
+        self.assertEqual(go_integer_type(-129, 0), "int16")
+        self.assertEqual(go_integer_type(-2 ** 63, 2 ** 63 - 1), "int64")
+        self.assertEqual(go_integer_type(0, 2 ** 64 - 1), "uint64")
+        with self.assertRaises(ValueError):
+            go_integer_type(-1, 2 ** 63)
+
+
+class GoFieldTypeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = extract_models(MODELS)["Measure"]
+
+    def go_type(self, name, compact=False, null="value"):
+        return go_field_type(model_field(self.model, name), compact, null)
+
+    def test_class_types_by_default(self):
+        self.assertEqual(self.go_type("status"), ("int32", False))
+        self.assertEqual(self.go_type("price"), ("float64", False))
+
+    def test_compact_types(self):
+        self.assertEqual(self.go_type("status", compact=True), ("uint8", False))
+        self.assertEqual(self.go_type("level", compact=True), ("uint16", False))
+        self.assertEqual(self.go_type("delta", compact=True), ("int8", False))
+        self.assertEqual(self.go_type("count", compact=True), ("int16", False))
+        self.assertEqual(self.go_type("huge", compact=True), ("decimal.Decimal", False))
+        self.assertEqual(self.go_type("price", compact=True), ("decimal.Decimal", False))
+
+    def test_primary_key_keeps_its_type(self):
+        self.assertEqual(self.go_type("id", compact=True), self.go_type("id"))
+
+    def test_pointer_policy(self):
+        self.assertEqual(self.go_type("big", null="pointer"), ("*int64", True))
+        self.assertEqual(self.go_type("delta", compact=True, null="pointer"), ("*int8", True))
+        self.assertEqual(self.go_type("plain", null="pointer"), ("int32", False))
+
+    def test_sql_policy(self):
+        self.assertEqual(self.go_type("big", null="sql"), ("sql.NullInt64", True))
+        self.assertEqual(self.go_type("label", null="sql"), ("sql.NullString", True))
+        self.assertEqual(self.go_type("token", null="sql"), ("uuid.NullUUID", True))
+        self.assertEqual(self.go_type("price", compact=True, null="sql"), ("decimal.NullDecimal", True))
+        # no sql.Null* type for int8
+        self.assertEqual(self.go_type("delta", compact=True, null="sql"), ("*int8", True))
+
+    def test_types_holding_nil_are_left_alone(self):
+        vtype, _ = self.go_type("data")
+        self.assertEqual(self.go_type("data", null="pointer"), (vtype, False))
+        self.assertEqual(self.go_type("data", null="sql"), (vtype, False))
+
+
+class GoForeignKeyTypeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = extract_models(MODELS)["Ref"]
+
+    def go_type(self, name, compact=False, null="value"):
+        return go_foreign_key_type(model_field(self.model, name), compact, null)
+
+    def test_type_of_the_related_primary_key(self):
+        self.assertEqual(self.go_type("measure"), ("uint32", False))
+        # through the primary key of Plan, a relation itself
+        self.assertEqual(self.go_type("plan"), ("uint32", False))
+
+    def test_type_of_to_field(self):
+        self.assertEqual(self.go_type("code"), ("string", False))
+        self.assertEqual(self.go_type("level"), ("int32", False))
+        self.assertEqual(self.go_type("level", compact=True), ("uint8", False))
+
+    def test_nullable_as_the_relation(self):
+        self.assertEqual(self.go_type("measure", null="pointer"), ("*uint32", True))
+        self.assertEqual(self.go_type("token", null="sql"), ("uuid.NullUUID", True))
+        # the referred field is not null, the column is
+        self.assertEqual(self.go_type("code", null="pointer"), ("string", False))
+
+    def test_unknown_related_model(self):
+        self.assertIsNone(model_field(self.model, "user").target)
+        self.assertEqual(self.go_type("user", null="pointer"), ("uint32", False))
+
+
+class JavaFieldTypeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = extract_models(MODELS)["Measure"]
+
+    def java_type(self, name, compact=False):
+        return java_field_type(model_field(self.model, name), compact)
+
+    def test_class_types_by_default(self):
+        self.assertEqual(self.java_type("status"), KField.Int)
+
+    def test_compact_types(self):
+        self.assertEqual(self.java_type("status", compact=True), KField.Byte)
+        # kotlin integers are signed
+        self.assertEqual(self.java_type("level", compact=True), KField.Short)
+        self.assertEqual(self.java_type("percent", compact=True), KField.Byte)
+        self.assertEqual(self.java_type("count", compact=True), KField.Short)
+        self.assertEqual(self.java_type("big", compact=True), KField.Long)
+        self.assertEqual(self.java_type("price", compact=True), KField.BigDecimal)
+        self.assertEqual(self.java_type("huge", compact=True), KField.BigDecimal)
+        self.assertEqual(self.java_type("weight", compact=True), KField.Double)
+        self.assertEqual(self.java_type("label", compact=True), self.java_type("label"))
+
+    def test_nullable_kotlin_types(self):
+        label = model_field(self.model, "label")
+        self.assertEqual(kotlin_type("String", label), "String")
+        self.assertEqual(kotlin_type("String", label, "pointer"), "String?")
+        self.assertEqual(kotlin_type("String", label, "sql"), "String?")
+        self.assertEqual(kotlin_type("Int", model_field(self.model, "plain"), "pointer"), "Int")
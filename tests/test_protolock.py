@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+from djangorm.lib.protolock import PROTO_RESERVED_RANGE, ProtoLock
+from .support import extract_models
+
+BOOK = """
+from django.db import models
+
+
+class Book(models.Model):
+    title = models.CharField(max_length=100)
+%s
+"""
+
+
+def book(fields):
+    return extract_models(BOOK % "\n".join("    " + f for f in fields))["Book"]
+
+
+class ProtoLockTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "d2g.proto.lock")
+
+    def number(self, model):
+        # a lock read from the file written by the previous run
+        lock = ProtoLock(self.path)
+        numbers = lock.number("shop.Book", model)
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write(lock.dumps())
+        return lock, numbers
+
+    def test_first_run_numbers_in_model_order(self):
+        lock, numbers = self.number(book(["pages = models.IntegerField()"]))
+        self.assertEqual(numbers.fields, (("id", 1), ("title", 2), ("pages", 3)))
+        self.assertEqual(numbers.reserved_numbers, ())
+        self.assertTrue(lock.changed)
+
+    def test_unchanged_model_keeps_its_numbers(self):
+        _, first = self.number(book(["pages = models.IntegerField()"]))
+        lock, second = self.number(book(["pages = models.IntegerField()"]))
+        self.assertEqual(first, second)
+        self.assertFalse(lock.changed)
+
+    def test_new_fields_follow_every_number_used(self):
+        self.number(book(["pages = models.IntegerField()"]))
+        _, numbers = self.number(book(["isbn = models.CharField(max_length=13)", "pages = models.IntegerField()"]))
+        self.assertEqual(dict(numbers.fields), {"id": 1, "title": 2, "pages": 3, "isbn": 4})
+
+    def test_removed_fields_are_reserved(self):
+        self.number(book(["pages = models.IntegerField()", "isbn = models.CharField(max_length=13)"]))
+        _, numbers = self.number(book(["isbn = models.CharField(max_length=13)"]))
+        self.assertEqual(dict(numbers.fields), {"id": 1, "title": 2, "isbn": 4})
+        self.assertEqual(numbers.reserved_numbers, (3,))
+        self.assertEqual(numbers.reserved_names, ("pages",))
+
+        # a field added back under a reserved name gets a new number, and the name is no longer reserved
+        _, numbers = self.number(book(["isbn = models.CharField(max_length=13)", "pages = models.IntegerField()"]))
+        self.assertEqual(dict(numbers.fields)["pages"], 5)
+        self.assertEqual(numbers.reserved_numbers, (3,))
+        self.assertEqual(numbers.reserved_names, ())
+
+    def test_type_change_reserves_the_old_number(self):
+        self.number(book(["pages = models.IntegerField()"]))
+        _, numbers = self.number(book(["pages = models.CharField(max_length=10)"]))
+        self.assertEqual(dict(numbers.fields)["pages"], 4)
+        self.assertEqual(numbers.reserved_numbers, (3,))
+        self.assertEqual(numbers.reserved_names, ())
+
+    def test_protobuf_reserved_range_is_skipped(self):
+        lock, _ = self.number(book([]))
+        lock.messages["shop.Book"]["fields"]["title"][0] = PROTO_RESERVED_RANGE.start - 1
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write(lock.dumps())
+        _, numbers = self.number(book(["pages = models.IntegerField()"]))
+        self.assertEqual(dict(numbers.fields)["pages"], PROTO_RESERVED_RANGE.stop)
+
+    def test_unknown_lock_version(self):
+        with open(self.path, "w", encoding="utf-8") as fh:
+            json.dump({"version": 0, "messages": {}}, fh)
+        with self.assertRaises(ValueError):
+            ProtoLock(self.path)
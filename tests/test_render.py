@@ -0,0 +1,29 @@
+import unittest
+from djangorm.lib.render import GoStructField, go_struct_size, pack_go_fields
+
+
+def struct(*types, primary_key=None):
+    return [GoStructField("", vtype, i == primary_key, "F%d" % i) for i, vtype in enumerate(types)]
+
+
+class PackGoFieldsTest(unittest.TestCase):
+
+    def test_sizes(self):
+        self.assertEqual(go_struct_size(["bool", "int64", "bool"]), (24, []))
+        self.assertEqual(go_struct_size(["int64", "bool", "bool"]), (16, []))
+        self.assertEqual(go_struct_size(["string", "int32"]), (24, []))
+
+    def test_orders_by_decreasing_alignment(self):
+        packed = pack_go_fields(struct("bool", "int64", "int16", "string", "int32"))
+        self.assertEqual([f.type for f in packed], ["int64", "string", "int32", "int16", "bool"])
+        self.assertEqual(go_struct_size(f.type for f in packed), (32, []))
+
+    def test_primary_key_first_and_ties_keep_declaration_order(self):
+        packed = pack_go_fields(struct("bool", "int64", "uint32", "float64", primary_key=2))
+        self.assertEqual([f.name for f in packed], ["F2", "F1", "F3", "F0"])
+
+    def test_never_grows_the_struct(self):
+        fields = struct("*int64", "bool", "time.Time", "uint8", "[]byte", "int16", "float32")
+        size, _ = go_struct_size(f.type for f in fields)
+        packed_size, _ = go_struct_size(f.type for f in pack_go_fields(fields))
+        self.assertLessEqual(packed_size, size)
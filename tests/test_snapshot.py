@@ -0,0 +1,78 @@
+import io
+import json
+import unittest
+from djangorm.lib.data import IndexIR
+from djangorm.lib.snapshot import SNAPSHOT_VERSION, dump_model, load_model, read_snapshot, write_snapshot
+from .support import extract_models
+
+MODELS = """
+from django.core.validators import MinValueValidator
+from django.db import models
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=50, db_index=True)
+    born = models.DateField(null=True, auto_now_add=True)
+
+    class Meta:
+        d2g_cache = "read-only"
+
+
+class Book(models.Model):
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    editors = models.ManyToManyField(Author, related_name="edited")
+    title = models.CharField(max_length=100, unique=True)
+    state = models.IntegerField(choices=[(1, "draft"), ("Done", [(2, "published")])], default=1)
+    price = models.DecimalField(max_digits=8, decimal_places=2, validators=[MinValueValidator(0.5)])
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["title", "-state"], name="book_title_state"),
+        ]
+        unique_together = [("author", "title")]
+"""
+
+
+class SnapshotTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.models = extract_models(MODELS)
+
+    def round_trip(self, models):
+        fh = io.StringIO()
+        write_snapshot([dump_model(m) for m in models], fh)
+        fh.seek(0)
+        return [load_model(entry["app_name"], entry) for entry in read_snapshot(fh)["models"]]
+
+    def test_round_trip(self):
+        models = list(self.models.values())
+        self.assertEqual(self.round_trip(models), models)
+
+    def test_round_trip_keeps_every_kind_of_value(self):
+        book = self.models["Book"]
+        self.assertTrue(book.indexes)
+        self.assertTrue(any(f.cardinality == "m2m" for f in book.fields))
+        self.assertTrue(any(f.choices for f in book.fields))
+        self.assertTrue(any(f.target for f in book.fields))
+        self.assertEqual(self.models["Author"].cache, "read-only")
+
+    def test_partial_index_round_trip(self):
+        # conditions of partial indexes are only known from django
+        book = self.models["Book"]
+        book = book._replace(indexes=book.indexes + (IndexIR("book_cheap", ("price",), False, '"price" < 10'),))
+        self.assertEqual(self.round_trip([book]), [book])
+
+    def test_routes_round_trip(self):
+        author = self.models["Author"]._replace(read_db="replica", write_db="default")
+        self.assertEqual(self.round_trip([author]), [author])
+        self.assertNotIn("read_db", dump_model(self.models["Author"]))
+
+    def test_snapshot_is_json(self):
+        fh = io.StringIO()
+        write_snapshot([dump_model(m) for m in self.models.values()], fh)
+        self.assertEqual(json.loads(fh.getvalue())["version"], SNAPSHOT_VERSION)
+
+    def test_other_versions_are_refused(self):
+        with self.assertRaises(ValueError):
+            read_snapshot(io.StringIO(json.dumps({"version": SNAPSHOT_VERSION - 1, "models": []})))